@@ -10,8 +10,8 @@ import datetime
 
 class TableRequester():
 
-    def __init__(self, host):
-        self._socketpath = "/tmp/udscommunicate"
+    def __init__(self, host, socketpath="/tmp/udscommunicate"):
+        self._socketpath = socketpath
         self._sock = None
 
     def _sendInt(self, val):
@@ -66,6 +66,33 @@ class TableRequester():
         except ValueError as e:
             print('Failed to set int, error: %s' % e)
 
+    # set several columns of a row, items = [(name, val)]
+    def setColumns(self, idx, items):
+        try:
+            self._connect()
+            self._sendInt(3)
+            self._sendInt(idx)
+            self._sendInt(len(items))
+            for name, val in items:
+                self._sendStr(name)
+                self._sendInt(val)
+            self._close()
+        except ValueError as e:
+            print('Failed to set int, error: %s' % e)
+
+    # set columns on every node with one broadcast, items = [(name, val)]
+    def setColumnsAll(self, items):
+        try:
+            self._connect()
+            self._sendInt(4)
+            self._sendInt(len(items))
+            for name, val in items:
+                self._sendStr(name)
+                self._sendInt(val)
+            self._close()
+        except ValueError as e:
+            print('Failed to set int, error: %s' % e)
+
     def getColumn(self, idx, name):
         try:
             self._connect()
@@ -83,6 +110,19 @@ class TableRequester():
         else:
             return val
 
+    # cache statistics of the sink, (hits, misses, GETs sent,
+    # GETs coalesced)
+    def getCacheStats(self):
+        try:
+            self._connect()
+            self._sendInt(5)
+            val = tuple(self._recvInt() for i in range(4))
+            self._close()
+        except SocketError as e:
+            print('%s: Connection Lost %s ' % (timeStampPrint(), e))
+            return (0, 0, 0, 0)
+        return val
+
     def getTableSize(self):
         try:
             self._connect()
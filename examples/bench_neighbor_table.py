@@ -0,0 +1,149 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Neighbor table benchmark: the former dict of Node objects against the
+# columnar NeighborTable, for memory, next hop selection (minimum hop
+# count, then maximum path quality) and expiry of the lost neighbors.
+# GNU Radio is not needed, NumPy is.
+#
+# usage: bench_neighbor_table.py [neighbors] [rounds]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+import random
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'python'))
+from neighbor_table import NeighborTable
+
+
+# Neighbor node information, as formerly kept in a dict
+# -----------------------------------------------------
+class Node():
+
+    def __init__(self, time, hc, pq):
+        self.last_heard = time
+        self.hc = hc
+        self.pq = pq
+        self.lpn = -1
+
+
+# ----------------------------------------------------
+# former next hop selection (SelectNextHop) on a dict
+# returns (min hc, max pq, list of addresses)
+# ----------------------------------------------------
+def dict_best_hops(nodes):
+    min = 255
+    for k in nodes.keys():
+        if nodes[k].hc < min:
+            min = nodes[k].hc
+    min_nodes = []
+    for k in nodes.keys():
+        if nodes[k].hc == min:
+            min_nodes.append(k)
+    max = 0
+    for k in min_nodes:
+        if nodes[k].pq > max:
+            max = nodes[k].pq
+    max_nodes = []
+    for k in min_nodes:
+        if nodes[k].pq == max:
+            max_nodes.append(k)
+    return (min, max, max_nodes)
+
+
+# -----------------------------------------------------
+# neighbors lost since "deadline", as found by the former
+# expiry (check_nodes) on a dict
+# -----------------------------------------------------
+def dict_stale(nodes, deadline):
+    return [k for k in nodes.keys() if nodes[k].last_heard < deadline]
+
+
+# --------------------------------------------------------------
+# neighbors lost since "deadline", as found by expire() (without
+# removing them)
+# --------------------------------------------------------------
+def table_stale(table, deadline):
+    return numpy.flatnonzero(table.present &
+                             (table.last_heard < deadline)).tolist()
+
+
+def dict_bytes(nodes):
+    size = sys.getsizeof(nodes)
+    for k, n in nodes.items():
+        size += sys.getsizeof(n) + sys.getsizeof(n.__dict__)
+        size += sum(sys.getsizeof(v) for v in n.__dict__.values())
+    return size
+
+
+def table_bytes(table):
+    return sum(v.nbytes for v in vars(table).values()
+               if hasattr(v, 'nbytes'))
+
+
+def timed(rounds, f, *args):
+    start = time.time()
+    for _ in xrange(rounds):
+        f(*args)
+    return (time.time() - start) / rounds * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 255
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    random.seed(1)
+    now = time.time()
+    nodes = {}
+    table = NeighborTable()
+    for addr in random.sample(range(1, 256), count):
+        t = now - random.uniform(0, 60)
+        hc = random.randint(1, 8)
+        pq = random.randint(1, 4)
+        nodes[addr] = Node(t, hc, pq)
+        table.add(addr, t, hc, pq)
+    # same selection by both tables
+    assert dict_best_hops(nodes)[:2] == table.best_hops()[:2]
+    assert (sorted(dict_best_hops(nodes)[2]) ==
+            sorted(table.best_hops()[2]))
+    print "%d neighbors, %d rounds" % (count, rounds)
+    print "%-24s %12s %12s" % ("", "dict", "columnar")
+    print "%-24s %12d %12d" % ("memory (bytes)", dict_bytes(nodes),
+                               table_bytes(table))
+    print "%-24s %12.1f %12.1f" % ("next hop selection (us)",
+                                   timed(rounds, dict_best_hops, nodes),
+                                   timed(rounds, table.best_hops))
+    deadline = now - 30
+    assert sorted(dict_stale(nodes, deadline)) == table_stale(table,
+                                                              deadline)
+    print "%-24s %12.1f %12.1f" % (
+        "expiry (us)", timed(rounds, dict_stale, nodes, deadline),
+        timed(rounds, table_stale, table, deadline))
+
+
+if __name__ == '__main__':
+    main()
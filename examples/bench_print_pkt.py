@@ -0,0 +1,88 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Cost of logging a received data frame, per frame.
+# "per byte": the former print_pkt(), one formatted and flushed write per
+# payload byte. "single": the current print_pkt(), one write per frame.
+# "record": the current data log, one buffered RecordWriter line.
+# GNU Radio is not needed, output goes to /dev/null.
+#
+# usage: bench_print_pkt.py [frames] [payload bytes]
+# ----------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'python'))
+from record_writer import RecordWriter
+
+PKT_MIN = 5
+
+
+def write_flush(stream, debugmsg, *args):
+    stream.write(debugmsg.format(*args) if args else debugmsg)
+    stream.flush()
+
+
+def per_byte(stream, pkt):
+    write_flush(stream, "PROT ID: {0} SRC: {1} DEST: {2} CNT: {3} CTRL: {4}",
+                *pkt[:PKT_MIN])
+    write_flush(stream, "DATA: ")
+    for i in range(PKT_MIN, len(pkt)):
+        write_flush(stream, "{0} ", pkt[i])
+    write_flush(stream, "\n")
+
+
+def single(stream, pkt):
+    write_flush(stream, "PROT ID: {0} SRC: {1} DEST: {2} CNT: {3} "
+                "CTRL: {4}\nDATA: {5}\n",
+                *(list(pkt[:PKT_MIN]) + [' '.join(map(str, pkt[PKT_MIN:]))]))
+
+
+def run(name, frames, log):
+    start = time.time()
+    for _ in xrange(frames):
+        log()
+    elapsed = time.time() - start
+    print "%-8s %8.2f us/frame %10.0f frames/s" % (
+        name, elapsed / frames * 1e6, frames / elapsed)
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    pkt = [1, 2, 1, 7, 0] + [k % 256 for k in range(size)]
+    print "%d frames, %d payload bytes" % (frames, size)
+    with open(os.devnull, 'w') as stream:
+        run("per byte", frames, lambda: per_byte(stream, pkt))
+        run("single", frames, lambda: single(stream, pkt))
+    writer = RecordWriter(os.devnull)
+    run("record", frames, lambda: writer.write(pkt))
+    writer.close()
+
+
+if __name__ == '__main__':
+    main()
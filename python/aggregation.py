@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Aggregation of the packets forwarded toward the sink.
+# The packets held during the aggregation window are encoded as records
+# (origin, control field flags, payload length, payload), concatenated
+# in the payload of one data packet with CTRL_AGG. A record longer than
+# an aggregate payload is not held, its packet is sent alone.
+# ----------------------------------------------------------------------
+
+from constants import (PKT_MIN, CTRL_AGG, AGG_ORIGIN, AGG_FLAGS,
+                       AGG_LENGTH, AGG_MIN, AGG_MAX_LENGTH)
+
+
+# ----------------------------------------------------------
+# records of an aggregate packet, a truncated record ends the
+# list; returns [(origin, control field flags, payload)]
+# ----------------------------------------------------------
+def agg_split(data):
+    records = []
+    k = PKT_MIN
+    while k + AGG_MIN <= len(data):
+        end = k + AGG_MIN + data[k+AGG_LENGTH]
+        if end > len(data):
+            break
+        records.append((data[k+AGG_ORIGIN], data[k+AGG_FLAGS],
+                        list(data[k+AGG_MIN:end])))
+        k = end
+    return records
+
+
+# Records waiting for aggregation
+# -------------------------------
+class Aggregator(object):
+
+    def __init__(self, max_length=AGG_MAX_LENGTH):
+        # payload length of an aggregate packet
+        self.max_length = max_length
+        # records waiting, their length
+        self.records = []
+        self.length = 0
+        # ARQ protocol used for the aggregate?
+        self.arq = False
+        # number of records aggregated, respectively of aggregates sent
+        self.record_cnt = 0
+        self.frame_cnt = 0
+
+    # length of the records waiting
+    def __len__(self):
+        return self.length
+
+    # --------------------------------------------------------------
+    # hold record "payload" of node "origin" with control field flags
+    # "flags", "arq" when its packet uses the ARQ protocol
+    # returns the packets to send now, [(flags, origin, payload, arq)]:
+    # the full aggregate (CTRL_AGG, origin None) or the record alone
+    # when it is too long to fit in an aggregate
+    # --------------------------------------------------------------
+    def add(self, origin, flags, payload, arq):
+        # too long to fit in an aggregate?
+        if AGG_MIN + len(payload) > self.max_length:
+            # send it alone
+            return [(flags, origin, list(payload), arq)]
+        packets = []
+        # no room left in the aggregate?
+        if self.length + AGG_MIN + len(payload) > self.max_length:
+            packets.append(self.flush())
+        self.records += [origin, flags, len(payload)] + list(payload)
+        self.length += AGG_MIN + len(payload)
+        self.arq = self.arq or bool(arq)
+        self.record_cnt += 1
+        return packets
+
+    # -------------------------------------------------------
+    # aggregate of the records waiting, None if no record
+    # returns (CTRL_AGG, None, payload, arq)
+    # -------------------------------------------------------
+    def flush(self):
+        if self.length == 0:
+            return None
+        packet = (CTRL_AGG, None, self.records, self.arq)
+        self.records = []
+        self.length = 0
+        self.arq = False
+        self.frame_cnt += 1
+        return packet
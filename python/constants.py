@@ -51,8 +51,8 @@ PKT_MIN = 5  # packet minimum length
 MGMT_MIN = 3  # MGMT packet minimum lenghth
 MGMT_RESP_MIN = 4  # MGMT RESP packet minimum length
 ACK_PKT_LENGTH = 5  # packet length
-MGMT_PKT_LENGTH = 9  # MGMT packet length
-MGMT_RESP_LENGTH = 9  # MGMT resp packet length
+MGMT_PKT_LENGTH = 10  # MGMT packet length
+MGMT_RESP_LENGTH = 10  # MGMT resp packet length
 # MGMT packet definition
 MGMT_TRACK = 2
 MGMT_ORG = 3
@@ -61,12 +61,29 @@ MGMT_DEST = 5
 MGMT_OPT = 6
 MGMT_OID = 7
 MGMT_HASH = 8
+MGMT_NEXT = 9  # next hop, NO_ADDR when flooded
+MGMT_BINDS = 10  # additional bindings, OPT|OID|VALUE each
+MGMT_BIND_LENGTH = 3  # length of an additional binding
+MGMT_MAX_BINDINGS = 8  # bindings per mgmt packet
 # MGMT ACK packet definition
 MGMT_RESP_FLAG = 4  # ERROR CODE 1 NORMAL MSG 0
 MGMT_RESP_SRC = 5
 MGMT_RESP_TRACK = 6
 MGMT_RESP_VAL = 7  # ERROR CODE/ NORMAL MSG
 MGMT_RESP_HASH = 8
+MGMT_RESP_SINK = 9  # sink the response is for
+MGMT_RESP_VALS = 10  # results of the additional bindings, FLAG|VALUE each
+MGMT_RESP_VAL_LENGTH = 2  # length of an additional result
+MGMT_BROADCAST = 255  # mgmt destination meaning every node
+MGMT_RESP_BCAST = 2  # resp flag, VALUE = number of ADDR|CODE acks
+MGMT_BCAST_MAX_ACKS = 32  # acks per broadcast resp packet
+MGMT_BCAST_DEPTH = 8  # hop count beyond which acks are held one window
+MGMT_GET_TIMEOUT = 30.0  # in-band GET without response, asked again
+
+# Anypath packet definition, a data packet whose destination field is
+# replaced by the number of candidate relays, listed after the header
+# by decreasing priority
+ANYPATH_NCAND = 2
 
 # Beacon packet definition
 # PKT_INDEX_PROT_ID = 0
@@ -74,6 +91,15 @@ MGMT_RESP_HASH = 8
 PKT_HC = 2  # hop count
 PKT_PQ = 3  # path quality
 BEACON_PKT_LENGTH = 4  # packet length
+PKT_PCOST = 4  # path cost, 2 bytes (big endian), optional
+BEACON_PCOST_LENGTH = 6  # packet length with path cost
+PKT_PARENT = 6  # parent (next hop) of the source, optional
+PKT_EPOCH = 7  # route epoch originated by the sink, optional
+BEACON_ROUTE_LENGTH = 8  # packet length with parent and epoch
+PKT_LOAD = 8  # forwarding load of the source, optional
+BEACON_LOAD_LENGTH = 9  # packet length with forwarding load
+PKT_SINK = 9  # sink the source routes to, optional
+BEACON_SINK_LENGTH = 10  # packet length with sink
 
 # Protocol ID field
 ARQ_PROTO = 0  # unicast acknowledgement packet
@@ -81,15 +107,90 @@ DATA_PROTO = 1  # unicast user data packet
 BEACON_PROTO = 2  # beacon protocol
 MGMT_PROTO = 3  # management protocol
 MGMT_RESP_PROTO = 4  # management resp protocol
+ANYPATH_PROTO = 5  # opportunistic (anypath) user data packet
 # sink address
 SINK_ADDR = 0
 # undefined address
 UNDEF_ADDR = -1
+# address field value meaning no node
+NO_ADDR = 255
 
 # Control field
 NO_ARQ = 0  # ARQ protocol is not applied
 ARQ = 1  # ARQ protocol is applied
+# control field flags of data packets, combined with the ARQ bit
+CTRL_REPORT = 0x02  # payload is a topology report for the sink
+CTRL_E2E = 0x04  # payload starts with an end-to-end header
+CTRL_AGG = 0x08  # payload is a sequence of aggregated records
+CTRL_TS = 0x10  # origin timestamp, after the end-to-end header if any
+CTRL_FLAGS = (ARQ | CTRL_REPORT | CTRL_E2E | CTRL_AGG |
+              CTRL_TS)  # all the valid bits
+
+# Debug levels
+DEBUG_DETAILED = 0  # all the messages
+DEBUG_ESSENTIAL = 1  # essential messages only
+DEBUG_FRAMES = 2  # all the messages and a dump of every received frame
 
 # FSM ARQ states
 CHANNEL_BUSY = 0
 CHANNEL_IDLE = 1
+
+# Forwarding policy over the next hops of equal quality
+FWD_FIRST = 0  # always the first next hop
+FWD_ROUND_ROBIN = 1  # next hops used in turn
+FWD_WEIGHTED = 2  # random next hop, weighted by link quality
+FWD_HASH = 3  # next hop determined by hashing the packet origin
+
+# Meta data keys used between the forwarding stages
+META_ORIGIN = 'LLSR_ORIGIN'  # address the packet is forwarded for
+META_CTRL = 'LLSR_CTRL'  # control field flags preserved when forwarding
+META_TRACK = 'LLSR_TRACK'  # track number of a relayed mgmt packet
+META_SINK = 'LLSR_SINK'  # sink a mgmt response is for
+META_SEQ = 'LLSR_SEQ'  # end-to-end sequence number of a delivered packet
+
+# Routing metric
+METRIC_HOP_COUNT = 0  # hop count, then path quality
+METRIC_ETX = 1  # expected transmission count to the sink
+ETX_SCALE = 16  # path cost units per expected transmission
+ETX_INFINITY = 0xFFFF  # path cost when not connected
+ETX_ALPHA = 0.9  # weight of the past in the delivery ratio estimate
+
+# Beacon transmission mode
+BEACON_PERIODIC = 0  # randomized fraction of the broadcast interval
+BEACON_TRICKLE = 1  # Trickle timer, adaptive interval
+
+# Neighbor eviction policy, when the neighbor table is full
+EVICT_WORST_LINK = 0  # lowest delivery ratio
+EVICT_HIGHEST_HC = 1  # highest hop count
+EVICT_LRU = 2  # least recently heard
+
+# Route epochs, sequence numbers originated by the sink
+EPOCH_WINDOW = 8  # lag of an epoch still considered as fresh
+
+# Load balancing
+LOAD_WINDOW = 10.0  # seconds of forwarded traffic counted in the load
+LOAD_MARGIN = 2  # load difference worth changing of next hop
+
+# End-to-end header definition, first bytes of the payload of a data
+# packet with CTRL_E2E
+E2E_ORIGIN = 0  # originating node
+E2E_SEQ = 1  # sequence number of the origin, two bytes (MSB first)
+E2E_LENGTH = 3  # header length
+TS_LENGTH = 4  # origin timestamp length, milliseconds (MSB first)
+
+# Aggregated record definition, payload of a data packet with CTRL_AGG
+# is a sequence of records
+AGG_ORIGIN = 0  # node the record is forwarded for
+AGG_FLAGS = 1  # control field flags of the original packet
+AGG_LENGTH = 2  # payload length
+AGG_MIN = 3  # record header length
+AGG_MAX_LENGTH = 200  # payload length of an aggregate packet
+
+# Topology report definition, payload of a data packet with CTRL_REPORT
+REPORT_ORIGIN = 0  # reporting node
+REPORT_PARENT = 1  # its parent (next hop)
+REPORT_HC = 2  # its hop count
+REPORT_NNBRS = 3  # number of neighbors, listed after the header
+REPORT_MIN = 4  # report length without neighbors
+REPORT_MAX_NEIGHBORS = 16  # neighbors per report, best links first
+REPORT_EXPIRY = 3  # report intervals a node stays without reporting
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# End-to-end duplicate suppression.
+# Per origin, a sliding bitmap records which of the last "window"
+# sequence numbers were delivered. A duplicate inside the window is
+# always detected and a new packet is never taken for a duplicate (no
+# false positive). A packet older than the window cannot be checked, it
+# is dropped. Only several consecutive packets older than the window are
+# taken as a restart of the origin: the last one is delivered and the
+# window starts again from it. Memory is "window" bits per origin.
+# ----------------------------------------------------------------------
+
+# sequence numbers are 16-bit
+SEQ_MODULO = 1 << 16
+# consecutive packets older than the window meaning a restart
+RESTART_COUNT = 3
+
+
+# Sliding window of one origin
+# ----------------------------
+class SeqWindow(object):
+    __slots__ = ('top', 'bitmap', 'stale')
+
+    def __init__(self, seq):
+        # highest sequence number delivered
+        self.top = seq
+        # bit k set when sequence number top-k was delivered
+        self.bitmap = 1
+        # consecutive packets older than the window
+        self.stale = 0
+
+
+# Duplicate filter, one sliding window per origin
+# -----------------------------------------------
+class DuplicateFilter(object):
+
+    def __init__(self, window, restart_count=RESTART_COUNT):
+        self.window = window
+        self.mask = (1 << window) - 1
+        self.restart_count = restart_count
+        self.origins = {}
+        # statistics
+        self.accepted = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.restarts = 0
+
+    # -------------------------------------------------------------
+    # packet "seq" from node "origin" received
+    # returns True if it is new, False if it is a duplicate
+    # -------------------------------------------------------------
+    def accept(self, origin, seq):
+        w = self.origins.get(origin)
+        if w is None:
+            self.origins[origin] = SeqWindow(seq)
+            self.accepted += 1
+            return True
+        ahead = (seq - w.top) % SEQ_MODULO
+        behind = (w.top - seq) % SEQ_MODULO
+        if 0 < ahead < SEQ_MODULO // 2:
+            # newer, slide the window
+            w.bitmap = (w.bitmap << ahead) & self.mask | 1
+            w.top = seq
+            w.stale = 0
+        elif behind < self.window:
+            # inside the window, already delivered?
+            w.stale = 0
+            if w.bitmap >> behind & 1:
+                self.duplicates += 1
+                return False
+            w.bitmap |= 1 << behind
+        else:
+            # older than the window, origin restarted?
+            w.stale += 1
+            if w.stale < self.restart_count:
+                # no! cannot be checked, drop it
+                self.stale += 1
+                return False
+            # yes! start again from this packet
+            self.origins[origin] = SeqWindow(seq)
+            self.restarts += 1
+        self.accepted += 1
+        return True
+
+    # ----------------------------------------------------------
+    # statistics
+    # returns (accepted, duplicates, dropped as older than the
+    #          window, restarts, origins, bitmap memory in bytes)
+    # ----------------------------------------------------------
+    def stats(self):
+        return (self.accepted, self.duplicates, self.stale, self.restarts,
+                len(self.origins),
+                len(self.origins) * ((self.window + 7) // 8))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# End-to-end flow statistics at the sink, per origin.
+# Everything is updated incrementally, in constant memory per origin:
+# counters, the highest sequence number and a latency histogram with
+# power of two buckets. No per-packet history is kept.
+# ----------------------------------------------------------------------
+
+# sequence numbers are 16-bit
+SEQ_MODULO = 1 << 16
+# timestamps are milliseconds, 32-bit
+TS_MODULO = 1 << 32
+# latency histogram buckets, upper bound of bucket k is 2**k ms
+# (the last one is unbounded)
+LATENCY_BUCKETS = 24
+
+
+# ------------------------------------------
+# origin timestamp of time "t", milliseconds
+# ------------------------------------------
+def timestamp(t):
+    return int(t*1000) % TS_MODULO
+
+
+# Flow of one origin
+# ------------------
+class OriginFlow(object):
+    __slots__ = ('first_time', 'last_time', 'received', 'bytes',
+                 'first_seq', 'top_seq', 'reordered', 'histogram',
+                 'lat_cnt', 'lat_sum', 'lat_min', 'lat_max', 'lat_negative')
+
+    def __init__(self, t):
+        self.first_time = t
+        self.last_time = t
+        self.received = 0
+        self.bytes = 0
+        # first and highest sequence numbers, unwrapped
+        self.first_seq = None
+        self.top_seq = None
+        # packets received after a higher sequence number
+        self.reordered = 0
+        # latencies, milliseconds
+        self.histogram = [0]*LATENCY_BUCKETS
+        self.lat_cnt = 0
+        self.lat_sum = 0
+        self.lat_min = None
+        self.lat_max = None
+        # negative latencies (origin clock ahead), not in the above
+        self.lat_negative = 0
+
+    def sequence(self, seq):
+        if self.top_seq is None:
+            self.first_seq = self.top_seq = seq
+            return
+        ahead = (seq - self.top_seq) % SEQ_MODULO
+        if ahead == 0:
+            return
+        if ahead < SEQ_MODULO // 2:
+            self.top_seq += ahead
+        else:
+            self.reordered += 1
+
+    def latency(self, ms):
+        self.histogram[min((max(ms, 1) - 1).bit_length(),
+                           LATENCY_BUCKETS - 1)] += 1
+        self.lat_cnt += 1
+        self.lat_sum += ms
+        self.lat_min = ms if self.lat_min is None else min(self.lat_min, ms)
+        self.lat_max = ms if self.lat_max is None else max(self.lat_max, ms)
+
+    def snapshot(self):
+        expected = (self.top_seq - self.first_seq + 1
+                    if self.top_seq is not None else None)
+        duration = self.last_time - self.first_time
+        return {'received': self.received,
+                'expected': expected,
+                'loss': (max(0.0, 1.0 - float(self.received) / expected)
+                         if expected else None),
+                'reordered': self.reordered,
+                'goodput': self.bytes / duration if duration > 0 else None,
+                'latency': {'count': self.lat_cnt,
+                            'min': self.lat_min,
+                            'mean': (float(self.lat_sum) / self.lat_cnt
+                                     if self.lat_cnt else None),
+                            'max': self.lat_max,
+                            'negative': self.lat_negative,
+                            'histogram': dict((1 << k, n) for k, n in
+                                              enumerate(self.histogram)
+                                              if n > 0)}}
+
+
+# Flow statistics, one flow per origin
+# ------------------------------------
+class FlowStats(object):
+
+    def __init__(self):
+        self.flows = {}
+
+    # ----------------------------------------------------------------
+    # packet of "size" payload bytes from node "origin" received at
+    # time "t", with sequence number "seq" and origin timestamp "ts"
+    # (None when absent)
+    # ----------------------------------------------------------------
+    def update(self, origin, seq, ts, size, t):
+        flow = self.flows.get(origin)
+        if flow is None:
+            flow = self.flows[origin] = OriginFlow(t)
+        flow.last_time = t
+        flow.received += 1
+        flow.bytes += size
+        if seq is not None:
+            flow.sequence(seq)
+        if ts is not None:
+            ms = (timestamp(t) - ts) % TS_MODULO
+            # more than half the modulo: negative, origin clock ahead
+            if ms >= TS_MODULO // 2:
+                flow.lat_negative += 1
+            else:
+                flow.latency(ms)
+
+    # ---------------------------------------------------------------
+    # snapshot of the statistics
+    # returns {origin: {'received', 'expected', 'loss', 'reordered',
+    #                   'goodput' (bytes/s), 'latency' (ms): {'count',
+    #                   'min', 'mean', 'max', 'negative' (discarded,
+    #                   origin clock ahead), 'histogram': {upper
+    #                   bound: count}}}}, None when unknown
+    # ---------------------------------------------------------------
+    def snapshot(self):
+        return dict((k, f.snapshot()) for k, f in self.flows.items())
@@ -4,6 +4,16 @@ import time
 import sys
 import os
 
+# socket of the management table of sink 0, the other sinks
+# append their address
+SOCKET_PATH = "/tmp/udscommunicate"
+
+
+def socket_path(sink):
+    if sink == 0:
+        return SOCKET_PATH
+    return "%s_%d" % (SOCKET_PATH, sink)
+
 
 class llsrHandler(SocketServer.BaseRequestHandler):
     mgmttable = None
@@ -24,6 +34,24 @@ class llsrHandler(SocketServer.BaseRequestHandler):
     def setColumn(self, idx, name, value):
         self.mgmttable.setColumn(idx, name, value)
 
+    def setColumns(self, idx, items):
+        self.mgmttable.setColumns(idx, items)
+
+    def setColumnsAll(self, items):
+        self.mgmttable.setColumnsAll(items)
+
+    def getCacheStats(self):
+        return self.mgmttable.getCacheStats()
+
+    def _recvItems(self):
+        count = self._recvInt()
+        items = []
+        for i in range(count):
+            name = self._recvStr()
+            val = self._recvInt()
+            items.append((name, val))
+        return items
+
     def _recvInt(self):
         return struct.unpack('I', self.request.recv(4))[0]
 
@@ -63,6 +91,17 @@ class llsrHandler(SocketServer.BaseRequestHandler):
             name = self._recvStr()
             val = self._recvInt()
             self.setColumn(idx, name, val)
+        # set several Columns of a row
+        elif rtype == 3:
+            idx = self._recvInt()
+            self.setColumns(idx, self._recvItems())
+        # set Columns on every node, with one broadcast
+        elif rtype == 4:
+            self.setColumnsAll(self._recvItems())
+        # get cache statistics
+        elif rtype == 5:
+            for val in self.getCacheStats():
+                self._sendInt(val)
         # error type
         else:
             print("Unrecognized request type %d" % rtype)
@@ -70,16 +109,18 @@ class llsrHandler(SocketServer.BaseRequestHandler):
 
 
 class ManagerServer(SocketServer.UnixStreamServer):
-    if os.path.exists("/tmp/udscommunicate"):
-        os.remove("/tmp/udscommunicate")
 
-    def __init__(self, tableclass, socketfile="/tmp/udscommunicate",
+    def __init__(self, tableclass, socketfile=SOCKET_PATH,
                  timeout=0):
+        if os.path.exists(socketfile):
+            os.remove(socketfile)
+        # handler class of this server, bound to its own table
+        handler = type('llsrHandler', (llsrHandler,),
+                       {'mgmttable': tableclass})
         SocketServer.UnixStreamServer.__init__(self,
                                                socketfile,
-                                               llsrHandler)
+                                               handler)
         self.socket.settimeout(timeout)
-        self.RequestHandlerClass.mgmttable = tableclass
 
 
 # class Test():
@@ -68,209 +68,242 @@ import hashlib
 import Queue
 import struct
 import collections
+import contextlib
+import json
+import os
 from datetime import datetime
 from math import pi
 from constants import *
 import llsrHandler
+from neighbor_table import NeighborTable
+from topology import TopologyDB
+from record_writer import RecordWriter
+from sink_storage import SinkStorage
+from dedupe import DuplicateFilter
+from flow_stats import FlowStats, timestamp
+from mgmt_table import MGMTTable
+from mgmt_agent import mgmt_bindings, mib_agent
+from aggregation import Aggregator, agg_split
+
+
+# Trickle timer for beacons (RFC 6206)
+# -------------------------------------
+class TrickleTimer(object):
+
+    def __init__(self, imin, doublings, k):
+        # minimum interval
+        self.imin = imin
+        # maximum interval
+        self.imax = imin * (2 ** doublings)
+        # redundancy constant
+        self.k = k
+        # number of suppressed transmissions
+        self.suppressed = 0
+        self.reset(time.time())
 
+    # -------------------------------------------
+    # start an interval of the current length
+    # -------------------------------------------
+    def _start(self, now):
+        # beginning of the interval
+        self.start = now
+        # transmission time, in the second half of the interval
+        self.fire_time = now + self.interval * (0.5 + 0.5 * random.random())
+        # number of consistent beacons heard
+        self.counter = 0
+        # transmission time passed?
+        self.fired = False
+
+    # ---------------------------------
+    # restart with the minimum interval
+    # ---------------------------------
+    def reset(self, now):
+        self.interval = self.imin
+        self._start(now)
+
+    # ---------------------------
+    # a consistent beacon is heard
+    # ---------------------------
+    def consistent(self):
+        self.counter += 1
 
-# Neighbor node information
-# -------------------------
-class Node():
-
-    def __init__(self, time, hc, pq):
-        # last time a beacon received
-        self.last_heard = time
-        # hop count
-        self.hc = hc
-        # path quality
-        self.pq = pq
-        # last packet number
-        self.lpn = -1
-
-    def update(self, time, hc, pq):
-        # last time a beacon received
-        self.last_heard = time
-        # hop count
-        self.hc = hc
-        # path quality
-        self.pq = pq
-
-    def setLpn(self, lpn):
-        # set last packet number
-        self.lpn = lpn
-
-
-# Monitoring Table for SINK
-# --------------------
-class MGMTTable(object):
-
-    def __init__(self):
-        # nodes kept for management
-        self.MGMTTable = []
-        # dict for keeping the cmd
-        self.cmddict = {}
-        # track pack index
-        self.mgmttrackIndex = 0
-        self.oidRef = {'nodeAddr': 1,
-                       'maxAttempts': 2,
-                       'broadcastInterval': 3,
-                       'mgmtMode': 4}
-        # global Queue for putting MGMT CMD
-        self.pktforsent = Queue.Queue()
-
-    def getTableSize(self):
-        return len(self.MGMTTable)
-
-    def getColumn(self, idx, name):
-        if self.MGMTTable[idx]['mgmtInfo'] != 4:
-            return self.MGMTTable[idx][name]
-        else:
-            return None
+    # ------------------------------
+    # an inconsistency is detected
+    # ------------------------------
+    def inconsistent(self, now):
+        if self.interval > self.imin:
+            self.reset(now)
 
-    # generate cmd msg for in-band management VALUE DEST OPT OID
-    def setColumn(self, idx, name, value):
-        # mgmt info :
-        # 0 node alive, 1 request send
-        # 2 item updated 3 mgmtError 4 node deactivated
-        # check the status of this node if it is alive
-        if self.MGMTTable[idx]['mgmtInfo'] != 4:
-            # set mgmtInfo to be create and go
-            self.MGMTTable[idx]['mgmtInfo'] = 1
-            # store the cmd in the cmd table
-            destNode = self.MGMTTable[idx]['nodeAddr']
-            mgmtmsg = [value, destNode, 1, self.oidRef.get(name)]
-            # cmd stored for resp msg processing
-            storedcmd = [destNode, idx, name, value]
-            # putting into the cmd dict
-            self.cmddict.update({self.mgmttrackIndex: storedcmd})
-            # putting msg into queue ready for sent
-            self.pktforsent.put(self._pdupacker(mgmtmsg))
-            # check and reset the mgmttrackIndex
-            self.mgmttrackIndex = (self.mgmttrackIndex + 1) % 256
-        else:
-            sys.stderr.write("SET failed, SNMP MGMT Node is deactivated:\n"
-                             % addr)
-
-    # processing RESP MSG from In-Band
-    # FLAG, PKT_SOURCE, TRACK NUMBER, CODE/VALUE
-    def processingColumn(self, respmsg):
-        flag = respmsg[0]
-        pktsrc = respmsg[1]
-        tracknumber = respmsg[2]
-        val = respmsg[3]
-        # check if the cmd registered in the genereated cmd history
-        if tracknumber in self.cmddict.keys():
-            # retrive the cmd
-            cmd = self.cmddict.get(tracknumber)
-            # check if in cmd dest node and pkt source node is the same
-            if self.MGMTTable[cmd[1]]['nodeAddr'] == pktsrc:
-                #  check the return msg flag and set opt success
-                if flag == 1 and val == 0:
-                    self.MGMTTable[cmd[1]][cmd[2]] = cmd[3]
-                    # mgmt info :
-                    # 0 node alive, 1 request send,
-                    # 2 item updated 3 mgmtError 4 node deactivated
-                    self.MGMTTable[cmd[1]]['mgmtInfo'] = 2
-                    self.MGMTTable[cmd[1]]['lastUpdated'] = cmd[2]
-                    self.MGMTTable[cmd[1]]['lastUpdatedTime'] = self._utcTime()
-                # mgmt opt failed
-                elif flag == 1 and val != 0:
-                    # mgmt info shows error
-                    self.MGMTTable[cmd[1]]['mgmtInfo'] = 3
-                    self.MGMTTable[cmd[1]][cmd[2]] = val
-                    self.MGMTTable[cmd[1]]['lastUpdatedTime'] = self._utcTime()
-                    self.MGMTTable[cmd[1]]['lastUpdated'] = cmd[2]
-                # opt get value back
-                elif flag == 0:
-                    self.MGMTTable[cmd[1]]['mgmtInfo'] = 2
-                    self.MGMTTable[cmd[1]][cmd[2]] = val
-                    self.MGMTTable[cmd[1]]['lastUpdated'] = cmd[2]
-                    self.MGMTTable[cmd[1]]['lastUpdatedTime'] = self._utcTime()
-                else:
-                    sys.stedrr.wreite("SNMP manager received wrong "
-                                      "flag in response message!\n")
-            else:
-                sys.stderr.write("wrong id matching in the MGMTTable nodeAddr:"
-                                 "% d pktsrc: % d" %
-                                 (self.MGMTTable[cmd[1]]['nodeAddr'],
-                                  pktsrc))
-        else:
-            sys.stderr.write("track number %d is "
-                             "not existed in the cmd dict \n")
-
-    # add row
-    def addRow(self, row):
-        flag = self._checkNode(row['nodeAddr'])
-        # node new?
-        if flag == -1:
-            self.MGMTTable.append(row)
-            sys.stderr.write("SNMP MGMT Node %d added:\n" % row['nodeAddr'])
-        # not new
-        else:
-            # mgmt info shows the node is not activated
-            if self.MGMTTable[flag]['mgmtInfo'] == 4:
-                # switch back to activated
-                self.MGMTTable[flag]['mgmtInfo'] = 0
-                sys.stderr.write("SNMP MGMT Node %d "
-                                 "activated:\n" % row['nodeAddr'])
-            else:
-                sys.stderr.write("SNMP MGMT Node %d is "
-                                 "already activated:\n" % row['nodeAddr'])
-
-    # deactivated
-    def deactivateNode(self, addr):
-        if self._checkNode(addr) != -1:
-            idx = self._checkNode(addr)
-            if self.MGMTTable[idx]['mgmtInfo'] != 4:
-                self.MGMTTable[idx]['mgmtInfo'] == 4
-                sys.stderr.write("SNMP MGMT Node %d deactivated:\n" % addr)
-            else:
-                sys.stderr.write("SNMP MGMT Node %d deactivated failed "
-                                 "it is already deactivated:\n" % addr)
-        else:
-            sys.stderr.write("SNMP MGMT Node %d not existed:\n" % addr)
+    # ---------------------------------------------------------
+    # advance the timer, returns True when a beacon is to be sent
+    # ---------------------------------------------------------
+    def poll(self, now):
+        send = False
+        # transmission time reached?
+        if not self.fired and now >= self.fire_time:
+            self.fired = True
+            # not enough consistent beacons heard?
+            send = self.counter < self.k
+            if not send:
+                self.suppressed += 1
+        # end of the interval? double it
+        if now >= self.start + self.interval:
+            self.interval = min(2 * self.interval, self.imax)
+            self._start(now)
+        return send
+
+
+# Radio interface: one to_radio/from_radio port pair, with its own
+# neighbor table, routes through its neighbors and ARQ state
+# ----------------------------------------------------------------
+class RadioInterface(object):
+
+    def __init__(self, index, cost):
+        self.index = index
+        # message ports, numbered after the first interface
+        suffix = str(index) if index > 0 else ''
+        self.port_out = pmt.intern('to_radio' + suffix)
+        self.port_in = pmt.intern('from_radio' + suffix)
+        # relative airtime of a transmission, weighs the link ETX
+        self.cost = cost
+        # table of neighbor nodes
+        self.nodes = NeighborTable()
+        # route through this interface
+        self.hc = 255  # hop count
+        self.pq = 0  # path quality
+        self.pcost = ETX_INFINITY  # path cost
+        self.root = UNDEF_ADDR  # sink reached
+        self.next_hop = UNDEF_ADDR
+        # next hops of equal quality (the first one is next_hop)
+        self.next_hops = []
+        # round-robin position in the next hops
+        self.rr_index = 0
+        # candidate next hop better than the current one, and since when
+        self.challenger = UNDEF_ADDR
+        self.challenger_since = 0.0
+        # initial channel state
+        self.CHANNEL_state = CHANNEL_IDLE
+        # packet number expected in an ack
+        self.expected_ack = -1
+        # number of expected mgmt pkt
+        self.mgmt_expected_ack = -1
+        # time of transmission
+        self.time_of_tx = 0.0
+        # time of last transmission
+        self.last_tx_time = None
+        # number of retransmissions of the current packet
+        self.retries = 0
+        # percentage used in backoff calculation
+        self.next_random_backoff_percentage = 0.0
+        # packet handled by the ARQ protocol
+        self.arq_pdu_tuple = None
+        # pkt type using fsm (0 data, 1 mgmt, 2 mgmt resp)
+        self.pkttype = -1  # default
+        # next hop of the packet handled by the ARQ protocol
+        self.arq_next_hop = UNDEF_ADDR
+        # candidate relays of the packet handled by the ARQ protocol
+        self.arq_candidates = []
+        # anypath packets waiting for their relay delay, key is
+        # (source, number), value is (timer, data packet, meta data)
+        self.anypath_pending = {}
+        # queue of mgmt packets waiting to be transmitted
+        self.mgmt_queue = Queue.Queue()
+        # downlink routes, key is the destination, value is
+        # [neighbor leading to the destination, time learned]
+        self.downlinks = {}
+        # next hop of the mgmt packet handled by the ARQ protocol
+        self.mgmt_next_hop = NO_ADDR
+        # mgmt packet handled by the ARQ protocol to be flooded?
+        self.mgmt_flood = False
 
-    # -------------------------
-    # PDU packing for SINK MGMT MSG(SAME IN LLSR_MAC)
-    # -------------------------
-    def _pdupacker(self, data):
-        pdu = pmt.cons(
-                pmt.to_pmt({}),
-                pmt.init_u8vector(len(data), data))
-        return pdu
 
-    # ------------------------------
-    # check node
-    # ------------------------------
-    def _checkNode(self, addr):
-        for r in self.MGMTTable:
-            if r['nodeAddr'] == addr:
-                return self.MGMTTable.index(r)
-        return -1
+# ----------------------------------------------------------
+# attribute of the current radio interface of an llsr_mac
+# ----------------------------------------------------------
+def _iface_attr(name):
+    def getter(self):
+        return getattr(self.iface, name)
 
-    # ------------------------------
-    # UTC Time for SNMP
-    # ------------------------------
-    def _utcTime(self):
-        temp = datetime.utcnow().strftime("%Y,%m,%d,%H,%M,%S,%f")
-        temp = temp[: -5].split(',')
-        timestr = map(int, temp)
-        final = struct.pack('>HBBBBBB', *timestr)
-        return final
+    def setter(self, value):
+        setattr(self.iface, name, value)
+    return property(getter, setter)
 
 
 class llsr_mac(gr.basic_block):
     """
     Location-free Link State Routing
     """
+
+    # state of the current radio interface (self.iface)
+    nodes = _iface_attr('nodes')
+    next_hop = _iface_attr('next_hop')
+    next_hops = _iface_attr('next_hops')
+    rr_index = _iface_attr('rr_index')
+    challenger = _iface_attr('challenger')
+    challenger_since = _iface_attr('challenger_since')
+    CHANNEL_state = _iface_attr('CHANNEL_state')
+    expected_ack = _iface_attr('expected_ack')
+    mgmt_expected_ack = _iface_attr('mgmt_expected_ack')
+    time_of_tx = _iface_attr('time_of_tx')
+    last_tx_time = _iface_attr('last_tx_time')
+    retries = _iface_attr('retries')
+    next_random_backoff_percentage = _iface_attr(
+        'next_random_backoff_percentage')
+    arq_pdu_tuple = _iface_attr('arq_pdu_tuple')
+    pkttype = _iface_attr('pkttype')
+    arq_next_hop = _iface_attr('arq_next_hop')
+    arq_candidates = _iface_attr('arq_candidates')
+    anypath_pending = _iface_attr('anypath_pending')
+    mgmt_queue = _iface_attr('mgmt_queue')
+    downlinks = _iface_attr('downlinks')
+    mgmt_next_hop = _iface_attr('mgmt_next_hop')
+    mgmt_flood = _iface_attr('mgmt_flood')
+
     def __init__(self, addr, timeout, max_attempts, broadcast_interval=2,
                  exp_backoff=True, backoff_randomness=0.05,
                  node_expiry_delay=60.0,
                  max_queue_size=10,
                  errors_to_file=False,
                  data_to_file=False,
-                 debug_level=0):
+                 debug_level=0,
+                 forwarding_policy=FWD_FIRST,
+                 routing_metric=METRIC_HOP_COUNT,
+                 beacon_mode=BEACON_PERIODIC,
+                 trickle_doublings=6,
+                 trickle_k=1,
+                 triggered_updates=False,
+                 trigger_holdoff=0.5,
+                 trigger_min_spacing=2.0,
+                 route_hysteresis=False,
+                 route_margin=1.0,
+                 route_dwell=30.0,
+                 max_neighbors=0,
+                 eviction_policy=EVICT_WORST_LINK,
+                 loop_avoidance=False,
+                 route_epoch_timeout=30.0,
+                 opportunistic=False,
+                 anypath_candidates=3,
+                 anypath_slot=0.05,
+                 load_balancing=False,
+                 load_weight=0.0,
+                 state_file='',
+                 snapshot_interval=60.0,
+                 report_interval=0.0,
+                 reverse_path_mgmt=False,
+                 downlink_timeout=300.0,
+                 sinks=None,
+                 num_radios=1,
+                 radio_costs=None,
+                 e2e_header=False,
+                 storage_dir='',
+                 aggregation_window=0.0,
+                 dedupe_window=0,
+                 e2e_timestamp=False,
+                 flow_stats=False,
+                 bcast_counter=3,
+                 bcast_delay=0.5,
+                 bcast_ack_window=1.0,
+                 mgmt_cache_ttl=0.0):
         gr.basic_block.__init__(self,
                                 name="llsr_mac",
                                 in_sig=None,
@@ -288,21 +321,31 @@ class llsr_mac(gr.basic_block):
             sys.stderr.write("*** START: "
                              + time.asctime(time.localtime(time.time()))+"\n")
             sys.stderr.flush()
+        # record writer of the delivered frames, None if not logged
+        self.record_writer = None
         if data_to_file:
-            # self.logdatainfo = logging.getLogger('simple logger_data')
-            # hdlr_2 = logging.FileHandler('data_'+str(addr)+'.log')
-            # hdlr_2.setFormatter(formatter)
-            # self.logdatainfo.addHandler(hdlr_2)
-            # redirect standard output stream to a file
-            dataFilename = "data_"+str(addr)+".txt"
-            sys.stdout = open(dataFilename, "w")
-            sys.stdout.write("***START: "
-                             + time.asctime(time.localtime(time.time()))+"\n")
-            sys.stdout.flush()
+            # one buffered record per delivered frame
+            self.record_writer = RecordWriter("data_"+str(addr)+".txt")
         # debug mode flag
         self.debug_stderr = True
         # node address
         self.addr = addr
+        # sink addresses
+        self.sinks = list(sinks) if sinks else [SINK_ADDR]
+        # this node is a sink?
+        self.is_sink = self.addr in self.sinks
+        # sink this node routes to, UNDEF_ADDR if none
+        self.root = self.addr if self.is_sink else UNDEF_ADDR
+        # radio interfaces, relative airtime of their transmissions
+        # (1.0 for the interfaces without a given cost)
+        radio_costs = list(radio_costs or [])
+        radio_costs += [1.0]*(num_radios - len(radio_costs))
+        self.ifaces = [RadioInterface(k, radio_costs[k])
+                       for k in range(num_radios)]
+        # interface of the best route
+        self.route_iface = 0
+        # interface the node is currently handling
+        self.iface = self.ifaces[0]
         # packet number
         self.pkt_cnt = 0
         # number of transmitted ARQ packets
@@ -315,46 +358,168 @@ class llsr_mac(gr.basic_block):
         self.max_attempts = max_attempts
         # total number of received bytes
         self.rx_byte_count = 0
-        # initial channel state
-        self.CHANNEL_state = CHANNEL_IDLE
-        # packet number expected in an ack
-        self.expected_ack = -1
         # retransmission timeout
         self.timeout = timeout
-        # time of transmission
-        self.time_of_tx = 0.0
-        # time of last transmission
-        self.last_tx_time = None
         # True whe exponential backoff is enbaled
         self.exp_backoff = exp_backoff
         # random factor used in backoff calculation
         self.backoff_randomness = backoff_randomness
-        # percentage used in backoff calculation
-        self.next_random_backoff_percentage = 0.0
         # queue of packets waiting to be transmitted
         self.queue = Queue.Queue()
-        self.mgmt_queue = Queue.Queue()
         # queue of mgmt resp packets waiting to be transmitted
         self.mgmt_resp_queue = Queue.Queue()
         # number of mgmt pkt
         self.mgmt_track = 0
-        # number of expected mgmt pkt
-        self.mgmt_expected_ack = -1
         # max queue size for both data mgmt and mgmt resp
         self.max_queue_size = max_queue_size
-        # pkt type using fsm (0 data, 1 mgmt, 2 mgmt resp)
-        self.pkttype = -1  # default
         # table of time stamp and mgmt pkt
         self.lasttrack = {}
         # secret key
         self.secretkey = "12345"
-        # dictionary of neighbor nodes
-        self.nodes = {}
+        # maximum number of neighbors, 0 for no limit
+        self.max_neighbors = max_neighbors
+        # neighbor evicted when the table is full
+        self.eviction_policy = eviction_policy
         self.node_expiry_delay = node_expiry_delay
         # beacon broadcast period
         self.broadcast_interval = broadcast_interval
+        # beacon transmission mode
+        self.beacon_mode = beacon_mode
+        # Trickle timer, minimum interval is the broadcast interval
+        self.trickle = TrickleTimer(broadcast_interval, trickle_doublings,
+                                    trickle_k)
+        # number of transmitted beacons
+        self.beacons_txed = 0
+        # beacon triggered by a route change?
+        self.triggered_updates = triggered_updates
+        # maximum random delay of a triggered beacon
+        self.trigger_holdoff = trigger_holdoff
+        # minimum time between two triggered beacons
+        self.trigger_min_spacing = trigger_min_spacing
+        # timer of the pending triggered beacon
+        self.trigger_timer = None
+        # time of the last triggered beacon
+        self.last_trigger_time = None
+        # number of triggered beacons
+        self.triggered_beacons = 0
         # debug information
         self.debug_level = debug_level
+        # policy for spreading traffic over the equal-quality next hops
+        self.forwarding_policy = forwarding_policy
+        # per next hop traffic counters: [sent, retransmitted, acknowledged]
+        self.fwd_counters = collections.defaultdict(lambda: [0, 0, 0])
+        # routing metric used for selecting the next hop
+        self.routing_metric = routing_metric
+        # keep the current next hop unless a better one is stable?
+        self.route_hysteresis = route_hysteresis
+        # improvement required from a candidate next hop, in path quality
+        # units (hop count metric) or transmissions (ETX metric)
+        self.route_margin = route_margin
+        # time a candidate must remain better before being adopted
+        self.route_dwell = route_dwell
+        # times of the last next hop changes
+        self.route_change_times = collections.deque()
+        # parent advertised and route epochs enforced?
+        self.loop_avoidance = loop_avoidance
+        # time after which a route without a new epoch is stale
+        self.route_epoch_timeout = route_epoch_timeout
+        # with Trickle, two beacons of the sink (i.e., two epochs) can be
+        # up to 1.5 maximum interval apart, keep the timeout above that
+        if (self.beacon_mode == BEACON_TRICKLE and
+                self.route_epoch_timeout < 2 * self.trickle.imax):
+            self.route_epoch_timeout = 2 * self.trickle.imax
+            self.debugPrinting(1, 0, "Node {0}: route epoch timeout raised "
+                               "to {1} s, twice the Trickle maximum "
+                               "interval\n", self.addr,
+                               self.route_epoch_timeout)
+        # latest route epoch, originated by the sink (-1 if unknown)
+        self.epoch = 0 if self.is_sink else -1
+        # time the epoch last advanced
+        self.epoch_time = time.time()
+        # latest route epoch of each sink, key is the sink address,
+        # value is [epoch, time the epoch last advanced]
+        self.sink_epochs = {}
+        if self.is_sink:
+            self.sink_epochs[self.addr] = [self.epoch, self.epoch_time]
+        # opportunistic (anypath) forwarding of ARQ data packets?
+        self.opportunistic = opportunistic
+        # maximum number of candidate relays in a packet
+        self.anypath_candidates = anypath_candidates
+        # relay delay per candidate rank
+        self.anypath_slot = anypath_slot
+        # number of packets relayed, respectively suppressed, as candidate
+        self.anypath_relayed = 0
+        self.anypath_suppressed = 0
+        # load-aware next hop selection?
+        self.load_balancing = load_balancing
+        # with the ETX metric, path cost units per unit of neighbor load
+        self.load_weight = load_weight
+        # forwarded traffic per previous hop, key is the neighbor
+        # address, value is [packets, bytes]
+        self.fwd_from = collections.defaultdict(lambda: [0, 0])
+        # times packets were forwarded, during the last load window
+        self.fwd_times = collections.deque()
+        # file of the state snapshots, empty for no snapshot
+        self.state_file = state_file
+        # period of the state snapshots
+        self.snapshot_interval = snapshot_interval
+        # time of the last state snapshot
+        self.last_snapshot_time = time.time()
+        # period of the topology reports to the sink, 0 for no report
+        self.report_interval = report_interval
+        # time of the last topology report
+        self.last_report_time = None
+        # parent in the last topology report
+        self.reported_parent = UNDEF_ADDR
+        # topology database of the sink
+        self.topology = None
+        # mgmt packets unicast along the reverse path, when known?
+        self.reverse_path_mgmt = reverse_path_mgmt
+        # lifetime of a learned downlink route
+        self.downlink_timeout = downlink_timeout
+        # number of mgmt packets unicast, respectively flooded
+        self.mgmt_unicast = 0
+        self.mgmt_flooded = 0
+        # number of mgmt responses for other sinks, forwarded toward
+        # their sink, respectively dropped for lack of a route
+        self.foreign_resps = 0
+        self.resps_no_route = 0
+        # broadcast mgmt packet not relayed once heard that many times,
+        # 0 for always relayed
+        self.bcast_counter = bcast_counter
+        # maximum random delay before relaying a broadcast mgmt packet
+        self.bcast_delay = bcast_delay
+        # holding time of the broadcast acks, per hop below the sink
+        self.bcast_ack_window = bcast_ack_window
+        # broadcast mgmt packets waiting to be relayed, key is
+        # (origin, track), value is [timer, copies heard, PDU pair]
+        self.flood_pending = {}
+        # broadcast acks waiting to be sent, key is (sink, track),
+        # value is [timer, {node: code}]
+        self.bcast_acks = {}
+        # number of broadcast mgmt packets sent (one per interface),
+        # relayed, respectively suppressed
+        self.bcast_sent = 0
+        self.bcast_relayed = 0
+        self.bcast_suppressed = 0
+        # end-to-end header in the originated data packets?
+        self.e2e_header = e2e_header
+        # end-to-end sequence number
+        self.e2e_seq = 0
+        # storage of the delivered data (sink), None if not stored
+        self.storage = None
+        # end-to-end duplicate filter (sink), None if not filtered
+        self.dedupe = None
+        # origin timestamp in the originated data packets?
+        self.e2e_timestamp = e2e_timestamp
+        # per origin flow statistics (sink), None if not computed
+        self.flow_stats = None
+        # holding time of the packets to aggregate, 0 for no aggregation
+        self.aggregation_window = aggregation_window
+        # records waiting for aggregation
+        self.aggregator = Aggregator()
+        # timer of the aggregation window
+        self.agg_timer = None
         # MGMTMODE
         self.mgmtMode = 0
         # SNMP mgmt table for sink
@@ -365,12 +530,28 @@ class llsr_mac(gr.basic_block):
         # routing state
         # -------------------------------------------------
         # sink node?
-        if self.addr == SINK_ADDR:
+        if self.is_sink:
             # yes!
             self.hc = 0  # hop count
             self.pq = 255  # path quality, max value
-            self.next_hop = SINK_ADDR
-            self.MTB = MGMTTable()
+            self.pcost = 0  # path cost
+            for iface in self.ifaces:
+                iface.next_hop = self.addr
+            # one row per neighbor, plus the sink itself
+            self.MTB = MGMTTable(max_neighbors+1 if max_neighbors > 0
+                                 else 0, mgmt_cache_ttl)
+            # topology database, built from the reports
+            self.topology = TopologyDB(self.addr)
+            # delivered data storage
+            if storage_dir:
+                self.storage = SinkStorage(storage_dir)
+            # sequence numbers remembered per origin, below half the
+            # sequence number space
+            if dedupe_window > 0:
+                self.dedupe = DuplicateFilter(min(dedupe_window, 32767))
+            # flow statistics
+            if flow_stats:
+                self.flow_stats = FlowStats()
             # mgmttable added SINK
             self.MTB.addRow(self.createdefaultNewrow(self.addr))
             self.debugPrinting(0, 0, "SNMP_Table Size: {0},"
@@ -379,7 +560,8 @@ class llsr_mac(gr.basic_block):
                                self.MTB.getColumn(-1, 'nodeAddr'))
             # Start SNMP TCP-Request Service
             try:
-                self._snmpManager = llsrHandler.ManagerServer(self.MTB)
+                self._snmpManager = llsrHandler.ManagerServer(
+                    self.MTB, llsrHandler.socket_path(self.addr))
             except Exception as e:
                 self.debugPrinting(0, 0, "Failed to create llsrhander {0}", e)
                 self._snmpManager = None
@@ -387,12 +569,15 @@ class llsr_mac(gr.basic_block):
             # no!
             self.hc = 255  # hop count, 255=infinity
             self.pq = 0  # path quality, 0=not connected to sink
-            self.next_hop = UNDEF_ADDR  # 255=undefined
+            self.pcost = ETX_INFINITY  # path cost
         # -------------------------------------------------
-        # message i/o for radio interface
-        self.message_port_register_out(pmt.intern('to_radio'))
-        self.message_port_register_in(pmt.intern('from_radio'))
-        self.set_msg_handler(pmt.intern('from_radio'), self.radio_rx)
+        # message i/o for radio interfaces
+        for iface in self.ifaces:
+            self.message_port_register_out(iface.port_out)
+            self.message_port_register_in(iface.port_in)
+            self.set_msg_handler(iface.port_in,
+                                 lambda msg, k=iface.index:
+                                 self.radio_rx(msg, k))
         # message i/o for app interface
         self.message_port_register_out(pmt.intern('to_app'))
         self.message_port_register_in(pmt.intern('from_app'))
@@ -403,6 +588,20 @@ class llsr_mac(gr.basic_block):
         self.message_port_register_out(pmt.intern('ctrl_out'))
         self.message_port_register_in(pmt.intern('ctrl_in'))
         self.set_msg_handler(pmt.intern('ctrl_in'), self.ctrl_rx)
+        # warm restart from the last state snapshot
+        if self.state_file:
+            with self.lock:
+                self.load_state()
+
+    # ----------------------------------------
+    # flow graph stopped, write pending records
+    # ----------------------------------------
+    def stop(self):
+        if self.record_writer is not None:
+            self.record_writer.close()
+        if self.storage is not None:
+            self.storage.close()
+        return True
 
     # ------------------------------------------
     # debug info print out
@@ -418,79 +617,520 @@ class llsr_mac(gr.basic_block):
             output = debugmsg
         if output is not None:
             # infotype 1 is essential
-            if self.debug_level == 0:
+            if (self.debug_level in [DEBUG_DETAILED, DEBUG_FRAMES] or
+                    (self.debug_level == DEBUG_ESSENTIAL and debugtype == 1)):
                 if outputype == 0:
                     sys.stderr.write(output)
                     sys.stderr.flush()
                 if outputype == 1:
-                    sys.stdout.write(output)
-                    sys.stdout.flush()
-            if self.debug_level == 1 and debugtype == 1:
-                if outputype == 0:
-                    sys.stderr.write(output)
-                    sys.stderr.flush()
-                if outputype == 1:
-                    sys.stdout.write(output)
-                    sys.stdout.flush()
+                    # stdout output goes with the data log, if any (stdout
+                    # is not redirected to the data file anymore)
+                    if self.record_writer is not None:
+                        self.record_writer.write_text(output)
+                    else:
+                        sys.stdout.write(output)
+                        sys.stdout.flush()
         return
 
+    # ----------------------------------------------------------
+    # handle radio interface "iface" as the current one, within a
+    # "with" statement; the previous one is restored on exit
+    # ----------------------------------------------------------
+    @contextlib.contextmanager
+    def on_iface(self, iface):
+        current = self.iface
+        self.iface = iface
+        try:
+            yield iface
+        finally:
+            self.iface = current
+
     def get_rx_byte_count(self):
         return self.rx_byte_count
 
+    # -------------------------------------------------------------
+    # per neighbor liveness statistics
+    # returns {neighbor: (beacons heard, other frames heard,
+    #                     seconds since last beacon,
+    #                     seconds since last other frame)}
+    # ages are None when nothing of the kind was heard
+    # -------------------------------------------------------------
+    def get_liveness_stats(self):
+        with self.lock:
+            time_now = time.time()
+            stats = {}
+            for iface in self.ifaces:
+                t = iface.nodes
+                stats.update((k, (int(t.beacon_cnt[k]), int(t.frame_cnt[k]),
+                                  time_now - t.last_beacon[k]
+                                  if t.beacon_cnt[k] > 0 else None,
+                                  time_now - t.last_frame[k]
+                                  if t.frame_cnt[k] > 0 else None))
+                             for k in t.keys())
+            return stats
+
+    # --------------------------------------------------------
+    # beacon statistics
+    # returns (transmitted, suppressed, current interval)
+    # transmitted beacons include the triggered ones
+    # --------------------------------------------------------
+    def get_beacon_stats(self):
+        with self.lock:
+            if self.beacon_mode == BEACON_TRICKLE:
+                return (self.beacons_txed, self.trickle.suppressed,
+                        self.trickle.interval)
+            return (self.beacons_txed, 0, self.broadcast_interval)
+
+    # ---------------------------------------------------------
+    # per next hop traffic counters
+    # returns {next hop: (sent, retransmitted, acknowledged)}
+    # ---------------------------------------------------------
+    def get_fwd_counters(self):
+        with self.lock:
+            return dict((k, tuple(v)) for k, v in self.fwd_counters.items())
+
+    # ----------------------------------------------------------
+    # forwarded traffic statistics, shows the balance of the
+    # subtrees routed through this node
+    # returns ({previous hop: (packets, bytes)}, advertised load,
+    #          {neighbor: load advertised by the neighbor})
+    # ----------------------------------------------------------
+    def get_load_stats(self):
+        with self.lock:
+            return (dict((k, tuple(v)) for k, v in self.fwd_from.items()),
+                    self.forwarding_load(),
+                    dict((k, iface.nodes[k].load) for iface in self.ifaces
+                         for k in iface.nodes.keys()))
+
+    # --------------------------------------------------------------
+    # forwarding load: data packets queued plus packets forwarded
+    # during the last load window, capped to one byte
+    # --------------------------------------------------------------
+    def forwarding_load(self):
+        time_now = time.time()
+        while (len(self.fwd_times) > 0 and
+               self.fwd_times[0] < time_now - LOAD_WINDOW):
+            self.fwd_times.popleft()
+        return min(self.queue.qsize() + len(self.fwd_times), 255)
+
+    # ---------------------------------------------------
+    # link quality to a neighbor, in (0, 1]
+    # delivery ratio estimated from the ARQ outcomes
+    # ---------------------------------------------------
+    def link_quality(self, addr):
+        if addr in self.nodes:
+            return self.nodes[addr].dr
+        return 1.0
+
+    # --------------------------------------------------------
+    # per neighbor link quality
+    # returns {neighbor: (delivery ratio, expected tx count)}
+    # --------------------------------------------------------
+    def get_link_quality(self):
+        with self.lock:
+            stats = {}
+            for iface in self.ifaces:
+                t = iface.nodes
+                etx = t.link_etx(ETX_SCALE)
+                stats.update((k, (t[k].dr, etx[k] / float(ETX_SCALE)))
+                             for k in t.keys())
+            return stats
+
+    # ---------------------------------------------------------
+    # record the outcome of an ARQ transmission to a neighbor
+    # ---------------------------------------------------------
+    def record_arq_outcome(self, addr, success):
+        self.nodes.record_tx(addr, success, ETX_ALPHA)
+
+    # -----------------------------------------------------------
+    # choose a next hop among the next hops of equal quality
+    # according to the forwarding policy
+    # meta_dict = meta data of the packet, META_ORIGIN is the
+    #             address the packet is forwarded for (self if absent)
+    # -----------------------------------------------------------
+    def choose_next_hop(self, meta_dict):
+        hops = self.next_hops
+        # single next hop or no spreading?
+        if len(hops) < 2 or self.forwarding_policy == FWD_FIRST:
+            return self.next_hop
+        if self.forwarding_policy == FWD_ROUND_ROBIN:
+            self.rr_index = (self.rr_index + 1) % len(hops)
+            return hops[self.rr_index]
+        if self.forwarding_policy == FWD_WEIGHTED:
+            weights = [self.link_quality(k) for k in hops]
+            r = random.random() * sum(weights)
+            for k, w in zip(hops, weights):
+                r -= w
+                if r < 0:
+                    return k
+            return hops[-1]
+        if self.forwarding_policy == FWD_HASH:
+            origin = meta_dict.get(META_ORIGIN, self.addr)
+            return hops[hash(origin) % len(hops)]
+        return self.next_hop
+
+    # ---------------------------------------------------------
+    # next hops of best quality according to the routing metric
+    # the list is empty when no neighbor is connected to the sink
+    # ---------------------------------------------------------
+    def best_next_hops(self):
+        # there are no neighbor nodes?
+        if len(self.nodes) == 0:
+            return []
+        mask = self.route_mask()
+        # routing on the expected transmission count?
+        if self.routing_metric == METRIC_ETX:
+            # yes! neighbors with the minimum path cost, neighbor
+            # load included when load balancing
+            min_cost, max_nodes = self.nodes.best_costs(
+                ETX_SCALE, ETX_INFINITY, mask,
+                self.load_weight if self.load_balancing else 0.0,
+                self.iface.cost)
+        else:
+            # no! neighbors with the minimum hop count and, among
+            # those, the maximum path quality
+            min_hc, max_pq, max_nodes = self.nodes.best_hops(mask)
+        # load balancing? the least loaded next hop first
+        if self.load_balancing and len(max_nodes) > 1:
+            max_nodes = self.nodes.least_loaded(max_nodes, self.next_hop,
+                                                LOAD_MARGIN)
+        return max_nodes
+
+    # -------------------------------------------------------------
+    # neighbors eligible as next hops, None when all of them are
+    # loop avoidance excludes our children (poison reverse), the
+    # disconnected neighbors and the neighbors with a stale epoch;
+    # none is eligible when our own epoch has not advanced recently
+    # -------------------------------------------------------------
+    def route_mask(self):
+        if not self.loop_avoidance:
+            return None
+        ref = self.epoch_refs()
+        return (self.nodes.loop_free(self.addr, ref, EPOCH_WINDOW) &
+                (ref >= 0) & (self.nodes.hc < 255))
+
+    # -------------------------------------------------------------
+    # reference route epoch of each neighbor: the latest epoch of the
+    # sink it routes to, -1 when that epoch has not advanced recently
+    # -------------------------------------------------------------
+    def epoch_refs(self):
+        ref = numpy.full(self.nodes.size, -1, dtype=numpy.int16)
+        time_now = time.time()
+        for sink, (epoch, epoch_time) in self.sink_epochs.items():
+            if time_now - epoch_time <= self.route_epoch_timeout:
+                ref[self.nodes.sink == sink] = epoch
+        return ref
+
+    # ---------------------------------------------------
+    # True if the route epoch advanced recently enough
+    # ---------------------------------------------------
+    def epoch_alive(self):
+        return (self.epoch >= 0 and
+                time.time() - self.epoch_time <= self.route_epoch_timeout)
+
+    # ---------------------------------------------------------
+    # adopt a route epoch of "sink" advertised by a connected
+    # neighbor if it is newer than ours (serial number arithmetic),
+    # or if ours is stale
+    # ---------------------------------------------------------
+    def adopt_epoch(self, epoch, sink):
+        time_now = time.time()
+        entry = self.sink_epochs.get(sink)
+        if (entry is None or
+                time_now - entry[1] > self.route_epoch_timeout or
+                0 < (epoch - entry[0]) % 256 < 128):
+            self.sink_epochs[sink] = [epoch, time_now]
+            # epoch of the sink we route to?
+            if sink == self.root:
+                self.epoch = epoch
+                self.epoch_time = time_now
+
+    # ----------------------------------------------------
+    # True if neighbor "addr" advertises a route to the sink
+    # ----------------------------------------------------
+    def is_connected(self, addr):
+        if addr not in self.nodes:
+            return False
+        mask = self.route_mask()
+        if mask is not None and not mask[addr]:
+            return False
+        if self.routing_metric == METRIC_ETX:
+            return self.nodes[addr].pcost < ETX_INFINITY
+        return self.nodes[addr].hc < 255
+
+    # ------------------------------------------------------
+    # True if neighbor "cand" is better than neighbor "cur"
+    # by at least the route margin
+    # ------------------------------------------------------
+    def route_beats(self, cand, cur):
+        if self.routing_metric == METRIC_ETX:
+            costs = self.nodes.path_costs(ETX_SCALE, ETX_INFINITY,
+                                          link_factor=self.iface.cost)
+            return costs[cand] + self.route_margin*ETX_SCALE < costs[cur]
+        c = self.nodes[cand]
+        n = self.nodes[cur]
+        return c.hc < n.hc or (c.hc == n.hc and
+                               c.pq > n.pq + self.route_margin)
+
+    # -------------------------------------------------------------
+    # connected neighbors routing as well as neighbor "cur": same
+    # path cost, or same hop count and path quality; "cur" first
+    # -------------------------------------------------------------
+    def peer_hops(self, cur):
+        cand = self.nodes.present.copy()
+        mask = self.route_mask()
+        if mask is not None:
+            cand &= mask
+        if self.routing_metric == METRIC_ETX:
+            costs = self.nodes.path_costs(ETX_SCALE, ETX_INFINITY,
+                                          link_factor=self.iface.cost)
+            cand &= costs == costs[cur]
+        else:
+            cand &= ((self.nodes.hc == self.nodes.hc[cur]) &
+                     (self.nodes.pq == self.nodes.pq[cur]))
+        return [cur] + [k for k in numpy.flatnonzero(cand).tolist()
+                        if k != cur]
+
+    # ------------------------------------------------------------
+    # apply route hysteresis to the next hops of best quality
+    # the current next hop is kept first, with its peers (same
+    # quality) until a better candidate has been better for the
+    # dwell time
+    # ------------------------------------------------------------
+    def stable_next_hops(self, max_nodes):
+        cur = self.next_hop
+        # no next hop at all, or current next hop lost?
+        if len(max_nodes) == 0 or not self.is_connected(cur):
+            self.challenger = UNDEF_ADDR
+            return max_nodes
+        # current next hop among the best ones?
+        if cur in max_nodes:
+            self.challenger = UNDEF_ADDR
+            return [cur] + [k for k in max_nodes if k != cur]
+        best = max_nodes[0]
+        # best candidate not better enough?
+        if not self.route_beats(best, cur):
+            self.challenger = UNDEF_ADDR
+            return self.peer_hops(cur)
+        # new challenger?
+        time_now = time.time()
+        if self.challenger != best:
+            self.challenger = best
+            self.challenger_since = time_now
+        # challenger better for long enough?
+        if time_now - self.challenger_since >= self.route_dwell:
+            self.challenger = UNDEF_ADDR
+            return max_nodes
+        return self.peer_hops(cur)
+
+    # -------------------------------------------------
+    # number of next hop changes during the last hour
+    # -------------------------------------------------
+    def get_route_changes_per_hour(self):
+        with self.lock:
+            self.prune_route_changes(time.time())
+            return len(self.route_change_times)
+
+    def prune_route_changes(self, time_now):
+        while (len(self.route_change_times) > 0 and
+               self.route_change_times[0] < time_now - 3600.0):
+            self.route_change_times.popleft()
+
     # ------------------------------------------
     # select next hop and update routing metrics
+    # returns True when the route has changed
     # ------------------------------------------
     def SelectNextHop(self):
+        route = (self.hc, self.pq, self.route_iface,
+                 self.ifaces[self.route_iface].next_hop)
         # this node is the sink?
-        if self.addr == SINK_ADDR:
+        if self.is_sink:
             self.hc = 0  # hop count
             self.pq = 255  # path quality (max value)
-            self.next_hop = SINK_ADDR
-        # there are neighbor nodes?
-        elif len(self.nodes) > 0:
-            # get the minimum hop count
-            min = 255  # init with max value
-            for k in self.nodes.keys():
-                if self.nodes[k].hc < min:
-                    min = self.nodes[k].hc
-            # define the self hop count
-            self.hc = min+1
-            # get the corresponding neighbors
-            min_nodes = []
-            for k in self.nodes.keys():
-                if self.nodes[k].hc == min:
-                    min_nodes.append(k)
-            # get the maximum path qualityself.secretky
-            max = 0  # init with the min value
-            for k in min_nodes:
-                if self.nodes[k].pq > max:
-                    max = self.nodes[k].pq
-            # get the corresponding neighbors
-            max_nodes = []
-            for k in min_nodes:
-                if self.nodes[k].pq == max:
-                    max_nodes.append(k)
-            # define the path quality
-            self.pq = len(max_nodes)  # num of neighbors with max quality
-            # define the next hop
-            self.next_hop = max_nodes[0]
-        # there are no neighbors!
+            self.pcost = 0  # path cost
+            for iface in self.ifaces:
+                iface.next_hop = self.addr
+                iface.next_hops = []
         else:
-            self.hc = 255  # infinity
-            self.pq = 0  # not connected to sink
-            self.next_hop = UNDEF_ADDR
+            # route through each interface, keep the best one
+            best = None
+            for iface in self.ifaces:
+                with self.on_iface(iface):
+                    self.select_iface_route()
+                if iface.pq > 0 and (best is None or
+                                     self.iface_beats(iface, best)):
+                    best = iface
+            # there is a route?
+            if best is not None:
+                self.route_iface = best.index
+                self.hc = best.hc
+                self.pq = best.pq
+                self.pcost = best.pcost
+                # sink reached through the next hop, and its epoch
+                self.root = best.root
+                if self.root in self.sink_epochs:
+                    self.epoch, self.epoch_time = \
+                        self.sink_epochs[self.root]
+            # there are no neighbors!
+            else:
+                self.hc = 255  # infinity
+                self.pq = 0  # not connected to sink
+                self.pcost = ETX_INFINITY
+                self.root = UNDEF_ADDR
+        next_hop = self.ifaces[self.route_iface].next_hop
         if self.debug_stderr:
             # log the packet
             self.debugPrinting(0, 0, "Node {0}: in SelectNextHop(): "
-                               "HC: {1}, PQ: {2}, NEXT HOP: {3}\n",
-                               self.addr, self.hc, self.pq, self.next_hop)
+                               "HC: {1}, PQ: {2}, PCOST: {3}, "
+                               "NEXT HOP: {4}, RADIO: {5}\n",
+                               self.addr, self.hc, self.pq, self.pcost,
+                               next_hop, self.route_iface)
+        # next hop changed?
+        if route[2:] != (self.route_iface, next_hop):
+            self.route_change_times.append(time.time())
+            self.prune_route_changes(time.time())
+        # route changed?
+        if route != (self.hc, self.pq, self.route_iface, next_hop):
+            self.route_changed()
+            return True
+        return False
+
+    # ------------------------------------------------------------
+    # select the next hops through the current interface and the
+    # route metrics through them
+    # ------------------------------------------------------------
+    def select_iface_route(self):
+        iface = self.iface
+        # get the next hops of best quality
+        max_nodes = self.best_next_hops()
+        # avoid flapping between next hops
+        if self.route_hysteresis:
+            max_nodes = self.stable_next_hops(max_nodes)
+        # there are next hops?
+        if len(max_nodes) > 0:
+            # define the next hop
+            iface.next_hop = max_nodes[0]
+            # all the next hops of equal quality
+            iface.next_hops = max_nodes
+            # define the hop count
+            iface.hc = min(self.nodes[iface.next_hop].hc+1, 255)
+            # define the path quality
+            iface.pq = len(max_nodes)  # num of neighbors with max quality
+            # define the path cost, through the next hop
+            iface.pcost = int(self.nodes.path_costs(
+                ETX_SCALE, ETX_INFINITY,
+                link_factor=iface.cost)[iface.next_hop])
+            # sink reached through the next hop
+            iface.root = self.nodes[iface.next_hop].sink
+        # there are no neighbors!
+        else:
+            iface.hc = 255  # infinity
+            iface.pq = 0  # not connected to sink
+            iface.pcost = ETX_INFINITY
+            iface.next_hop = UNDEF_ADDR
+            iface.next_hops = []
+            iface.root = UNDEF_ADDR
+
+    # ---------------------------------------------------------
+    # True if the route through interface "a" is better than the
+    # route through interface "b"; with the hop count metric,
+    # ties are broken by path quality, then airtime
+    # ---------------------------------------------------------
+    def iface_beats(self, a, b):
+        if self.routing_metric == METRIC_ETX:
+            return a.pcost < b.pcost
+        return (a.hc, -a.pq, a.cost) < (b.hc, -b.pq, b.cost)
+
+    # ------------------------------------------------------------
+    # True if the route through interface "iface" is as good as the
+    # best route, the interface can then carry traffic in parallel
+    # ------------------------------------------------------------
+    def iface_usable(self, iface):
+        if self.is_sink:
+            return True
+        if iface.pq == 0:
+            return False
+        if self.routing_metric == METRIC_ETX:
+            return iface.pcost <= self.pcost + ETX_SCALE
+        return iface.hc <= self.hc
+
+    # -------------------------------------------
+    # per radio interface state
+    # returns [(neighbors, hop count, path quality,
+    #           next hop, channel state)], by interface
+    # -------------------------------------------
+    def get_iface_stats(self):
+        with self.lock:
+            return [(len(k.nodes), k.hc, k.pq, k.next_hop, k.CHANNEL_state)
+                    for k in self.ifaces]
+
+    # -------------------------------------------------
+    # reaction to a change of route or advertised metrics
+    # -------------------------------------------------
+    def route_changed(self):
+        # advertise the change promptly
+        if self.beacon_mode == BEACON_TRICKLE:
+            self.trickle.inconsistent(time.time())
+        if self.triggered_updates:
+            self.schedule_triggered_beacon()
+        # route lost? poison it right away
+        if self.loop_avoidance and not self.is_sink and self.pq == 0:
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in route_changed(): "
+                                   "route lost, poisoned\n", self.addr)
+            self.send_beacon_pkt()
+
+    # ----------------------------------------------------------
+    # schedule a beacon after a random holdoff, keeping a minimum
+    # spacing between triggered beacons
+    # ----------------------------------------------------------
+    def schedule_triggered_beacon(self):
+        # already pending?
+        if self.trigger_timer is not None:
+            return
+        time_now = time.time()
+        delay = self.trigger_holdoff * random.random()
+        if self.last_trigger_time is not None:
+            delay = max(delay, self.last_trigger_time +
+                        self.trigger_min_spacing - time_now)
+        self.trigger_timer = threading.Timer(delay, self.triggered_beacon)
+        self.trigger_timer.daemon = True
+        self.trigger_timer.start()
+
+    # ------------------------------------------
+    # send a beacon triggered by a route change
+    # ------------------------------------------
+    def triggered_beacon(self):
+        with self.lock:
+            self.trigger_timer = None
+            # sink node or connected to sink?
+            if self.is_sink or (self.pq > 0):
+                self.last_trigger_time = time.time()
+                self.triggered_beacons += 1
+                if self.debug_stderr:
+                    self.debugPrinting(0, 0, "Node {0}: in triggered_beacon():"
+                                       " route change advertised\n",
+                                       self.addr)
+                self.send_beacon_pkt()
+
+    # ------------------------------------------------------------
+    # reaction to a beacon from a neighbor
+    # consistent = True if the neighbor was known and its advertised
+    # metrics are unchanged
+    # ------------------------------------------------------------
+    def beacon_heard(self, consistent):
+        if self.beacon_mode == BEACON_TRICKLE:
+            if consistent:
+                self.trickle.consistent()
+            else:
+                self.trickle.inconsistent(time.time())
 
     # ----------------------------------
     # pretty printing of a beacon packet
     # ----------------------------------
     def print_beacon_pkt(self, pkt):
         # valid beacon packet length?
-        if (len(pkt) != BEACON_PKT_LENGTH):
+        if (len(pkt) < BEACON_PKT_LENGTH):
             # yes!
             self.debugPrinting(0, 0, "Node {0}: in print_beacon_pkt(): "
                                "beacon packet invalid length! "
@@ -503,27 +1143,70 @@ class llsr_mac(gr.basic_block):
                            pkt[PKT_SRC],
                            pkt[PKT_HC],
                            pkt[PKT_PQ])
+        if len(pkt) >= BEACON_PCOST_LENGTH:
+            self.debugPrinting(0, 0, "PCOST: {0}\n",
+                               (pkt[PKT_PCOST] << 8) | pkt[PKT_PCOST+1])
+        if len(pkt) >= BEACON_ROUTE_LENGTH:
+            self.debugPrinting(0, 0, "PARENT: {0} EPOCH: {1}\n",
+                               pkt[PKT_PARENT], pkt[PKT_EPOCH])
+        if len(pkt) >= BEACON_LOAD_LENGTH:
+            self.debugPrinting(0, 0, "LOAD: {0}\n", pkt[PKT_LOAD])
+        if len(pkt) >= BEACON_SINK_LENGTH:
+            self.debugPrinting(0, 0, "SINK: {0}\n", pkt[PKT_SINK])
 
     # ------------------------
     # transmit a beacon packet
     # ------------------------
     def send_beacon_pkt(self):
+        # a new route epoch from the sink
+        if self.is_sink and self.loop_avoidance:
+            self.epoch = (self.epoch + 1) % 256
+            self.epoch_time = time.time()
+            self.sink_epochs[self.addr] = [self.epoch, self.epoch_time]
+        # several sinks? the sink reached is advertised
+        multi_sink = len(self.sinks) > 1
         # beacon packet structure
         data = [BEACON_PROTO, self.addr, self.hc, self.pq]
-        # debug mode enabled?
-        if self.debug_stderr:  # Yes!
-            # log the packet
-            self.debugPrinting(1, 0, "Node {0}: "
-                               "in send_beacon_pkt(): "
-                               "sending beacon packet:\n", self.addr)
-            self.print_beacon_pkt(data)
-        # conversion to PMT PDU (meta data, data)
-        pdu = self.pdupacker(data)
-        # push to radio msg port
-        self.message_port_pub(pmt.intern('to_radio'), pdu)
-        # save current transmit time
-        with self.lock:
-            self.last_tx_time = time.time()
+        # path cost advertised?
+        if (self.routing_metric == METRIC_ETX or self.loop_avoidance or
+                self.load_balancing or multi_sink):
+            data += [self.pcost >> 8, self.pcost & 0xFF]
+        # parent and route epoch advertised?
+        route = self.loop_avoidance or self.load_balancing or multi_sink
+        next_hop = self.ifaces[self.route_iface].next_hop
+        # fields after the parent and route epoch
+        tail = []
+        # forwarding load advertised?
+        if self.load_balancing or multi_sink:
+            tail += [self.forwarding_load() if self.load_balancing else 0]
+        # sink advertised?
+        if multi_sink:
+            tail += [self.root if self.root >= 0 else NO_ADDR]
+        # send on every radio interface
+        for iface in self.ifaces:
+            pkt = data
+            # the parent is only advertised on its interface
+            if route:
+                pkt = data + [next_hop
+                              if not self.is_sink and next_hop >= 0 and
+                              iface.index == self.route_iface
+                              else NO_ADDR,
+                              max(self.epoch, 0)] + tail
+            # debug mode enabled?
+            if self.debug_stderr:  # Yes!
+                # log the packet
+                self.debugPrinting(1, 0, "Node {0}: "
+                                   "in send_beacon_pkt(): "
+                                   "sending beacon packet:\n", self.addr)
+                self.print_beacon_pkt(pkt)
+            # conversion to PMT PDU (meta data, data)
+            pdu = self.pdupacker(pkt)
+            # push to radio msg port
+            self.message_port_pub(iface.port_out, pdu)
+            # save current transmit time
+            with self.lock:
+                iface.last_tx_time = time.time()
+                self.beacons_txed += 1
 
     # --------------------------------------------
     # pretty printing of an acknowledgement packet
@@ -566,17 +1249,31 @@ class llsr_mac(gr.basic_block):
         # conversion to PMT PDU (meta data, data)
         pdu = self.pdupacker(data)
         # push to radio msg port
-        self.message_port_pub(pmt.intern('to_radio'), pdu)
+        self.message_port_pub(self.iface.port_out, pdu)
         # save current transmit time
         with self.lock:
             self.last_tx_time = time.time()
 
+    # -------------------------------------------------------
+    # control field flags, other than ARQ, of a packet
+    # meta_dict = meta data of the packet, META_CTRL holds the
+    #             flags (none if absent)
+    # -------------------------------------------------------
+    def ctrl_flags(self, meta_dict):
+        if not isinstance(meta_dict, dict):
+            return 0
+        return meta_dict.get(META_CTRL, 0) & CTRL_FLAGS & ~ARQ
+
     # ------------------------------------------
     # transmit a packet with the no ARQ protocol
     # ------------------------------------------
     def tx_no_arq(self, pdu_tuple, protocol_id):
+        # choose the next hop
+        next_hop = self.choose_next_hop(pdu_tuple[1])
+        self.fwd_counters[next_hop][0] += 1
         # send the packet
-        self.send_pkt_radio(pdu_tuple, self.pkt_cnt, protocol_id, NO_ARQ)
+        self.send_pkt_radio(pdu_tuple, self.pkt_cnt, protocol_id, NO_ARQ,
+                            next_hop)
         # increment packet number
         self.pkt_cnt = (self.pkt_cnt + 1) % 256
 
@@ -589,22 +1286,15 @@ class llsr_mac(gr.basic_block):
             self.debugPrinting(0, 0, "Node {0}: "
                                "in print_pkt(): packet too short!")
             return
-        # yes! print protocol id
-        self.debugPrinting(0, 1, "PROT ID: {0} SRC: {1} "
-                           "DEST: {2} CNT: {3} CTRL: {4}",
+        # yes! print header and data, in a single write
+        self.debugPrinting(0, 0, "PROT ID: {0} SRC: {1} "
+                           "DEST: {2} CNT: {3} CTRL: {4}\nDATA: {5}\n",
                            pkt[PKT_PROT_ID],
                            pkt[PKT_SRC],
                            pkt[PKT_DEST],
                            pkt[PKT_CNT],
-                           pkt[PKT_CTRL])
-        # packet has payload?
-        if (len(pkt) > PKT_MIN):  # Yes!
-            # print data
-            sys.stderr.write("DATA: ")
-            self.debugPrinting(0, 1, "DATA: ")
-            for i in range(PKT_MIN, len(pkt)):
-                self.debugPrinting(0, 1, "{0} ", pkt[i])
-            self.debugPrinting(0, 1, "\n")
+                           pkt[PKT_CTRL],
+                           ' '.join(map(str, pkt[PKT_MIN:])))
 
     # ---------------------------------------------------------
     # Transmit a data packet
@@ -612,8 +1302,12 @@ class llsr_mac(gr.basic_block):
     # pkt_cnt = packet number
     # protocol_id in { ARQ_PROTO, DATA_PROTO, BEACON_PROTO }
     # control in { ARQ, NO_ARQ }
+    # next_hop = link destination, default is the current next hop
     # ---------------------------------------------------------
-    def send_pkt_radio(self, pdu_tuple, pkt_cnt, protocol_id, control):
+    def send_pkt_radio(self, pdu_tuple, pkt_cnt, protocol_id, control,
+                       next_hop=None):
+        if next_hop is None:
+            next_hop = self.next_hop
         # connected to sink?
         if self.pq == 0:
             # no! drop the packet
@@ -623,7 +1317,7 @@ class llsr_mac(gr.basic_block):
                                    self.addr)
                 return
         # packet to self?
-        if self.addr == self.next_hop:
+        if self.addr == next_hop:
             # no! drop the packet
             if self.debug_stderr:
                 self.debugPrinting(1, 0, "Node {0}: in send_pkt_radio(): "
@@ -631,7 +1325,8 @@ class llsr_mac(gr.basic_block):
                                    self.addr)
             return
         # yes! data packet header structure
-        data = [protocol_id, self.addr, self.next_hop, pkt_cnt, control]
+        data = [protocol_id, self.addr, next_hop, pkt_cnt,
+                control | self.ctrl_flags(pdu_tuple[1])]
         # add payload
         payload = pdu_tuple[0]
         if payload is None:
@@ -650,7 +1345,7 @@ class llsr_mac(gr.basic_block):
         # conversion to PMT PDU (meta data, data)
         pdu = self.pdupacker(data)
         # push to radio msg port
-        self.message_port_pub(pmt.intern('to_radio'), pdu)
+        self.message_port_pub(self.iface.port_out, pdu)
         # save current transmit time
         with self.lock:
             self.last_tx_time = time.time()
@@ -659,8 +1354,15 @@ class llsr_mac(gr.basic_block):
     # transmit a data packet with the ARQ protocol
     # --------------------------------------------
     def tx_arq(self, pdu_tuple, protocol_id):
+        # choose the next hop, kept for the retransmissions
+        self.arq_next_hop = self.choose_next_hop(pdu_tuple[1])
+        # choose the candidate relays
+        self.arq_candidates = []
+        if self.opportunistic and protocol_id == DATA_PROTO:
+            self.arq_candidates = self.select_candidates(self.arq_next_hop)
+        self.fwd_counters[self.arq_next_hop][0] += 1
         # send the packet
-        self.send_pkt_radio(pdu_tuple, self.pkt_cnt, protocol_id, ARQ)
+        self.send_arq_pkt(pdu_tuple, self.pkt_cnt, protocol_id)
         # increment packet number
         self.pkt_cnt = (self.pkt_cnt+1) % 256
 
@@ -668,27 +1370,173 @@ class llsr_mac(gr.basic_block):
     # transmit a data packet with the ARQ protocol
     # --------------------------------------------
     def retx_arq(self, pdu_tuple, protocol_id):
-        # send the packet
-        self.send_pkt_radio(pdu_tuple,
-                            self.pkt_cnt-1 if self.pkt_cnt != 0 else 255,
-                            protocol_id, ARQ)
+        # link with the next hop lost meanwhile?
+        if self.arq_next_hop not in self.nodes:
+            # yes! fall back to the current next hop
+            self.arq_next_hop = self.next_hop
+            if len(self.arq_candidates) > 0:
+                self.arq_candidates = self.select_candidates(
+                    self.arq_next_hop)
+        # forget the candidates we lost link with
+        self.arq_candidates = [k for k in self.arq_candidates
+                               if k in self.nodes]
+        self.fwd_counters[self.arq_next_hop][1] += 1
+        # send the packet again, with the packet number of this interface
+        # (pkt_cnt is shared by the interfaces and the other transmissions)
+        self.send_arq_pkt(pdu_tuple, self.expected_ack, protocol_id)
+
+    # ------------------------------------------------------------
+    # send a packet of the ARQ protocol, as an anypath packet when
+    # there are several candidate relays, as a unicast otherwise
+    # ------------------------------------------------------------
+    def send_arq_pkt(self, pdu_tuple, pkt_cnt, protocol_id):
+        if len(self.arq_candidates) > 1:
+            self.send_anypath_pkt(pdu_tuple, pkt_cnt, self.arq_candidates)
+        else:
+            self.send_pkt_radio(pdu_tuple, pkt_cnt, protocol_id, ARQ,
+                                self.arq_next_hop)
+
+    # ---------------------------------------------------------------
+    # candidate relays for opportunistic forwarding: "first", then the
+    # connected neighbors closer to the sink than this node, best first
+    # ---------------------------------------------------------------
+    def select_candidates(self, first):
+        t = self.nodes
+        cand = t.present.copy()
+        mask = self.route_mask()
+        if mask is not None:
+            cand &= mask
+        if self.routing_metric == METRIC_ETX:
+            cand &= t.pcost < self.pcost
+            key = t.path_costs(ETX_SCALE, ETX_INFINITY,
+                               link_factor=self.iface.cost)
+        else:
+            cand &= t.hc < self.hc
+            key = t.hc.astype(numpy.int32)*256 - t.pq
+        # best route first, then best link
+        order = numpy.lexsort((-t.dr, key))
+        others = [int(k) for k in order if cand[k] and k != first]
+        return ([first] + others)[:max(self.anypath_candidates, 1)]
+
+    # -------------------------------------------------------
+    # Transmit an anypath packet
+    # pdu_tuple = PDU pair (payload,meta data)
+    # pkt_cnt = packet number
+    # candidates = candidate relays, by decreasing priority
+    # -------------------------------------------------------
+    def send_anypath_pkt(self, pdu_tuple, pkt_cnt, candidates):
+        # connected to sink?
+        if self.pq == 0:
+            # no! drop the packet
+            if self.debug_stderr:
+                self.debugPrinting(1, 0, "Node {0}: in send_anypath_pkt(): "
+                                   "packet dropped (not connected)\n",
+                                   self.addr)
+            return
+        # anypath packet header structure
+        data = [ANYPATH_PROTO, self.addr, len(candidates), pkt_cnt,
+                ARQ | self.ctrl_flags(pdu_tuple[1])]
+        data += candidates
+        # add payload
+        payload = pdu_tuple[0]
+        if payload is None:
+            payload = []
+        elif isinstance(payload, str):
+            payload = map(ord, list(payload))
+        elif not isinstance(payload, list):
+            payload = list(payload)
+        data += payload
+        # debug mode enabled?
+        if self.debug_stderr:
+            # yes! log the packet
+            self.debugPrinting(1, 0, "Node {0}: in send_anypath_pkt(): "
+                               "sending packet:\n", self.addr)
+            self.print_pkt(data)
+        # conversion to PMT PDU (meta data, data)
+        pdu = self.pdupacker(data)
+        # push to radio msg port
+        self.message_port_pub(self.iface.port_out, pdu)
+        # save current transmit time
+        with self.lock:
+            self.last_tx_time = time.time()
+
+    # -----------------------------------------------------------
+    # relay an anypath packet as a candidate: acknowledge it, so
+    # that the lower priority candidates give up, and process it
+    # key = (source, packet number)
+    # data = the packet, as a data packet addressed to this node
+    # -----------------------------------------------------------
+    def anypath_relay(self, key, data, meta_dict):
+        self.send_ack(key[0], key[1], ANYPATH_PROTO)
+        self.anypath_relayed += 1
+        self.data_received(data, meta_dict)
+
+    # --------------------------------------------
+    # relay delay of a candidate elapsed
+    # --------------------------------------------
+    def anypath_timeout(self, key, iface):
+        with self.lock, self.on_iface(iface):
+            entry = self.anypath_pending.pop(key, None)
+            # not relayed by a higher priority candidate meanwhile?
+            if entry is not None:
+                self.anypath_relay(key, entry[1], entry[2])
+
+    # ---------------------------------------------------------
+    # ARQ statistics
+    # returns (transmitted, retransmitted, failed, relayed as an
+    #          anypath candidate, suppressed as a candidate)
+    # ---------------------------------------------------------
+    def get_arq_stats(self):
+        with self.lock:
+            return (self.arq_pkts_txed, self.arq_retxed, self.failed_arq,
+                    self.anypath_relayed, self.anypath_suppressed)
 
     # ------------------------
     # push data to application
     # ------------------------
     def output_user_data(self, pdu_tuple):
+        data, meta_dict = pdu_tuple
+        payload = data[PKT_MIN:]
+        e2e_seq = None
+        # end-to-end header?
+        if data[PKT_CTRL] & CTRL_E2E and len(payload) >= E2E_LENGTH:
+            # yes! origin and sequence number in the meta data
+            origin = payload[E2E_ORIGIN]
+            seq = (payload[E2E_SEQ] << 8) | payload[E2E_SEQ+1]
+            payload = payload[E2E_LENGTH:]
+            # already delivered, or too old to be checked?
+            if self.dedupe is not None and not self.dedupe.accept(origin,
+                                                                  seq):
+                # yes! do nothing
+                return
+            meta_dict = dict(meta_dict, **{META_ORIGIN: origin,
+                                           META_SEQ: seq})
+            e2e_seq = seq
+        else:
+            # no! the last hop stands for the origin
+            origin = data[PKT_SRC]
+            seq = data[PKT_CNT]
+        # origin timestamp?
+        ts = None
+        if data[PKT_CTRL] & CTRL_TS and len(payload) >= TS_LENGTH:
+            ts = ((payload[0] << 24) | (payload[1] << 16) |
+                  (payload[2] << 8) | payload[3])
+            payload = payload[TS_LENGTH:]
+        # update the flow statistics, end-to-end frames only (the last
+        # hop does not stand for the origin of a flow)
+        if self.flow_stats is not None and e2e_seq is not None:
+            self.flow_stats.update(origin, e2e_seq, ts, len(payload),
+                                   time.time())
         self.message_port_pub(pmt.intern('to_app'),
-                              pmt.cons(pmt.to_pmt(pdu_tuple[1]),
-                                       pmt.init_u8vector(
-                                        len(pdu_tuple[0][PKT_MIN:]),
-                                        pdu_tuple[0][PKT_MIN:])))
-        # write packet to standard output
-        self.debugPrinting(0, 1, "{0} : ",
-                           time.asctime(time.localtime(time.time())))
-        # print data
-        for i in range(0, len(pdu_tuple[0])):
-            self.debugPrinting(0, 1, "{0}", pdu_tuple[0][i])
-        self.debugPrinting(0, 1, "\n")
+                              pmt.cons(pmt.to_pmt(meta_dict),
+                                       pmt.init_u8vector(len(payload),
+                                                         payload)))
+        # store the payload
+        if self.storage is not None:
+            self.storage.append(origin, seq, time.time(), payload)
+        # log the frame
+        if self.record_writer is not None:
+            self.record_writer.write(pdu_tuple[0])
 
     # -----------------------------------
     # scan and update the node dictionary
@@ -696,32 +1544,197 @@ class llsr_mac(gr.basic_block):
     def check_nodes(self):
         # get current time
         time_now = time.time()
-        # take a copy of neighbor list
-        keys = self.nodes.keys()
         # update management packet track number table
         self.updatetracktable()
-        # update node table
-        for k in keys:
-            # get time since this node has been heard
-            diff = time_now-self.nodes[k].last_heard
-            # lost link with tha node?
-            if diff > self.node_expiry_delay:
-                # SINK_NODE
-                if self.addr == SINK_ADDR:
-                    self.MTB.deactivateNode(k)
-                # yes! remove the node
-                self.nodes.pop(k, None)
-                # log the change
-                if self.debug_stderr:
-                    self.debugPrinting(0, 0, "Node {0}: "
-                                       "in check_nodes(): "
-                                       "link lost with node: {1}\n",
-                                       self.addr, k)
+        # remove the nodes we lost link with, on every interface
+        expired = []
+        for iface in self.ifaces:
+            expired += iface.nodes.expire(time_now-self.node_expiry_delay)
+        for k in expired:
+            # SINK_NODE
+            if self.is_sink:
+                self.MTB.deactivateNode(k)
+            # log the change
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: "
+                                   "in check_nodes(): "
+                                   "link lost with node: {1}\n",
+                                   self.addr, k)
+        # select next hop and update routing metrics, also when
+        # the route epoch became stale
+        if len(expired) > 0 or (self.loop_avoidance and self.pq > 0 and
+                                not self.epoch_alive()):
+            self.SelectNextHop()
+
+    # ----------------------------------------------------------
+    # Handle a new data packet addressed to this node
+    # delivered to the application (sink) or forwarded
+    # ----------------------------------------------------------
+    def data_received(self, data, meta_dict):
+        # topology report? its origin is reachable through the source
+        if (data[PKT_CTRL] & CTRL_REPORT and
+                len(data) > PKT_MIN + REPORT_ORIGIN):
+            self.learn_downlink(data[PKT_MIN+REPORT_ORIGIN], data[PKT_SRC])
+        # end-to-end origin? reachable through the source as well
+        if (data[PKT_CTRL] & CTRL_E2E and not data[PKT_CTRL] & CTRL_AGG and
+                len(data) >= PKT_MIN + E2E_LENGTH):
+            self.learn_downlink(data[PKT_MIN+E2E_ORIGIN], data[PKT_SRC])
+        # this node is a sink?
+        if self.is_sink:
+            self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
+                               "SNMP_Table_Size: {1}, "
+                               "Added new Node {2}\n",
+                               self.addr,
+                               self.MTB.getTableSize(),
+                               self.MTB.getColumn(-1, 'nodeAddr'))
+            # aggregate?
+            if data[PKT_CTRL] & CTRL_AGG:
+                # yes! handle the records one by one
+                for origin, flags, payload in agg_split(data):
+                    self.learn_downlink(origin, data[PKT_SRC])
+                    if flags & CTRL_REPORT:
+                        if len(payload) > REPORT_ORIGIN:
+                            self.learn_downlink(payload[REPORT_ORIGIN],
+                                                data[PKT_SRC])
+                        self.report_received(payload)
+                    else:
+                        self.output_user_data(([DATA_PROTO, origin,
+                                                self.addr, data[PKT_CNT],
+                                                flags] + payload,
+                                               meta_dict))
+                return
+            # topology report?
+            if data[PKT_CTRL] & CTRL_REPORT:
+                # yes! update the topology database
+                self.report_received(data[PKT_MIN:])
+                return
+            # no! deliver upper layer protocol
+            self.output_user_data((data, meta_dict))
+            # add row if the PKT_SRC is not in the table
+            # self.MTB.addRow(self.createdefaultNewrow(data[PKT_SRC]))
+        # else, forward to next hop
+        else:
+            self.fwd_from[data[PKT_SRC]][0] += 1
+            self.fwd_from[data[PKT_SRC]][1] += len(data) - PKT_MIN
+            self.fwd_times.append(time.time())
+            # aggregation?
+            if self.aggregation_window > 0:
+                self.aggregate(data)
+                return
+            # end-to-end origin? otherwise, the previous hop
+            origin = data[PKT_SRC]
+            if (data[PKT_CTRL] & CTRL_E2E and
+                    not data[PKT_CTRL] & CTRL_AGG and
+                    len(data) >= PKT_MIN + E2E_LENGTH):
+                origin = data[PKT_MIN+E2E_ORIGIN]
+            self._app_rx(self.pdupacker(data[PKT_MIN:],
+                                        {META_ORIGIN: origin,
+                                         META_CTRL: data[PKT_CTRL] & ~ARQ}),
+                         data[PKT_CTRL] & ARQ)
+
+    # -------------------------------------------------------------
+    # hold a packet to forward for aggregation, the aggregate is
+    # sent when full or at the end of the aggregation window
+    # -------------------------------------------------------------
+    def aggregate(self, data):
+        if data[PKT_CTRL] & CTRL_AGG:
+            # aggregate, merge its records
+            records = agg_split(data)
+        else:
+            # origin of the payload, the previous hop if unknown
+            payload = list(data[PKT_MIN:])
+            origin = data[PKT_SRC]
+            if data[PKT_CTRL] & CTRL_E2E and len(payload) >= E2E_LENGTH:
+                origin = payload[E2E_ORIGIN]
+            records = [(origin, data[PKT_CTRL] & ~ARQ, payload)]
+        for origin, flags, payload in records:
+            # the origin is reachable through the source
+            self.learn_downlink(origin, data[PKT_SRC])
+            # topology report? its origin is reachable through the source
+            if flags & CTRL_REPORT and len(payload) > REPORT_ORIGIN:
+                self.learn_downlink(payload[REPORT_ORIGIN], data[PKT_SRC])
+            # hold it, send the full aggregate or the record too long
+            # to fit in an aggregate
+            for packet in self.aggregator.add(origin, flags, payload,
+                                              data[PKT_CTRL] & ARQ):
+                self.agg_send(packet)
+        # start of the aggregation window?
+        if len(self.aggregator) > 0 and self.agg_timer is None:
+            self.agg_timer = threading.Timer(self.aggregation_window,
+                                             self.aggregation_timeout)
+            self.agg_timer.daemon = True
+            self.agg_timer.start()
+
+    # -------------------------------------------
+    # end of the aggregation window
+    # -------------------------------------------
+    def aggregation_timeout(self):
+        with self.lock, self.on_iface(self.ifaces[self.route_iface]):
+            self.agg_timer = None
+            self.agg_flush()
+
+    # -------------------------------------------
+    # send the aggregate, if any record
+    # -------------------------------------------
+    def agg_flush(self):
+        packet = self.aggregator.flush()
+        if packet is not None:
+            self.agg_send(packet)
+
+    # ----------------------------------------------------------
+    # send a packet of the aggregator, (flags, origin, payload, arq)
+    # ----------------------------------------------------------
+    def agg_send(self, packet):
+        flags, origin, payload, arq = packet
+        # aggregate?
+        if flags & CTRL_AGG:
+            # yes! sent for this node
+            self.dispatch_app_rx(payload, {META_ORIGIN: self.addr,
+                                           META_CTRL: CTRL_AGG}, arq)
+        else:
+            # no! record forwarded alone
+            self._app_rx(self.pdupacker(payload, {META_ORIGIN: origin,
+                                                  META_CTRL: flags}), arq)
+
+    # ----------------------------------------------------------
+    # aggregation statistics
+    # returns (records aggregated, aggregate packets sent)
+    # ----------------------------------------------------------
+    def get_aggregation_stats(self):
+        with self.lock:
+            return (self.aggregator.record_cnt, self.aggregator.frame_cnt)
+
+    # ------------------------------------------------------------
+    # make room in a full neighbor table for a new neighbor with
+    # hop count "hc", the current next hops are never evicted
+    # returns False if the new neighbor must be ignored
+    # ------------------------------------------------------------
+    def make_room(self, hc):
+        if (self.max_neighbors <= 0 or
+                len(self.nodes) < self.max_neighbors):
+            return True
+        k = self.nodes.victim(self.eviction_policy,
+                              [self.next_hop] + self.next_hops)
+        # all neighbors pinned?
+        if k is None:
+            return False
+        # new neighbor not closer to the sink than the victim?
+        if (self.eviction_policy == EVICT_HIGHEST_HC and
+                hc >= self.nodes[k].hc):
+            return False
+        # evict the victim
+        self.nodes.pop(k)
+        if self.is_sink:
+            self.MTB.deactivateNode(k)
+        if self.debug_stderr:
+            self.debugPrinting(0, 0, "Node {0}: in make_room(): "
+                               "node {1} evicted\n", self.addr, k)
+        return True
 
     # -------------------------------
     # Handle a message from the radio
     # -------------------------------
-    def radio_rx(self, msg):
+    def radio_rx(self, msg, index=0):
         # message structureis a meta data-data?
         try:
             meta = pmt.car(msg)
@@ -746,7 +1759,8 @@ class llsr_mac(gr.basic_block):
         if not (type(meta_dict) is dict):
             meta_dict = {}
         # Get exclusive access
-        with self.lock:
+        # (on the interface the message is received on)
+        with self.lock, self.on_iface(self.ifaces[index]):
             self._radio_rx(data, meta_dict)
 
     # ------------------------------------------------------------
@@ -767,7 +1781,8 @@ class llsr_mac(gr.basic_block):
                                      DATA_PROTO,
                                      BEACON_PROTO,
                                      MGMT_PROTO,
-                                     MGMT_RESP_PROTO]:
+                                     MGMT_RESP_PROTO,
+                                     ANYPATH_PROTO]:
             # no! log the error
             if self.debug_stderr:
                 self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
@@ -776,12 +1791,17 @@ class llsr_mac(gr.basic_block):
         # valid packet length?
         if ((data[PKT_PROT_ID] == ARQ_PROTO and len(data) != ACK_PKT_LENGTH)
             or (data[PKT_PROT_ID] == DATA_PROTO and len(data) < PKT_MIN)
-            or (data[PKT_PROT_ID] == MGMT_PROTO and len(data)
-                != MGMT_PKT_LENGTH)
-            or (data[PKT_PROT_ID] == MGMT_RESP_PROTO and len(data)
-                != MGMT_RESP_LENGTH)
+            or (data[PKT_PROT_ID] == MGMT_PROTO and
+                (len(data) < MGMT_PKT_LENGTH or
+                 (len(data) - MGMT_PKT_LENGTH) % MGMT_BIND_LENGTH))
+            or (data[PKT_PROT_ID] == MGMT_RESP_PROTO and
+                (len(data) < MGMT_RESP_LENGTH or
+                 (len(data) - MGMT_RESP_LENGTH) % MGMT_RESP_VAL_LENGTH))
             or (data[PKT_PROT_ID] == BEACON_PROTO and len(data)
-                != BEACON_PKT_LENGTH)):
+                < BEACON_PKT_LENGTH)
+            or (data[PKT_PROT_ID] == ANYPATH_PROTO and
+                (len(data) < PKT_MIN or
+                 len(data) < PKT_MIN + data[ANYPATH_NCAND]))):
             # no! log the error
             if self.debug_stderr:
                 self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
@@ -789,14 +1809,14 @@ class llsr_mac(gr.basic_block):
                                    self.addr, len(data))
                 # do nothing!
                 return
-        # debug mode enabled?
-        if self.debug_stderr:
+        # frame dump enabled?
+        if self.debug_stderr and self.debug_level == DEBUG_FRAMES:
             # log the packet!
             self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
                                "received packet: \n", self.addr)
             if data[PKT_PROT_ID] == ARQ_PROTO:
                 self.print_ack_pkt(data)
-            elif data[PKT_PROT_ID] == DATA_PROTO:
+            elif data[PKT_PROT_ID] in [DATA_PROTO, ANYPATH_PROTO]:
                 self.print_pkt(data)
             elif data[PKT_PROT_ID] == BEACON_PROTO:
                 self.print_beacon_pkt(data)
@@ -813,27 +1833,43 @@ class llsr_mac(gr.basic_block):
                 # yes! log the error
                 self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
                                    "heard myself\n", self.addr)
-                # do nothing!
-                return
+            # do nothing!
+            return
         # update received byte count
         self.rx_byte_count += len(data)
+        # any valid frame from a known neighbor shows it is alive
+        if data[PKT_PROT_ID] != BEACON_PROTO:
+            self.nodes.heard(data[PKT_SRC], time.time(), False)
         # ------------------------
         # beacon packet processing
         # ------------------------
         if data[PKT_PROT_ID] == BEACON_PROTO:
             # yes! source a known neighbor?
             node = None
-            if data[PKT_SRC] in self.nodes.keys():
+            consistent = False
+            if data[PKT_SRC] in self.nodes:
                 # yes! get corresponding node entry
                 node = self.nodes[data[PKT_SRC]]
+                # advertised metrics unchanged?
+                consistent = (node.hc == data[PKT_HC] and
+                              node.pq == data[PKT_PQ])
                 # update neighbor node status
                 node.update(time.time(), data[PKT_HC], data[PKT_PQ])
             else:
-                # no! create a new node entry
-                node = Node(time.time(), data[PKT_HC], data[PKT_PQ])
-                self.nodes[data[PKT_SRC]] = node
+                # no! room for a new node entry?
+                if not self.make_room(data[PKT_HC]):
+                    # no! ignore the beacon
+                    if self.debug_stderr:
+                        self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
+                                           "neighbor table full, node {1} "
+                                           "ignored\n", self.addr,
+                                           data[PKT_SRC])
+                    return
+                # create a new node entry
+                node = self.nodes.add(data[PKT_SRC], time.time(),
+                                      data[PKT_HC], data[PKT_PQ])
                 # add to mgmttable
-                if self.addr == SINK_ADDR:
+                if self.is_sink:
                     self.MTB.addRow(
                                               self.createdefaultNewrow(
                                                                 data[PKT_SRC]))
@@ -844,12 +1880,44 @@ class llsr_mac(gr.basic_block):
                                            self.addr,
                                            self.MTB.getTableSize(),
                                            self.MTB.getColumn(-1, 'nodeAddr'))
+            # refresh the neighbor liveness
+            self.nodes.heard(data[PKT_SRC], time.time(), True)
+            # path cost advertised?
+            if len(data) >= BEACON_PCOST_LENGTH:
+                node.pcost = (data[PKT_PCOST] << 8) | data[PKT_PCOST+1]
+            # no! assume perfect links along the path
+            elif data[PKT_HC] < 255:
+                node.pcost = data[PKT_HC]*ETX_SCALE
+            else:
+                node.pcost = ETX_INFINITY
+            # sink advertised? otherwise the single sink
+            if len(data) >= BEACON_SINK_LENGTH:
+                node.sink = data[PKT_SINK]
+            else:
+                node.sink = self.sinks[0]
+            # parent and route epoch advertised?
+            if len(data) >= BEACON_ROUTE_LENGTH:
+                node.parent = data[PKT_PARENT]
+                node.epoch = data[PKT_EPOCH]
+                # newer epoch from a connected neighbor?
+                if not self.is_sink and data[PKT_HC] < 255:
+                    self.adopt_epoch(data[PKT_EPOCH], node.sink)
+            else:
+                node.parent = UNDEF_ADDR
+                node.epoch = -1
+            # forwarding load advertised?
+            if len(data) >= BEACON_LOAD_LENGTH:
+                node.load = data[PKT_LOAD]
+            else:
+                node.load = 0
             # debug mode enabled?
             if self.debug_stderr:
                 self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): Node {1} "
                                    "is alive\n", self.addr, data[PKT_SRC])
             # select next hop and update routing metrics
-            self.SelectNextHop()
+            if not self.SelectNextHop():
+                # route unchanged, update the beacon timer
+                self.beacon_heard(consistent)
             # done!
             return
         # ----------------------
@@ -857,7 +1925,7 @@ class llsr_mac(gr.basic_block):
         # ----------------------
         if data[PKT_PROT_ID] == DATA_PROTO:
             # valid control field?
-            if not data[PKT_CTRL] in [ARQ, NO_ARQ]:
+            if data[PKT_CTRL] & ~CTRL_FLAGS:
                 # no! log the error
                 if self.debug_stderr:
                     self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
@@ -866,12 +1934,16 @@ class llsr_mac(gr.basic_block):
                                        data[PKT_CTRL])
                 # do nothing!
                 return
+            # packet addressed to another node?
+            if data[PKT_DEST] != self.addr:
+                # do nothing!
+                return
             # is the ARQ protocol used?
             new_packet = False
-            if data[PKT_CTRL] == ARQ:
+            if data[PKT_CTRL] & ARQ:
                 # source in neighbor dictionary?
                 # if self.nodes[data[PKT_SRC]]:
-                if data[PKT_SRC] in self.nodes.keys():
+                if data[PKT_SRC] in self.nodes:
                     # last packet number and new packet number different?
                     new_packet = self.nodes[data[PKT_SRC]].lpn != data[PKT_CNT]
                     # save last packet number from that neighbor
@@ -886,23 +1958,57 @@ class llsr_mac(gr.basic_block):
                                            "data from unknown neightbour {1}",
                                            self.addr, data[PKT_SRC])
             #  ARQ protocol not used or packet is new
-            if data[PKT_CTRL] == NO_ARQ or new_packet:
-                # this node is a sink?
-                if self.addr == SINK_ADDR:
+            if not data[PKT_CTRL] & ARQ or new_packet:
+                # deliver or forward
+                self.data_received(data, meta_dict)
+            return
+        # ------------------------
+        # anypath packet processing
+        # ------------------------
+        if data[PKT_PROT_ID] == ANYPATH_PROTO:
+            n = data[ANYPATH_NCAND]
+            candidates = list(data[PKT_MIN:PKT_MIN+n])
+            # this node is not a candidate relay?
+            if self.addr not in candidates:
+                # do nothing!
+                return
+            # source unknown?
+            if data[PKT_SRC] not in self.nodes:
+                if self.debug_stderr:
                     self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
-                                       "SNMP_Table_Size: {1}, "
-                                       "Added new Node {2}\n",
-                                       self.addr,
-                                       self.MTB.getTableSize(),
-                                       self.MTB.getColumn(-1, 'nodeAddr'))
-                    # yes! deliver upper layer protocol
-                    self.output_user_data((data, meta_dict))
-                    # add row if the PKT_SRC is not in the table
-                    # self.MTB.addRow(self.createdefaultNewrow(data[PKT_SRC]))
-                # else, forward to next hop
-                else:
-                    self._app_rx(self.pdupacker(data[PKT_MIN:]),
-                                 data[PKT_CTRL])
+                                       "anypath data from unknown "
+                                       "neighbour {1}\n",
+                                       self.addr, data[PKT_SRC])
+                return
+            key = (data[PKT_SRC], data[PKT_CNT])
+            # last packet number and new packet number different?
+            new_packet = self.nodes[data[PKT_SRC]].lpn != data[PKT_CNT]
+            # save last packet number from that neighbor
+            self.nodes[data[PKT_SRC]].setLpn(data[PKT_CNT])
+            # retransmission?
+            if not new_packet:
+                # packet relayed (by us or a higher priority candidate)?
+                if key not in self.anypath_pending:
+                    # yes! acknowledge it again
+                    self.send_ack(data[PKT_SRC], data[PKT_CNT],
+                                  ANYPATH_PROTO)
+                return
+            # the packet, as a data packet addressed to this node
+            pkt = ([DATA_PROTO, data[PKT_SRC], self.addr, data[PKT_CNT],
+                    data[PKT_CTRL]] + list(data[PKT_MIN+n:]))
+            rank = candidates.index(self.addr)
+            # highest priority candidate?
+            if rank == 0:
+                # yes! relay it right away
+                self.anypath_relay(key, pkt, meta_dict)
+            else:
+                # no! relay it unless a higher priority candidate does
+                timer = threading.Timer(rank*self.anypath_slot,
+                                        self.anypath_timeout,
+                                        [key, self.iface])
+                timer.daemon = True
+                self.anypath_pending[key] = (timer, pkt, meta_dict)
+                timer.start()
             return
         # ----------------------------------------
         # mgmt packet processing for non-SINK node
@@ -910,6 +2016,10 @@ class llsr_mac(gr.basic_block):
         if data[PKT_PROT_ID] == MGMT_PROTO:
             message = []
             temp = {}
+            # unicast to another node?
+            if data[MGMT_NEXT] not in [NO_ADDR, self.addr]:
+                # do nothing!
+                return
             # check if the packet is a old packet
             if not data[MGMT_ORG] in self.lasttrack:
                 self.lasttrack.update({data[MGMT_ORG]:
@@ -921,42 +2031,62 @@ class llsr_mac(gr.basic_block):
                     temp.update({data[MGMT_TRACK]: time.time()})
                     self.lasttrack.update({data[MGMT_ORG]: temp})
                 else:
+                    # copy of a broadcast waiting to be relayed?
+                    self.flood_heard((data[MGMT_ORG], data[MGMT_TRACK]))
                     if self.debug_stderr:
                         self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
                                            "Receive former mgmt packet, drop",
                                            self.addr)
                     return
+            # broadcast? applied and relayed, no ack
+            if data[MGMT_DEST] == MGMT_BROADCAST:
+                self.mgmt_broadcast_received(data)
+                return
             self.send_ack(data[PKT_SRC], data[MGMT_TRACK], data[PKT_PROT_ID])
             # this node is the destination
             if self.addr == data[MGMT_DEST]:
-                checkload = [data[PKT_PROT_ID]]+list(data[2:8])
+                checkload = ([data[PKT_PROT_ID]] + list(data[2:8]) +
+                             list(data[MGMT_BINDS:]))
                 if self.checkhash(checkload, data[MGMT_HASH]) is False:
                     self._mgmt_resp_rx(self.mgmt_resp_pdu(1,
-                                                          data[MGMT_TRACK], 3))
+                                                          data[MGMT_TRACK], 3,
+                                                          data[MGMT_ORG]))
                     if self.debug_stderr:
                         self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
                                            "MGMT TRACK: {1} Hash Wrong\n",
                                            self.addr, data[MGMT_TRACK])
                     return
                 else:  # yes! processing
-                    message = self.agent(data[MGMT_OPT],
-                                         data[MGMT_OID],
-                                         data[MGMT_VAL])
-                    self._mgmt_resp_rx(self.mgmt_resp_pdu(message[0],
+                    message = self.agent(mgmt_bindings(
+                        data[MGMT_VAL:MGMT_OID+1], data[MGMT_BINDS:]))
+                    self._mgmt_resp_rx(self.mgmt_resp_pdu(message[0][0],
                                                           data[MGMT_TRACK],
-                                                          message[1]))
-            # else, if the packet is not for this node
+                                                          message[0][1],
+                                                          data[MGMT_ORG],
+                                                          message[1:]))
+            # else, if the packet is not for this node, relay it
+            # with its original track number
             else:
-                self._mgmt_rx(self.pdupacker(data[MGMT_MIN:MGMT_PKT_LENGTH]))
+                self._mgmt_rx(self.pdupacker(list(data[MGMT_ORG:
+                                                       MGMT_HASH+1]) +
+                                             list(data[MGMT_BINDS:]),
+                                             {META_TRACK: data[MGMT_TRACK],
+                                              META_ORIGIN: data[MGMT_ORG]}))
             return
         # ----------------------
         # mgmt resp packet processing
         # ----------------------
         if data[PKT_PROT_ID] == MGMT_RESP_PROTO:
+            # packet addressed to another node?
+            if data[PKT_DEST] != self.addr:
+                # do nothing!
+                return
+            # the responding node is reachable through the source
+            self.learn_downlink(data[MGMT_RESP_SRC], data[PKT_SRC])
             new_packet = False
             # source in neighbor dictionary?
             # if self.nodes[data[PKT_SRC]]:
-            if data[PKT_SRC] in self.nodes.keys():
+            if data[PKT_SRC] in self.nodes:
                 # last packet number and new packet number different?
                 new_packet = self.nodes[data[PKT_SRC]].lpn != data[PKT_CNT]
                 # save last packet number from that neighbor
@@ -976,23 +2106,52 @@ class llsr_mac(gr.basic_block):
             #  packet is new
             if new_packet:
                 # this node is a sink?
-                if self.addr == SINK_ADDR:
-                    # yes! deliver to be processed
-                    self.mgmt_data_processing((data[MGMT_RESP_MIN:
-                                               MGMT_RESP_LENGTH-1]))
+                if self.is_sink:
+                    # response for another sink?
+                    if data[MGMT_RESP_SINK] != self.addr:
+                        # yes! its track number is meaningless in our
+                        # management table, forward it toward its sink
+                        self.foreign_resps += 1
+                        if self.debug_stderr:
+                            self.debugPrinting(0, 0, "Node {0}: in_radio_rx():"
+                                               " mgmt resp for sink {1} "
+                                               "forwarded\n", self.addr,
+                                               data[MGMT_RESP_SINK])
+                        self._mgmt_resp_rx(self.pdupacker(
+                            data[MGMT_RESP_MIN:],
+                            {META_SINK: data[MGMT_RESP_SINK]}))
+                        return
+                    # no! deliver to be processed
+                    self.mgmt_data_processing(
+                        list(data[MGMT_RESP_MIN:MGMT_RESP_HASH]) +
+                        list(data[MGMT_RESP_VALS:]))
                 # else, forward to next hop
                 else:
-                    self._mgmt_resp_rx(self.pdupacker(data[MGMT_RESP_MIN:]))
+                    # broadcast acks, merged into ours if still held
+                    if (data[MGMT_RESP_FLAG] == MGMT_RESP_BCAST and
+                            self.bcast_merge(data)):
+                        return
+                    self._mgmt_resp_rx(self.pdupacker(
+                        data[MGMT_RESP_MIN:],
+                        {META_SINK: data[MGMT_RESP_SINK]}))
             return
         # ---------------------
         # ack packet processing
         # ---------------------
         if data[PKT_PROT_ID] == ARQ_PROTO:
+            # anypath packet relayed by another candidate?
+            if data[PROTO_ACK] == ANYPATH_PROTO:
+                entry = self.anypath_pending.pop((data[PKT_DEST],
+                                                  data[PKT_CNT]), None)
+                if entry is not None:
+                    # yes! give up relaying it
+                    entry[0].cancel()
+                    self.anypath_suppressed += 1
             # channel idle?
             if (self.addr == data[PKT_DEST]) and (self.CHANNEL_state ==
                                                   CHANNEL_IDLE):
                 # data packet arq
-                if data[PROTO_ACK] == DATA_PROTO:
+                if data[PROTO_ACK] in [DATA_PROTO, ANYPATH_PROTO]:
                     # yes! in debug mode?
                     if self.debug_stderr:
                         self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
@@ -1020,10 +2179,12 @@ class llsr_mac(gr.basic_block):
             elif (self.addr == data[PKT_DEST]) and (self.CHANNEL_state ==
                                                     CHANNEL_BUSY):
                 # recieved ack packet for data protocol
-                if data[PROTO_ACK] == DATA_PROTO:
+                if data[PROTO_ACK] in [DATA_PROTO, ANYPATH_PROTO]:
                     if data[PKT_CNT] == self.expected_ack:
                         # transition to idle state
                         self.CHANNEL_state = CHANNEL_IDLE
+                        self.fwd_counters[data[PKT_SRC]][2] += 1
+                        self.record_arq_outcome(data[PKT_SRC], True)
                         if self.debug_stderr:
                             self.debugPrinting(0, 0, "Node {0}: in_radio_rx():"
                                                " got data ack: {1} and "
@@ -1058,6 +2219,7 @@ class llsr_mac(gr.basic_block):
                     if data[PKT_CNT] == self.expected_ack:
                         # transition to idle state
                         self.CHANNEL_state = CHANNEL_IDLE
+                        self.record_arq_outcome(data[PKT_SRC], True)
                         if self.debug_stderr:
                             self.debugPrinting(0, 0, "Node {0}: in_radio_rx():"
                                                "got mgmt resp ack {1} and "
@@ -1079,15 +2241,15 @@ class llsr_mac(gr.basic_block):
     # Handle a message from the application, ARQ not used
     # ---------------------------------------------------
     def app_rx(self, msg):
-        if len(self.nodes) > 0:
-            with self.lock:
+        if any(len(k.nodes) > 0 for k in self.ifaces):
+            with self.lock, self.on_iface(self.ifaces[self.route_iface]):
                 self._app_rx(msg, False)
 
     # ---------------------------------------------------
     # Handle a message from the application, ARQ is used
     # ---------------------------------------------------
     def app_rx_arq(self, msg):
-        with self.lock:
+        with self.lock, self.on_iface(self.ifaces[self.route_iface]):
             self._app_rx(msg, True)
 
     # ---------------------------------------------------------------
@@ -1122,6 +2284,23 @@ class llsr_mac(gr.basic_block):
         meta_dict = pmt.to_python(meta)
         if not (type(meta_dict) is dict):
             meta_dict = {}
+        # packet originated by this node?
+        if META_ORIGIN not in meta_dict:
+            # origin timestamp?
+            if self.e2e_timestamp:
+                # yes! prepend it
+                ts = timestamp(time.time())
+                data = [ts >> 24, (ts >> 16) & 0xFF, (ts >> 8) & 0xFF,
+                        ts & 0xFF] + list(data)
+                meta_dict[META_CTRL] = self.ctrl_flags(meta_dict) | CTRL_TS
+            # end-to-end header?
+            if self.e2e_header:
+                # yes! prepend origin and sequence number
+                data = [self.addr, self.e2e_seq >> 8,
+                        self.e2e_seq & 0xFF] + list(data)
+                self.e2e_seq = (self.e2e_seq + 1) % 65536
+                meta_dict[META_CTRL] = (self.ctrl_flags(meta_dict) |
+                                        CTRL_E2E)
         # push the packet
         self.dispatch_app_rx(data, meta_dict, arq)
 
@@ -1142,8 +2321,9 @@ class llsr_mac(gr.basic_block):
             self.queue.put((data, meta_dict))
             self.run_fsm()
         else:
-            # transmit with the no ARQ protocol!
-            self.tx_no_arq((data, meta_dict), DATA_PROTO)
+            # transmit with the no ARQ protocol, on the best route!
+            with self.on_iface(self.ifaces[self.route_iface]):
+                self.tx_no_arq((data, meta_dict), DATA_PROTO)
 
     # ----------------------------------------------------------
     # Handle a control signal
@@ -1152,10 +2332,15 @@ class llsr_mac(gr.basic_block):
     # Runs the FSM.
     # ----------------------------------------------------------
     def ctrl_rx(self, msg):
-        with self.lock:
+        with self.lock, self.on_iface(self.ifaces[self.route_iface]):
             # if sink node or connected to sink (path quality>0)?
-            if (self.addr == SINK_ADDR) or (self.pq > 0):
-                if ((self.broadcast_interval > 0) and
+            if self.is_sink or (self.pq > 0):
+                # Trickle timer enabled?
+                if self.beacon_mode == BEACON_TRICKLE:
+                    # time to send a beacon?
+                    if self.trickle.poll(time.time()):
+                        self.send_beacon_pkt()
+                elif ((self.broadcast_interval > 0) and
                     (self.last_tx_time is None) or  # randomization
                     ((time.time() - self.last_tx_time) >=
                         (self.broadcast_interval*2*random.random()))):
@@ -1163,15 +2348,219 @@ class llsr_mac(gr.basic_block):
                     self.send_beacon_pkt()
             # update the neighbor dictionary
             self.check_nodes()
+            # topology report due?
+            if self.report_interval > 0:
+                self.check_report()
             # check if the manager is online and handle a snmp request
-            if self.addr == SINK_ADDR:
+            if self.is_sink:
                 self._snmpManager.handle_request()
             # send IN-BAND mgmt pkt if queue is not empty
-            if self.addr == SINK_ADDR:
+            if self.is_sink:
+                self.MTB.flushGets()
                 while self.MTB.pktforsent.qsize() != 0:
-                    self.mgmt_rx(self.MTB.pktforsent.get())
+                    self.mgmt_rx(self.pdupacker(self.MTB.pktforsent.get()))
             # run the protocol FSM
             self.run_fsm()
+            # time to snapshot the state?
+            if (self.state_file and time.time() - self.last_snapshot_time
+                    >= self.snapshot_interval):
+                self.save_state()
+
+    # ----------------------------------------------------------------
+    # send a topology report when the report interval elapsed or the
+    # parent changed; at the sink, forget the nodes no longer reporting
+    # ----------------------------------------------------------------
+    def check_report(self):
+        time_now = time.time()
+        if self.is_sink:
+            self.topology.expire(time_now -
+                                 REPORT_EXPIRY*self.report_interval)
+            return
+        # connected to the sink?
+        if self.pq == 0:
+            return
+        if (self.last_report_time is None or
+                self.next_hop != self.reported_parent or
+                time_now - self.last_report_time >= self.report_interval):
+            self.send_report()
+
+    # -----------------------------------------------------------
+    # send a topology report to the sink, with the ARQ protocol
+    # report = [origin, parent, hop count, number of neighbors,
+    #           neighbors...], neighbors with the best links first
+    # -----------------------------------------------------------
+    def send_report(self):
+        self.last_report_time = time.time()
+        self.reported_parent = self.next_hop
+        dr = {}
+        for iface in self.ifaces:
+            for k in iface.nodes.keys():
+                dr[k] = max(dr.get(k, 0.0), iface.nodes[k].dr)
+        nbrs = sorted(dr, key=lambda k: -dr[k])[:REPORT_MAX_NEIGHBORS]
+        report = [self.addr, self.next_hop, self.hc, len(nbrs)] + nbrs
+        self.dispatch_app_rx(report, {META_CTRL: CTRL_REPORT}, True)
+
+    # ------------------------------------------------
+    # topology report received by the sink
+    # ------------------------------------------------
+    def report_received(self, report):
+        # valid report length?
+        if (len(report) < REPORT_MIN or
+                len(report) < REPORT_MIN + report[REPORT_NNBRS]):
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in report_received(): "
+                                   "invalid report length: {1}\n",
+                                   self.addr, len(report))
+            return
+        nbrs = report[REPORT_MIN:REPORT_MIN+report[REPORT_NNBRS]]
+        attached = self.topology.report(report[REPORT_ORIGIN],
+                                        report[REPORT_PARENT],
+                                        report[REPORT_HC], nbrs, time.time())
+        if self.debug_stderr:
+            self.debugPrinting(0, 0, "Node {0}: in report_received(): "
+                               "node {1} parent {2} attached: {3}\n",
+                               self.addr, report[REPORT_ORIGIN],
+                               report[REPORT_PARENT], attached)
+
+    # ---------------------------------------------------------
+    # topology queries, at the sink
+    # path from the sink to a node, None if unknown
+    # ---------------------------------------------------------
+    def get_topology_path(self, addr):
+        with self.lock:
+            if self.topology is None:
+                return None
+            return self.topology.path(addr)
+
+    # number of nodes in the subtree of a node, 0 if unknown
+    def get_subtree_size(self, addr):
+        with self.lock:
+            if self.topology is None:
+                return 0
+            return self.topology.subtree_size(addr)
+
+    # number of nodes per depth in the tree, {depth: number of nodes}
+    def get_depth_histogram(self):
+        with self.lock:
+            if self.topology is None:
+                return {}
+            return self.topology.depth_histogram()
+
+    # ---------------------------------------------------------
+    # stored data of node "origin" received in [start, end], at
+    # the sink; returns [(sequence number, receive time, payload)]
+    # ---------------------------------------------------------
+    def query_storage(self, origin, start, end):
+        if self.storage is None:
+            return []
+        return self.storage.query(origin, start, end)
+
+    # ----------------------------------------------------------------
+    # per origin flow statistics, at the sink, None if not enabled
+    # returns {origin: {'received', 'expected', 'loss', 'reordered',
+    #                   'goodput', 'latency'}}, see FlowStats
+    # ----------------------------------------------------------------
+    def get_flow_stats(self):
+        with self.lock:
+            if self.flow_stats is None:
+                return None
+            return self.flow_stats.snapshot()
+
+    # ----------------------------------------------------------------
+    # end-to-end duplicate suppression statistics, None if not enabled
+    # returns (delivered, duplicates dropped, dropped as older than the
+    #          window, origin restarts, origins, bitmap memory in bytes);
+    #          no false positive by design
+    # ----------------------------------------------------------------
+    def get_dedupe_stats(self):
+        with self.lock:
+            if self.dedupe is None:
+                return None
+            return self.dedupe.stats()
+
+    # -----------------------------------------------------------
+    # storage statistics, None if no storage
+    # returns (records appended, dropped, written, write errors,
+    #          segments, origins)
+    # -----------------------------------------------------------
+    def get_storage_stats(self):
+        if self.storage is None:
+            return None
+        return self.storage.stats()
+
+    # ------------------------------------------------------------
+    # save the neighbor table, the route metrics and the sequence
+    # counters to the state file
+    # ------------------------------------------------------------
+    def save_state(self):
+        self.last_snapshot_time = time.time()
+        state = {'addr': self.addr,
+                 'time': self.last_snapshot_time,
+                 'pkt_cnt': self.pkt_cnt,
+                 'mgmt_track': self.mgmt_track,
+                 'e2e_seq': self.e2e_seq,
+                 'epochs': dict((str(k), v)
+                                for k, v in self.sink_epochs.items()),
+                 'nodes': [k.nodes.snapshot() for k in self.ifaces]}
+        tmp = self.state_file + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+            # replace the previous snapshot atomically
+            os.rename(tmp, self.state_file)
+        except (IOError, OSError) as e:
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in save_state(): "
+                                   "cannot write {1}: {2}\n", self.addr,
+                                   self.state_file, e)
+
+    # ---------------------------------------------------------------
+    # load the state file saved before a restart, neighbors older than
+    # the node expiry delay are discarded, route metrics are derived
+    # from the restored neighbors
+    # ---------------------------------------------------------------
+    def load_state(self):
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (IOError, ValueError) as e:
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in load_state(): "
+                                   "no state restored from {1}: {2}\n",
+                                   self.addr, self.state_file, e)
+            return
+        # snapshot of another node?
+        if not isinstance(state, dict) or state.get('addr') != self.addr:
+            return
+        # sequence counters
+        self.pkt_cnt = state.get('pkt_cnt', 0) % 256
+        self.mgmt_track = state.get('mgmt_track', 0)
+        self.e2e_seq = state.get('e2e_seq', 0) % 65536
+        # route epochs, a sink goes on from its saved one
+        for k, v in state.get('epochs', {}).items():
+            if self.is_sink and int(k) == self.addr:
+                self.epoch = v[0]
+                self.sink_epochs[self.addr] = [self.epoch, self.epoch_time]
+            elif not self.is_sink:
+                self.sink_epochs[int(k)] = v
+        # neighbors still alive
+        # (one snapshot per interface, a single one in older files)
+        snapshots = state.get('nodes', [])
+        if isinstance(snapshots, dict):
+            snapshots = [snapshots]
+        restored = set()
+        for iface, snapshot in zip(self.ifaces, snapshots):
+            restored.update(iface.nodes.restore(
+                snapshot, time.time() - self.node_expiry_delay))
+        if self.is_sink:
+            for k in restored:
+                self.MTB.addRow(self.createdefaultNewrow(k))
+        # route metrics
+        self.SelectNextHop()
+        if self.debug_stderr:
+            self.debugPrinting(0, 0, "Node {0}: in load_state(): "
+                               "restored {1} neighbors\n", self.addr,
+                               len(restored))
 
     # ---------------------------------------
     # ARQ protocol Finite State Machine (FSM)
@@ -1185,11 +2574,23 @@ class llsr_mac(gr.basic_block):
                                        self.addr)
             # do nothing!
             return
+        # one FSM per radio interface, the best route first
+        for iface in sorted(self.ifaces,
+                            key=lambda k: k.index != self.route_iface):
+            with self.on_iface(iface):
+                self.run_iface_fsm()
+
+    # ---------------------------------------------------------------
+    # ARQ protocol FSM of the current radio interface; the data and
+    # mgmt resp queues are shared by the interfaces with a best route
+    # ---------------------------------------------------------------
+    def run_iface_fsm(self):
+        usable = self.iface_usable(self.iface)
         # IDLE state
         # ----------
         if self.CHANNEL_state == CHANNEL_IDLE:
             # A mgmt resp packet queued for transmission?
-            if not self.mgmt_resp_queue.empty():
+            if usable and not self.mgmt_resp_queue.empty():
                 # get the packet
                 self.arq_pdu_tuple = self.mgmt_resp_queue.get()
                 # save the current packet number
@@ -1200,6 +2601,9 @@ class llsr_mac(gr.basic_block):
                                        self.addr, self.pkt_cnt)
                 # record packet type
                 self.pkttype = 2
+                # mgmt resp packets go toward their sink
+                self.arq_next_hop = self.resp_next_hop(
+                    self.arq_pdu_tuple[1].get(META_SINK, SINK_ADDR))
                 # transmitting the data packet
                 self.mgmt_resp_tx(self.arq_pdu_tuple)
                 if self.debug_stderr:
@@ -1220,11 +2624,13 @@ class llsr_mac(gr.basic_block):
             # A mgmt packet queued for transmission?
             elif not self.mgmt_queue.empty():
                 self.arq_pdu_tuple = self.mgmt_queue.get()
-                self.mgmt_expected_ack = self.mgmt_track
+                # track number of the packet
+                self.mgmt_expected_ack = self.arq_pdu_tuple[1][META_TRACK]
                 if self.debug_stderr:
                     self.debugPrinting(0, 0, "Node {0}: in run_fsm(): "
                                        "sending mgmt packet, packet track NO: "
-                                       "{1}\n", self.addr, self.mgmt_track)
+                                       "{1}\n", self.addr,
+                                       self.mgmt_expected_ack)
                 # record packet type
                 self.pkttype = 1
                 # transimitting the mgmt packet
@@ -1244,7 +2650,7 @@ class llsr_mac(gr.basic_block):
                 self.next_random_backoff_percentage = (self.backoff_randomness
                                                        * random.random())
             # A data packet queued for transmission?
-            elif not self.queue.empty():
+            elif usable and not self.queue.empty():
                 # get the packet
                 self.arq_pdu_tuple = self.queue.get()
                 # save the current packet number
@@ -1282,8 +2688,26 @@ class llsr_mac(gr.basic_block):
                 backedoff_timeout = self.timeout * (self.retries + 1)
             backedoff_timeout *= (1.0 + self.next_random_backoff_percentage)
             if (time.time() - self.time_of_tx) > backedoff_timeout:
+                # unicast packet not acknowledged by its next hop
+                if self.pkttype in (0, 2):
+                    self.record_arq_outcome(self.arq_next_hop, False)
+                # unicast mgmt packet not acknowledged?
+                if (self.retries == self.max_attempts and
+                        self.pkttype == 1 and self.mgmt_next_hop != NO_ADDR):
+                    # yes! forget the route, fall back to flooding
+                    if self.debug_stderr:
+                        self.debugPrinting(0, 0, "Node {0}: in_run_fsm(): "
+                                           "mgmt unicast to {1} failed, "
+                                           "flooding\n", self.addr,
+                                           self.mgmt_next_hop)
+                    self.forget_downlink(self.mgmt_next_hop)
+                    self.mgmt_flood = True
+                    self.retries = 0
+                    self.mgmt_retx(self.arq_pdu_tuple)
+                    self.time_of_tx = time.time()
+                    self.arq_retxed += 1
                 # maximum number of retries reached?
-                if self.retries == self.max_attempts:
+                elif self.retries == self.max_attempts:
                     if self.debug_stderr:
                         self.debugPrinting(0, 0, "Node {0}: in_run_fsm(): "
                                            "ARQ failed after {1} attempts\n",
@@ -1294,12 +2718,12 @@ class llsr_mac(gr.basic_block):
                     self.CHANNEL_state = CHANNEL_IDLE
                     # update the failed transmitted packet count
                     self.failed_arq += 1
-                    if self.addr != SINK_ADDR and self.pkttype == 1:
+                    if not self.is_sink and self.pkttype == 1:
                         # track number problem
-                        resppdu = self.mgmt_resp_pdu(1,
-                                                     self.mgmt_track-1
-                                                     if self.mgmt_track != 0
-                                                     else 255, 2)
+                        resppdu = self.mgmt_resp_pdu(
+                            1, self.mgmt_expected_ack, 2,
+                            self.arq_pdu_tuple[1].get(META_ORIGIN,
+                                                      SINK_ADDR))
                         self._mgmt_resp_rx(resppdu)
                         if self.debug_stderr:
                             self.debugPrinting(0, 0, "Node {0}: in run_fsm(): "
@@ -1363,13 +2787,9 @@ class llsr_mac(gr.basic_block):
     # -----------------------------
     def mgmt_data_processing(self, data):
         self.MTB.processingColumn(data)
-        # write packet to standard
-        self.debugPrinting(0, 1, "{0} : ",
-                           time.asctime(time.localtime(time.time())))
-        # print data
-        for i in range(0, len(data)):
-            self.debugPrinting(0, 1, "{0}", data[i])
-        self.debugPrinting(0, 1, "\n")
+        # log the response
+        if self.record_writer is not None:
+            self.record_writer.write(data)
 
     # --------IN-BAND Management PKT DOWNward Passing--------
     # --------MGMT_APP Passing Format: VALUE|DEST|OPT|OID----
@@ -1385,7 +2805,7 @@ class llsr_mac(gr.basic_block):
         # May need adding extra procedure to ask app for resend
         # if the network is not ready
         temp = {}
-        if len(self.nodes) > 0:
+        if any(len(k.nodes) > 0 for k in self.ifaces):
             with self.lock:
                 if not bool(self.lasttrack):
                     self.lasttrack.update(
@@ -1422,7 +2842,7 @@ class llsr_mac(gr.basic_block):
         meta_dict = pmt.to_python(meta)
         if not (type(meta_dict) is dict):
             meta_dict = {}
-            self.dispatch_mgmt_rx(data, meta_dict)
+        self.dispatch_mgmt_rx(data, meta_dict)
 
     # --------------------------------------------------------
     # Push a mgmt packet
@@ -1430,9 +2850,30 @@ class llsr_mac(gr.basic_block):
     # meta_dict = meta dictionary
     # --------------------------------------------------------
     def dispatch_mgmt_rx(self, data, meta_dict):
-        if self.mgmt_queue.qsize() >= self.max_queue_size:
-            self.mgmt_queue.get()
-        self.mgmt_queue.put((data, meta_dict))
+        # relayed packet? the destination follows the origin
+        relayed = META_ORIGIN in meta_dict
+        dest = data[2] if relayed else data[1]
+        # a new track number, shared by the copies of the packet
+        if not relayed:
+            meta_dict[META_TRACK] = self.mgmt_track
+            self.mgmt_track = (self.mgmt_track + 1) % 256
+            # broadcast? a single flood, without ARQ
+            if dest == MGMT_BROADCAST:
+                self.mgmt_broadcast(data, meta_dict)
+                return
+        # interfaces with a unicast route to the destination
+        routes = []
+        for iface in self.ifaces:
+            with self.on_iface(iface):
+                if self.mgmt_route(dest) != NO_ADDR:
+                    routes.append(iface)
+        if dest == self.addr:
+            routes = [self.iface]
+        # send along the route, otherwise flood on every interface
+        for iface in (routes[:1] or self.ifaces):
+            if iface.mgmt_queue.qsize() >= self.max_queue_size:
+                iface.mgmt_queue.get()
+            iface.mgmt_queue.put((data, meta_dict))
         self.run_fsm()
 
     # --------------------------------------------
@@ -1440,23 +2881,248 @@ class llsr_mac(gr.basic_block):
     # --------------------------------------------
     def mgmt_tx(self, pdu_tuple):
         if len(self.nodes) > 0:
-            self.send_mgmt_pkt(pdu_tuple, self.mgmt_track)
-            self.mgmt_track = (self.mgmt_track + 1) % 256
+            self.mgmt_flood = False
+            self.send_mgmt_pkt(pdu_tuple, self.mgmt_expected_ack, True)
 
     # --------------------------------------------
     # retransmit a management data packet
     # --------------------------------------------
     def mgmt_retx(self, pdu_tuple):
         if len(self.nodes) > 0:
-            self.send_mgmt_pkt(pdu_tuple,
-                               self.mgmt_track-1
-                               if self.mgmt_track != 0 else 255)
+            self.send_mgmt_pkt(pdu_tuple, self.mgmt_expected_ack, True)
+
+    # ------------------------------------------------------
+    # learn that node "dest" is reachable through neighbor
+    # "child", from upstream traffic originated by "dest"
+    # ------------------------------------------------------
+    def learn_downlink(self, dest, child):
+        if dest != self.addr and child != self.addr:
+            self.downlinks[dest] = [child, time.time()]
+
+    # ------------------------------------------------
+    # forget the downlink routes through neighbor "child"
+    # ------------------------------------------------
+    def forget_downlink(self, child):
+        for k in [k for k, v in self.downlinks.items() if v[0] == child]:
+            del self.downlinks[k]
+
+    # --------------------------------------------------------------
+    # next hop of a mgmt packet to node "dest", NO_ADDR for flooding
+    # --------------------------------------------------------------
+    def mgmt_route(self, dest):
+        if (not self.reverse_path_mgmt or self.mgmt_flood or
+                dest == MGMT_BROADCAST):
+            return NO_ADDR
+        # neighbor?
+        if dest in self.nodes:
+            return dest
+        # downlink route learned recently through a neighbor?
+        route = self.downlinks.get(dest)
+        if route is not None:
+            if (route[0] in self.nodes and
+                    time.time() - route[1] <= self.downlink_timeout):
+                return route[0]
+            del self.downlinks[dest]
+        # path in the topology database of the sink?
+        if self.topology is not None:
+            path = self.topology.path(dest)
+            if path is not None and len(path) > 1 and path[1] in self.nodes:
+                return path[1]
+        return NO_ADDR
+
+    # ---------------------------------------------------------
+    # originate broadcast mgmt packet "data", sent once on every
+    # interface and applied here
+    # ---------------------------------------------------------
+    def mgmt_broadcast(self, data, meta_dict):
+        track = meta_dict[META_TRACK]
+        for iface in self.ifaces:
+            with self.on_iface(iface):
+                self.send_mgmt_pkt((data, meta_dict), track)
+        code = self.bcast_code(self.agent(mgmt_bindings(data[:4], data[4:])))
+        if self.is_sink:
+            self.mgmt_data_processing([MGMT_RESP_BCAST, self.addr, track,
+                                       1, self.addr, code])
+
+    # ---------------------------------------------------------------
+    # new broadcast mgmt packet received: applied, acknowledged to the
+    # origin with the acks of the other nodes, and relayed after a
+    # random delay unless enough copies are heard meanwhile
+    # ---------------------------------------------------------------
+    def mgmt_broadcast_received(self, data):
+        checkload = ([data[PKT_PROT_ID]] + list(data[2:8]) +
+                     list(data[MGMT_BINDS:]))
+        if self.checkhash(checkload, data[MGMT_HASH]) is False:
+            self._mgmt_resp_rx(self.mgmt_resp_pdu(1, data[MGMT_TRACK], 3,
+                                                  data[MGMT_ORG]))
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in_radio_rx(): "
+                                   "MGMT TRACK: {1} Hash Wrong\n",
+                                   self.addr, data[MGMT_TRACK])
+            return
+        results = self.agent(mgmt_bindings(data[MGMT_VAL:MGMT_OID+1],
+                                           data[MGMT_BINDS:]))
+        self.bcast_ack(data[MGMT_ORG], data[MGMT_TRACK], self.addr,
+                       self.bcast_code(results))
+        key = (data[MGMT_ORG], data[MGMT_TRACK])
+        pdu_tuple = (list(data[MGMT_ORG:MGMT_HASH+1]) +
+                     list(data[MGMT_BINDS:]),
+                     {META_TRACK: data[MGMT_TRACK],
+                      META_ORIGIN: data[MGMT_ORG]})
+        timer = threading.Timer(random.uniform(0, self.bcast_delay),
+                                self.flood_timeout, [key])
+        timer.daemon = True
+        self.flood_pending[key] = [timer, 1, pdu_tuple]
+        timer.start()
+
+    # ---------------------------------------------------
+    # a copy of broadcast mgmt packet "key" heard again
+    # ---------------------------------------------------
+    def flood_heard(self, key):
+        if key in self.flood_pending:
+            self.flood_pending[key][1] += 1
+
+    # ---------------------------------------------------
+    # relay delay of broadcast mgmt packet "key" elapsed
+    # ---------------------------------------------------
+    def flood_timeout(self, key):
+        with self.lock:
+            entry = self.flood_pending.pop(key, None)
+            if entry is None:
+                return
+            # enough copies heard?
+            if self.bcast_counter > 0 and entry[1] >= self.bcast_counter:
+                # yes! the neighbors are covered
+                self.bcast_suppressed += 1
+                return
+            self.bcast_relayed += 1
+            for iface in self.ifaces:
+                with self.on_iface(iface):
+                    self.send_mgmt_pkt(entry[2], key[1])
+
+    # ---------------------------------------------------------
+    # result code of the bindings of a broadcast, the first SET
+    # error code, 0 when all succeeded
+    # ---------------------------------------------------------
+    def bcast_code(self, results):
+        for r in results:
+            if r[0] == 1 and r[1] != 0:
+                return r[1]
+        return 0
+
+    # ----------------------------------------------------------------
+    # hold the ack of node "addr" to broadcast "track" of "sink", the
+    # acks are sent together when the holding time elapses; the
+    # farther from the sink, the shorter the holding time, so that
+    # acks from below are merged before sending
+    # ----------------------------------------------------------------
+    def bcast_ack(self, sink, track, addr, code):
+        key = (sink, track)
+        entry = self.bcast_acks.get(key)
+        if entry is None:
+            hold = self.bcast_ack_window * max(MGMT_BCAST_DEPTH - self.hc, 1)
+            timer = threading.Timer(hold, self.bcast_ack_timeout, [key])
+            timer.daemon = True
+            entry = self.bcast_acks[key] = [timer, {}]
+            timer.start()
+        entry[1][addr] = code
+
+    # -----------------------------------------------------------
+    # merge the acks of broadcast resp packet "data" into the held
+    # ones; returns False when none held for that broadcast
+    # -----------------------------------------------------------
+    def bcast_merge(self, data):
+        entry = self.bcast_acks.get((data[MGMT_RESP_SINK],
+                                     data[MGMT_RESP_TRACK]))
+        if entry is None:
+            return False
+        acks = data[MGMT_RESP_VALS:
+                    MGMT_RESP_VALS + data[MGMT_RESP_VAL]*MGMT_RESP_VAL_LENGTH]
+        for k in range(0, len(acks) - 1, MGMT_RESP_VAL_LENGTH):
+            entry[1][acks[k]] = acks[k+1]
+        return True
+
+    # ---------------------------------------------------
+    # holding time of the acks to broadcast "key" elapsed
+    # ---------------------------------------------------
+    def bcast_ack_timeout(self, key):
+        with self.lock:
+            entry = self.bcast_acks.pop(key, None)
+            if entry is None:
+                return
+            acks = sorted(entry[1].items())
+            with self.on_iface(self.ifaces[self.route_iface]):
+                for k in range(0, len(acks), MGMT_BCAST_MAX_ACKS):
+                    chunk = acks[k:k+MGMT_BCAST_MAX_ACKS]
+                    self._mgmt_resp_rx(self.mgmt_resp_pdu(
+                        MGMT_RESP_BCAST, key[1], len(chunk), key[0],
+                        [list(a) for a in chunk]))
+
+    # ---------------------------------------------------------
+    # broadcast mgmt statistics
+    # returns (broadcast packets sent, broadcasts relayed, relays
+    #          suppressed)
+    # ---------------------------------------------------------
+    def get_broadcast_stats(self):
+        with self.lock:
+            return (self.bcast_sent, self.bcast_relayed,
+                    self.bcast_suppressed)
+
+    # ------------------------------------------------------------
+    # mgmt value cache statistics, at the sink
+    # returns (hits, misses, GETs sent, GETs coalesced, hit rate),
+    # None if not a sink
+    # ------------------------------------------------------------
+    def get_cache_stats(self):
+        with self.lock:
+            if self.MTB is None:
+                return None
+            return self.MTB.getCacheStats() + (self.MTB.getCacheHitRate(),)
+
+    # ------------------------------------------------------------
+    # confirmation of broadcast "track", at the sink
+    # returns (nodes confirmed, nodes yet to confirm), None if
+    # unknown
+    # ------------------------------------------------------------
+    def get_broadcast_status(self, track):
+        with self.lock:
+            if self.MTB is None:
+                return None
+            return self.MTB.getBroadcastStatus(track)
+
+    # ---------------------------------------------------------
+    # mgmt routing statistics
+    # returns (unicast packets, flooded packets, downlink routes,
+    #          responses forwarded to another sink, responses
+    #          dropped for lack of a route to their sink)
+    # ---------------------------------------------------------
+    def get_mgmt_routing_stats(self):
+        with self.lock:
+            return (self.mgmt_unicast, self.mgmt_flooded,
+                    sum(len(k.downlinks) for k in self.ifaces),
+                    self.foreign_resps, self.resps_no_route)
+
+    # ----------------------------------------------------------
+    # next hop of a mgmt response for sink "sink": the current
+    # next hop when it leads to that sink, otherwise the closest
+    # neighbor routing to it; NO_ADDR at a sink without such a
+    # neighbor
+    # ----------------------------------------------------------
+    def resp_next_hop(self, sink):
+        if not self.is_sink and self.root == sink:
+            return self.next_hop
+        hc, pq, hops = self.nodes.best_hops(self.nodes.sink == sink)
+        if len(hops) > 0:
+            return hops[0]
+        return NO_ADDR if self.is_sink else self.next_hop
 
     # ---------------------------------------------------------
     # Transmit a mgmt packet
     # pdu_tuple = PDU pair (payload,meta data)
+    # arq = True when sent by the mgmt ARQ protocol, False for a
+    #       broadcast
     # ---------------------------------------------------------
-    def send_mgmt_pkt(self, pdu_tuple, mgmt_track):
+    def send_mgmt_pkt(self, pdu_tuple, mgmt_track, arq=False):
         # connected to sink?
         if self.pq == 0:
             # no! drop the packet
@@ -1466,8 +3132,10 @@ class llsr_mac(gr.basic_block):
                                    self.addr)
             return
         data = [MGMT_PROTO, self.addr, mgmt_track]
-        # if sink add orginal sender address (Done Once)
-        if self.addr == SINK_ADDR:
+        # packet originated here (not relayed)?
+        originated = META_ORIGIN not in pdu_tuple[1]
+        # if originated add orginal sender address (Done Once)
+        if originated:
             data += [self.addr]
         payload = pdu_tuple[0]
         if payload is None:
@@ -1476,19 +3144,42 @@ class llsr_mac(gr.basic_block):
             payload = map(ord, list(payload))
         elif not isinstance(payload, list):
             payload = list(payload)
-        # if the dest node is sink and this node is sink
-        if payload[1] == SINK_ADDR:
+        # if the dest node is this node, the originator
+        if originated and payload[1] == self.addr:
             if self.CHANNEL_state == CHANNEL_BUSY:
-                self.CHANNEL_state == CHANNEL_IDLE
-            msg = self.agent(payload[2], payload[3], payload[0])
-            resppkt = [msg[0], self.addr, mgmt_track, msg[1]]
+                self.CHANNEL_state = CHANNEL_IDLE
+            msg = self.agent(mgmt_bindings(payload[:4], payload[4:]))
+            resppkt = [msg[0][0], self.addr, mgmt_track, msg[0][1]]
+            for r in msg[1:]:
+                resppkt += r
             self.mgmt_data_processing(resppkt)
             return
-        data += payload
-        # if sink add hash value (Done Once)
-        if self.addr == SINK_ADDR:
-            # add hash value at the end
-            data += [self.addhash([data[0]] + data[2:], self.secretkey)]
+        # first binding in the header, the additional ones at the end
+        if originated:
+            split = MGMT_HASH - len(data)
+        else:
+            split = MGMT_NEXT - len(data)
+        binds = payload[split:]
+        data += payload[:split]
+        # if originated add hash value (Done Once)
+        if originated:
+            # add hash value after the first binding
+            data += [self.addhash([data[0]] + data[2:] + binds,
+                                  self.secretkey)]
+        # unicast along the reverse path, or flooded
+        next_hop = self.mgmt_route(data[MGMT_DEST])
+        data += [next_hop]
+        data += binds
+        # handled by the ARQ protocol? its next hop is kept for the
+        # fallback to flooding (broadcasts are not)
+        if arq:
+            self.mgmt_next_hop = next_hop
+            if next_hop == NO_ADDR:
+                self.mgmt_flooded += 1
+            else:
+                self.mgmt_unicast += 1
+        else:
+            self.bcast_sent += 1
         # debug mode enabled?
         if self.debug_stderr:
             # yes! log the packet
@@ -1498,7 +3189,7 @@ class llsr_mac(gr.basic_block):
         # conversion to PMT PDU (meta data, data)
         pdu = self.pdupacker(data)
         # push to radio msg port
-        self.message_port_pub(pmt.intern('to_radio'), pdu)
+        self.message_port_pub(self.iface.port_out, pdu)
         # save current transmit time
         with self.lock:
             self.last_tx_time = time.time()
@@ -1508,46 +3199,37 @@ class llsr_mac(gr.basic_block):
     # ---------------------------------------------------------
     def print_mgmt_pkt(self, pkt):
         # invalid mgmt packet length?
-        if len(pkt) != MGMT_PKT_LENGTH:
+        if len(pkt) < MGMT_PKT_LENGTH:
             # yes!
             self.debugPrinting(0, 0, "Node {0}: in print_mgmt_pkt(): "
                                "mgmt packt invalid length! length is {1}\n",
                                self.addr, len(pkt))
             return
         # no!
-            self.debugPrinting(0, 0, "PROT ID: {0} "
-                               "PKT TEMP FROM: {1} "
-                               "TRACK: {2} "
-                               "PKT ORG FROM: {3} "
-                               "VALUE: {4} "
-                               "DEST: {5} "
-                               "OPT: {6} "
-                               "OID: {7} "
-                               "HASH: {8}\n", pkt[PKT_PROT_ID], pkt[PKT_SRC],
-                               pkt[MGMT_TRACK], pkt[MGMT_ORG], pkt[MGMT_VAL],
-                               pkt[MGMT_DEST], pkt[MGMT_OPT], pkt[MGMT_OID],
-                               pkt[MGMT_HASH])
+        self.debugPrinting(0, 0, "PROT ID: {0} "
+                           "PKT TEMP FROM: {1} "
+                           "TRACK: {2} "
+                           "PKT ORG FROM: {3} "
+                           "VALUE: {4} "
+                           "DEST: {5} "
+                           "OPT: {6} "
+                           "OID: {7} "
+                           "HASH: {8} "
+                           "NEXT: {9}\n", pkt[PKT_PROT_ID], pkt[PKT_SRC],
+                           pkt[MGMT_TRACK], pkt[MGMT_ORG], pkt[MGMT_VAL],
+                           pkt[MGMT_DEST], pkt[MGMT_OPT], pkt[MGMT_OID],
+                           pkt[MGMT_HASH], pkt[MGMT_NEXT])
+        if len(pkt) > MGMT_PKT_LENGTH:
+            self.debugPrinting(0, 0, "BINDINGS: {0}\n",
+                               list(pkt[MGMT_BINDS:]))
 
     # ---------------------------------------
-    # Network management Agent
+    # Network management Agent, on the MIB of this node
+    # bindings = list of (opt, oid, value)
+    # returns one [FLAG, VALUE/CODE] per binding
     # ---------------------------------------
-    def agent(self, opt, oid, value):
-        # FLAG/VALUE&CODE
-        self.message = []
-        # check oid valid
-        if oid in self.mib:
-            # GET
-            if opt == 0:
-                message = [0, self.mib[oid]]
-            # SET
-            elif opt == 1:
-                self.mib[oid] = value
-                self.message = [1, 0]
-        else:
-            # wrong id
-            self.message = [1, 1]
-        # return result
-        return self.message
+    def agent(self, bindings):
+        return mib_agent(self.mib, bindings)
 
     # --------Management Response PKT UPward Passing--------
     # --MGMT_RESP Passing Format: TRACKNUM|VALUE--
@@ -1600,9 +3282,7 @@ class llsr_mac(gr.basic_block):
     # -------------------------------------------
     def mgmt_resp_retx(self, pdu_tuple):
         if len(self.nodes) > 0:
-            self.send_mgmt_resp_pkt(pdu_tuple,
-                                    self.pkt_cnt-1
-                                    if self.pkt_cnt != 0 else 255)
+            self.send_mgmt_resp_pkt(pdu_tuple, self.expected_ack)
 
     # -------------------------------------------
     # send a mgmt resp packet
@@ -1616,8 +3296,17 @@ class llsr_mac(gr.basic_block):
                                    " packet dropped (not connected)\n",
                                    self.addr)
             return
+        # no route toward the sink?
+        if self.arq_next_hop == NO_ADDR:
+            # yes! drop the packet
+            self.resps_no_route += 1
+            if self.debug_stderr:
+                self.debugPrinting(0, 0, "Node {0}: in send_mgmt_resp_radio():"
+                                   " packet dropped (no route)\n",
+                                   self.addr)
+            return
         # packet to self?
-        if self.addr == self.next_hop:
+        if self.addr == self.arq_next_hop:
             # no! drop the packet
             if self.debug_stderr:
                 self.debugPrinting(0, 0, "Node {0}: in send_mgmt_resp_radio():"
@@ -1625,7 +3314,7 @@ class llsr_mac(gr.basic_block):
                                    self.addr)
             return
         # yes! data packet header structure
-        data = [MGMT_RESP_PROTO, self.addr, self.next_hop, pkt_cnt]
+        data = [MGMT_RESP_PROTO, self.addr, self.arq_next_hop, pkt_cnt]
         # add payload
         payload = pdu_tuple[0]
         if payload is None:
@@ -1635,8 +3324,14 @@ class llsr_mac(gr.basic_block):
         elif not isinstance(payload, list):
             payload = list(payload)
         data += payload
+        # originated here? hash and sink after the first result, the
+        # additional results at the end
         if self.addr == data[MGMT_RESP_SRC]:
-            data += [self.addhash(data[MGMT_RESP_LENGTH:], self.secretkey)]
+            results = data[MGMT_RESP_HASH:]
+            data = data[:MGMT_RESP_HASH]
+            data += [self.addhash(results, self.secretkey)]
+            data += [pdu_tuple[1].get(META_SINK, SINK_ADDR)]
+            data += results
         # debug mode enabled?
         if self.debug_stderr:
             # yes! log the packet
@@ -1646,7 +3341,7 @@ class llsr_mac(gr.basic_block):
         # conversion to PMT PDU (meta data, data)
         pdu = self.pdupacker(data)
         # push to radio msg port
-        self.message_port_pub(pmt.intern('to_radio'), pdu)
+        self.message_port_pub(self.iface.port_out, pdu)
         # save current transmit time
         with self.lock:
             self.last_tx_time = time.time()
@@ -1656,7 +3351,7 @@ class llsr_mac(gr.basic_block):
     # -------------------------
     def print_mgmt_resp_pkt(self, pkt):
         # invalid mgmt packet length?
-        if len(pkt) != MGMT_RESP_LENGTH:
+        if len(pkt) < MGMT_RESP_LENGTH:
             # yes!
             self.debugPrinting(0, 0, "Node {0}: in print_mgmt_resp_pkt(): "
                                "mgmt resp packet invalid length! "
@@ -1667,18 +3362,23 @@ class llsr_mac(gr.basic_block):
                            "MGMT RESP PKT TO: {2} MGMT RESP PKT CNT: {3} "
                            "MGMT  RESP FLAG: {4} MGMT RESP SRC: {5} "
                            "MGMT RESP TRACK: {6} MGMT RESP VALUE {7}"
-                           "MGMT RESP HASH: {8} \n", pkt[PKT_PROT_ID],
+                           "MGMT RESP HASH: {8} MGMT RESP SINK: {9}\n",
+                           pkt[PKT_PROT_ID],
                            pkt[PKT_SRC], pkt[PKT_DEST], pkt[PKT_CNT],
                            pkt[MGMT_RESP_FLAG], pkt[MGMT_RESP_SRC],
                            pkt[MGMT_RESP_TRACK], pkt[MGMT_RESP_VAL],
-                           pkt[MGMT_RESP_HASH])
+                           pkt[MGMT_RESP_HASH], pkt[MGMT_RESP_SINK])
 
     # --------------------------------------
     # generate mgmt_resp pdu
+    # results = [FLAG, VALUE/CODE] of the additional bindings
     # --------------------------------------
-    def mgmt_resp_pdu(self, mgmtflag, mgmt_track, message):
+    def mgmt_resp_pdu(self, mgmtflag, mgmt_track, message, sink,
+                      results=()):
         data = [mgmtflag, self.addr, mgmt_track, message]
-        return self.pdupacker(data)
+        for r in results:
+            data += r
+        return self.pdupacker(data, {META_SINK: sink})
 
     # ---------------------------------------
     # Utility Functions
@@ -1709,9 +3409,9 @@ class llsr_mac(gr.basic_block):
     # -------------------------
     # PDU packing
     # -------------------------
-    def pdupacker(self, data):
+    def pdupacker(self, data, meta_dict=None):
         pdu = pmt.cons(
-                pmt.to_pmt({}),
+                pmt.to_pmt(meta_dict if meta_dict is not None else {}),
                 pmt.init_u8vector(len(data), data))
         return pdu
 
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Network management agent of a node.
+# A mgmt packet carries one binding (VALUE|DEST|OPT|OID), possibly
+# followed by additional ones (OPT|OID|VALUE each); the agent applies
+# them to the MIB of the node, a dict from OID to value.
+# ----------------------------------------------------------------------
+
+from constants import MGMT_BIND_LENGTH
+
+
+# ----------------------------------------------------------
+# bindings of a mgmt packet, list of (opt, oid, value)
+# first = VALUE|DEST|OPT|OID, binds = OPT|OID|VALUE...
+# ----------------------------------------------------------
+def mgmt_bindings(first, binds):
+    bindings = [(first[2], first[3], first[0])]
+    for k in range(0, len(binds) - MGMT_BIND_LENGTH + 1,
+                   MGMT_BIND_LENGTH):
+        bindings.append(tuple(binds[k:k+MGMT_BIND_LENGTH]))
+    return bindings
+
+
+# ---------------------------------------
+# Network management Agent
+# mib = dict from OID to value
+# bindings = list of (opt, oid, value)
+# returns one [FLAG, VALUE/CODE] per binding
+# ---------------------------------------
+def mib_agent(mib, bindings):
+    results = []
+    for opt, oid, value in bindings:
+        # check oid valid
+        if oid not in mib:
+            # wrong id
+            results.append([1, 1])
+        # GET
+        elif opt == 0:
+            results.append([0, mib[oid]])
+        # SET
+        elif opt == 1:
+            mib[oid] = value
+            results.append([1, 0])
+        else:
+            # wrong opt
+            results.append([1, 2])
+    # return result
+    return results
@@ -0,0 +1,394 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Management table of the sink (SNMP MIB).
+# One row per node, the column values are a cache of the node values.
+# SET and GET commands are queued as in-band mgmt messages, their
+# responses update the rows.
+# ----------------------------------------------------------------------
+
+import sys
+import time
+import struct
+import Queue
+from datetime import datetime
+from constants import (MGMT_BROADCAST, MGMT_RESP_BCAST, MGMT_RESP_VAL_LENGTH,
+                       MGMT_MAX_BINDINGS, MGMT_GET_TIMEOUT)
+
+
+# Monitoring Table for SINK
+# --------------------
+class MGMTTable(object):
+
+    def __init__(self, max_rows=0, ttl=0.0):
+        # nodes kept for management
+        self.MGMTTable = []
+        # row index of each node, key is the node address
+        self.rowIndex = {}
+        # rows of the deactivated nodes, re-used when the table is full
+        self.deactivatedRows = set()
+        # maximum number of rows, 0 for no limit
+        self.max_rows = max_rows
+        # dict for keeping the cmd
+        self.cmddict = {}
+        # broadcast cmds, key is the track number, value is
+        # [nodes yet to confirm, nodes confirmed]
+        self.broadcasts = {}
+        # track pack index
+        self.mgmttrackIndex = 0
+        self.oidRef = {'nodeAddr': 1,
+                       'maxAttempts': 2,
+                       'broadcastInterval': 3,
+                       'mgmtMode': 4}
+        # global Queue for putting MGMT CMD (byte lists, packed into
+        # PDUs by the MAC)
+        self.pktforsent = Queue.Queue()
+        # the column values are a cache of the node values, refreshed
+        # by in-band GETs once older than the time to live of their
+        # OID (0 for never refreshed)
+        self.oidTTL = dict((name, ttl) for name in self.oidRef
+                           if name != 'nodeAddr')
+        # time a value was last known, key is (node address, name)
+        self.fetchTime = {}
+        # GETs asked, key is (node address, name), value is the time
+        # asked, None while waiting to be sent
+        self.getPending = {}
+        # GETs waiting to be sent, key is the row index, value is the
+        # set of names
+        self.getRequests = {}
+        # cache statistics
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.getsSent = 0
+        self.getsCoalesced = 0
+
+    def getTableSize(self):
+        return len(self.MGMTTable)
+
+    def getColumn(self, idx, name):
+        if self.MGMTTable[idx]['mgmtInfo'] != 4:
+            # served from the cache, refreshed when stale
+            if self.oidTTL.get(name, 0) > 0:
+                self._refreshColumn(idx, name)
+            return self.MGMTTable[idx][name]
+        else:
+            return None
+
+    # time to live of the cached values of OID "name", 0 for never
+    # refreshed
+    def setTTL(self, name, ttl):
+        if name in self.oidTTL:
+            self.oidTTL[name] = ttl
+
+    # ask for column "name" of row "idx" with an in-band GET if the
+    # cached value is stale, coalesced with the GETs already asked
+    def _refreshColumn(self, idx, name):
+        key = (self.MGMTTable[idx]['nodeAddr'], name)
+        now = time.time()
+        fetched = self.fetchTime.get(key)
+        if fetched is not None and now - fetched <= self.oidTTL[name]:
+            self.cacheHits += 1
+            return
+        self.cacheMisses += 1
+        # GET already asked and not timed out?
+        if key in self.getPending:
+            asked = self.getPending[key]
+            if asked is None or now - asked <= MGMT_GET_TIMEOUT:
+                self.getsCoalesced += 1
+                return
+        self.getPending[key] = None
+        self.getRequests.setdefault(idx % len(self.MGMTTable),
+                                    set()).add(name)
+
+    # generate the cmd msgs of the GETs asked, one msg per node
+    # VALUE DEST OPT OID, then OPT OID VALUE per additional column
+    def flushGets(self):
+        for idx, names in self.getRequests.items():
+            destNode = self.MGMTTable[idx]['nodeAddr']
+            names = sorted(names)
+            for k in range(0, len(names), MGMT_MAX_BINDINGS):
+                chunk = names[k:k+MGMT_MAX_BINDINGS]
+                mgmtmsg = [0, destNode, 0, self.oidRef.get(chunk[0])]
+                for n in chunk[1:]:
+                    mgmtmsg += [0, self.oidRef.get(n), 0]
+                # cmd stored for resp msg processing, marked as a
+                # cache refresh
+                storedcmd = [destNode, idx, chunk[0], 0,
+                             [(n, 0) for n in chunk[1:]], True]
+                self.cmddict.update({self.mgmttrackIndex: storedcmd})
+                self.pktforsent.put(mgmtmsg)
+                self.mgmttrackIndex = (self.mgmttrackIndex + 1) % 256
+                self.getsSent += 1
+                for n in chunk:
+                    self.getPending[(destNode, n)] = time.time()
+        self.getRequests = {}
+
+    # cache statistics
+    # returns (hits, misses, GETs sent, GETs coalesced)
+    def getCacheStats(self):
+        return (self.cacheHits, self.cacheMisses, self.getsSent,
+                self.getsCoalesced)
+
+    # cache hit rate, None before the first read
+    def getCacheHitRate(self):
+        reads = self.cacheHits + self.cacheMisses
+        if reads == 0:
+            return None
+        return float(self.cacheHits) / reads
+
+    # generate cmd msg for in-band management VALUE DEST OPT OID
+    def setColumn(self, idx, name, value):
+        self.setColumns(idx, [(name, value)])
+
+    # generate cmd msgs setting several columns of a row, items is a
+    # list of (name, value) pairs, up to MGMT_MAX_BINDINGS per msg
+    # VALUE DEST OPT OID, then OPT OID VALUE per additional column
+    def setColumns(self, idx, items):
+        # mgmt info :
+        # 0 node alive, 1 request send
+        # 2 item updated 3 mgmtError 4 node deactivated
+        # check the status of this node if it is alive
+        if self.MGMTTable[idx]['mgmtInfo'] != 4:
+            # set mgmtInfo to be create and go
+            self.MGMTTable[idx]['mgmtInfo'] = 1
+            destNode = self.MGMTTable[idx]['nodeAddr']
+            for k in range(0, len(items), MGMT_MAX_BINDINGS):
+                chunk = items[k:k+MGMT_MAX_BINDINGS]
+                name, value = chunk[0]
+                mgmtmsg = [value, destNode, 1, self.oidRef.get(name)]
+                for n, v in chunk[1:]:
+                    mgmtmsg += [1, self.oidRef.get(n), v]
+                # cmd stored for resp msg processing
+                storedcmd = [destNode, idx, name, value, chunk[1:]]
+                # putting into the cmd dict
+                self.cmddict.update({self.mgmttrackIndex: storedcmd})
+                # putting msg into queue ready for sent
+                self.pktforsent.put(mgmtmsg)
+                # check and reset the mgmttrackIndex
+                self.mgmttrackIndex = (self.mgmttrackIndex + 1) % 256
+        else:
+            sys.stderr.write("SET failed, SNMP MGMT Node %d is deactivated:\n"
+                             % self.MGMTTable[idx]['nodeAddr'])
+
+    # generate broadcast cmd msgs setting columns on every node, items
+    # is a list of (name, value) pairs, returns the track numbers
+    # VALUE BROADCAST OPT OID, then OPT OID VALUE per additional column
+    def setColumnsAll(self, items):
+        tracks = []
+        # active nodes, each one is expected to confirm
+        nodes = set()
+        for r in self.MGMTTable:
+            if r['mgmtInfo'] != 4:
+                r['mgmtInfo'] = 1
+                nodes.add(r['nodeAddr'])
+        for k in range(0, len(items), MGMT_MAX_BINDINGS):
+            chunk = items[k:k+MGMT_MAX_BINDINGS]
+            name, value = chunk[0]
+            mgmtmsg = [value, MGMT_BROADCAST, 1, self.oidRef.get(name)]
+            for n, v in chunk[1:]:
+                mgmtmsg += [1, self.oidRef.get(n), v]
+            storedcmd = [MGMT_BROADCAST, None, name, value, chunk[1:]]
+            self.cmddict.update({self.mgmttrackIndex: storedcmd})
+            self.broadcasts[self.mgmttrackIndex] = [set(nodes), set()]
+            tracks.append(self.mgmttrackIndex)
+            self.pktforsent.put(mgmtmsg)
+            self.mgmttrackIndex = (self.mgmttrackIndex + 1) % 256
+        return tracks
+
+    def setColumnAll(self, name, value):
+        return self.setColumnsAll([(name, value)])
+
+    # confirmation of broadcast cmd "track"
+    # returns (nodes confirmed, nodes yet to confirm), None if unknown
+    def getBroadcastStatus(self, track):
+        if track not in self.broadcasts:
+            return None
+        pending, confirmed = self.broadcasts[track]
+        return (sorted(confirmed), sorted(pending))
+
+    # processing RESP MSG from In-Band
+    # FLAG, PKT_SOURCE, TRACK NUMBER, CODE/VALUE,
+    # then FLAG, CODE/VALUE per additional column
+    def processingColumn(self, respmsg):
+        flag = respmsg[0]
+        pktsrc = respmsg[1]
+        tracknumber = respmsg[2]
+        val = respmsg[3]
+        # check if the cmd registered in the genereated cmd history
+        if tracknumber in self.cmddict.keys():
+            # retrive the cmd
+            cmd = self.cmddict.get(tracknumber)
+            # broadcast cmd? acks aggregated by the nodes, ADDR CODE
+            if cmd[0] == MGMT_BROADCAST:
+                if flag == MGMT_RESP_BCAST:
+                    acks = respmsg[4:4+val*MGMT_RESP_VAL_LENGTH]
+                else:
+                    acks = [pktsrc, val if flag == 1 else 0]
+                self._processingBroadcast(tracknumber, cmd, acks)
+            # check if in cmd dest node and pkt source node is the same
+            elif self.MGMTTable[cmd[1]]['nodeAddr'] == pktsrc:
+                refresh = len(cmd) > 5 and cmd[5]
+                self._processingResult(cmd[1], cmd[2], cmd[3], flag, val,
+                                       refresh)
+                # additional columns
+                extra = cmd[4] if len(cmd) > 4 else []
+                for k, (name, value) in enumerate(extra):
+                    pos = 4 + k*MGMT_RESP_VAL_LENGTH
+                    if pos + 1 < len(respmsg):
+                        self._processingResult(cmd[1], name, value,
+                                               respmsg[pos], respmsg[pos+1],
+                                               refresh)
+            else:
+                sys.stderr.write("wrong id matching in the MGMTTable nodeAddr:"
+                                 "% d pktsrc: % d" %
+                                 (self.MGMTTable[cmd[1]]['nodeAddr'],
+                                  pktsrc))
+        else:
+            sys.stderr.write("track number %d is "
+                             "not existed in the cmd dict \n")
+
+    # acks of broadcast cmd "track", ADDR CODE per node
+    def _processingBroadcast(self, track, cmd, acks):
+        status = self.broadcasts.get(track)
+        for k in range(0, len(acks) - 1, MGMT_RESP_VAL_LENGTH):
+            addr, code = acks[k], acks[k+1]
+            idx = self._checkNode(addr)
+            if idx != -1:
+                for name, value in [(cmd[2], cmd[3])] + cmd[4]:
+                    self._processingResult(idx, name, value, 1, code)
+            if status is not None:
+                status[0].discard(addr)
+                status[1].add(addr)
+
+    # result of a cmd on column "name" of row "idx", "refresh" is True
+    # for the GETs refreshing the cache
+    def _processingResult(self, idx, name, value, flag, val,
+                          refresh=False):
+        # GET answered, value known now (unless an error)
+        key = (self.MGMTTable[idx]['nodeAddr'], name)
+        self.getPending.pop(key, None)
+        if flag == 0 or (flag == 1 and val == 0):
+            self.fetchTime[key] = time.time()
+        # cache refresh? only the value is updated, the row status
+        # (e.g. a pending SET or an error) is kept
+        if refresh:
+            if flag == 0:
+                self.MGMTTable[idx][name] = val
+            return
+        #  check the return msg flag and set opt success
+        if flag == 1 and val == 0:
+            self.MGMTTable[idx][name] = value
+            # mgmt info :
+            # 0 node alive, 1 request send,
+            # 2 item updated 3 mgmtError 4 node deactivated
+            self.MGMTTable[idx]['mgmtInfo'] = 2
+            self.MGMTTable[idx]['lastUpdated'] = name
+            self.MGMTTable[idx]['lastUpdatedTime'] = self._utcTime()
+        # mgmt opt failed
+        elif flag == 1 and val != 0:
+            # mgmt info shows error
+            self.MGMTTable[idx]['mgmtInfo'] = 3
+            self.MGMTTable[idx][name] = val
+            self.MGMTTable[idx]['lastUpdatedTime'] = self._utcTime()
+            self.MGMTTable[idx]['lastUpdated'] = name
+        # opt get value back
+        elif flag == 0:
+            self.MGMTTable[idx]['mgmtInfo'] = 2
+            self.MGMTTable[idx][name] = val
+            self.MGMTTable[idx]['lastUpdated'] = name
+            self.MGMTTable[idx]['lastUpdatedTime'] = self._utcTime()
+        else:
+            sys.stderr.write("SNMP manager received wrong "
+                             "flag in response message!\n")
+
+    # add row
+    def addRow(self, row):
+        flag = self._checkNode(row['nodeAddr'])
+        # node new?
+        if flag == -1:
+            # table full?
+            if self.max_rows > 0 and len(self.MGMTTable) >= self.max_rows:
+                # re-use the row of a deactivated node
+                # (a late response may have re-activated a row)
+                while self.deactivatedRows:
+                    i = min(self.deactivatedRows)
+                    self.deactivatedRows.discard(i)
+                    r = self.MGMTTable[i]
+                    if r['mgmtInfo'] != 4:
+                        continue
+                    sys.stderr.write("SNMP MGMT Node %d replaced by "
+                                     "Node %d:\n" % (r['nodeAddr'],
+                                                     row['nodeAddr']))
+                    del self.rowIndex[r['nodeAddr']]
+                    self.MGMTTable[i] = row
+                    self.rowIndex[row['nodeAddr']] = i
+                    return
+                sys.stderr.write("SNMP MGMT Node %d not added, "
+                                 "table full:\n" % row['nodeAddr'])
+                return
+            self.rowIndex[row['nodeAddr']] = len(self.MGMTTable)
+            self.MGMTTable.append(row)
+            sys.stderr.write("SNMP MGMT Node %d added:\n" % row['nodeAddr'])
+        # not new
+        else:
+            # mgmt info shows the node is not activated
+            if self.MGMTTable[flag]['mgmtInfo'] == 4:
+                # switch back to activated
+                self.MGMTTable[flag]['mgmtInfo'] = 0
+                self.deactivatedRows.discard(flag)
+                sys.stderr.write("SNMP MGMT Node %d "
+                                 "activated:\n" % row['nodeAddr'])
+            else:
+                sys.stderr.write("SNMP MGMT Node %d is "
+                                 "already activated:\n" % row['nodeAddr'])
+
+    # deactivated
+    def deactivateNode(self, addr):
+        idx = self._checkNode(addr)
+        if idx != -1:
+            if self.MGMTTable[idx]['mgmtInfo'] != 4:
+                self.MGMTTable[idx]['mgmtInfo'] = 4
+                self.deactivatedRows.add(idx)
+                sys.stderr.write("SNMP MGMT Node %d deactivated:\n" % addr)
+            else:
+                sys.stderr.write("SNMP MGMT Node %d deactivated failed "
+                                 "it is already deactivated:\n" % addr)
+        else:
+            sys.stderr.write("SNMP MGMT Node %d not existed:\n" % addr)
+
+    # ------------------------------
+    # check node
+    # ------------------------------
+    def _checkNode(self, addr):
+        return self.rowIndex.get(addr, -1)
+
+    # ------------------------------
+    # UTC Time for SNMP
+    # ------------------------------
+    def _utcTime(self):
+        temp = datetime.utcnow().strftime("%Y,%m,%d,%H,%M,%S,%f")
+        temp = temp[: -5].split(',')
+        timestr = map(int, temp)
+        final = struct.pack('>HBBBBBB', *timestr)
+        return final
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Columnar neighbor table.
+# Addresses are one byte long, hence every possible neighbor has a fixed
+# slot in a set of NumPy columns. A neighbor costs a few bytes per column
+# instead of a Python object with its own __dict__, and routing decisions
+# (expiry, next hop selection) are single vectorized operations.
+# ----------------------------------------------------------------------
+
+import numpy
+from constants import EVICT_WORST_LINK, EVICT_HIGHEST_HC
+
+# number of address slots (addresses are 8-bit)
+TABLE_SIZE = 256
+# lowest delivery ratio estimate, bounds the link ETX
+MIN_DELIVERY_RATIO = 0.05
+# columns saved in a snapshot of the table
+SNAPSHOT_COLUMNS = ('last_heard', 'hc', 'pq', 'lpn', 'pcost', 'dr',
+                    'last_beacon', 'last_frame', 'beacon_cnt', 'frame_cnt',
+                    'parent', 'epoch', 'load', 'sink')
+
+
+# ------------------------------------------
+# accessor for one column of a neighbor slot
+# ------------------------------------------
+def _column(name):
+    def getter(self):
+        return getattr(self._table, name)[self._slot].item()
+
+    def setter(self, value):
+        getattr(self._table, name)[self._slot] = value
+    return property(getter, setter)
+
+
+# Neighbor node information, view on one slot of a NeighborTable
+# ---------------------------------------------------------------
+class NodeView(object):
+    __slots__ = ('_table', '_slot')
+
+    def __init__(self, table, slot):
+        self._table = table
+        self._slot = slot
+
+    # last time a beacon received
+    last_heard = _column('last_heard')
+    # hop count
+    hc = _column('hc')
+    # path quality
+    pq = _column('pq')
+    # last packet number
+    lpn = _column('lpn')
+    # advertised path cost
+    pcost = _column('pcost')
+    # delivery ratio estimate of the link
+    dr = _column('dr')
+    # advertised parent (next hop)
+    parent = _column('parent')
+    # advertised route epoch, -1 if unknown
+    epoch = _column('epoch')
+    # advertised forwarding load
+    load = _column('load')
+    # sink the neighbor routes to, -1 if unknown
+    sink = _column('sink')
+
+    def update(self, time, hc, pq):
+        self.last_heard = time
+        self.hc = hc
+        self.pq = pq
+
+    def setLpn(self, lpn):
+        # set last packet number
+        self.lpn = lpn
+
+
+# Neighbor table, one NumPy column per neighbor attribute
+# -------------------------------------------------------
+class NeighborTable(object):
+
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        # slot in use
+        self.present = numpy.zeros(size, dtype=numpy.bool_)
+        # last time a beacon received
+        self.last_heard = numpy.zeros(size, dtype=numpy.float64)
+        # hop count
+        self.hc = numpy.full(size, 255, dtype=numpy.int16)
+        # path quality
+        self.pq = numpy.zeros(size, dtype=numpy.int16)
+        # last packet number
+        self.lpn = numpy.full(size, -1, dtype=numpy.int16)
+        # advertised path cost (ETX to the sink, scaled)
+        self.pcost = numpy.zeros(size, dtype=numpy.int32)
+        # delivery ratio estimate of the link, from ARQ outcomes
+        self.dr = numpy.ones(size, dtype=numpy.float32)
+        # last time a beacon, respectively another frame, received
+        self.last_beacon = numpy.zeros(size, dtype=numpy.float64)
+        self.last_frame = numpy.zeros(size, dtype=numpy.float64)
+        # number of beacons, respectively other frames, received
+        self.beacon_cnt = numpy.zeros(size, dtype=numpy.uint32)
+        self.frame_cnt = numpy.zeros(size, dtype=numpy.uint32)
+        # advertised parent (next hop)
+        self.parent = numpy.full(size, -1, dtype=numpy.int16)
+        # advertised route epoch, -1 if unknown
+        self.epoch = numpy.full(size, -1, dtype=numpy.int16)
+        # advertised forwarding load (queue length plus recently
+        # forwarded packets)
+        self.load = numpy.zeros(size, dtype=numpy.int16)
+        # sink the neighbor routes to, -1 if unknown
+        self.sink = numpy.full(size, -1, dtype=numpy.int16)
+
+    def __len__(self):
+        return int(numpy.count_nonzero(self.present))
+
+    def __contains__(self, addr):
+        return 0 <= addr < self.size and bool(self.present[addr])
+
+    def __getitem__(self, addr):
+        if addr not in self:
+            raise KeyError(addr)
+        return NodeView(self, addr)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return numpy.flatnonzero(self.present).tolist()
+
+    # ------------------------------
+    # create (or reset) a neighbor
+    # ------------------------------
+    def add(self, addr, time, hc, pq):
+        self.present[addr] = True
+        self.last_heard[addr] = time
+        self.hc[addr] = hc
+        self.pq[addr] = pq
+        self.lpn[addr] = -1
+        self.pcost[addr] = 0
+        self.dr[addr] = 1.0
+        self.last_beacon[addr] = 0.0
+        self.last_frame[addr] = 0.0
+        self.beacon_cnt[addr] = 0
+        self.frame_cnt[addr] = 0
+        self.parent[addr] = -1
+        self.epoch[addr] = -1
+        self.load[addr] = 0
+        self.sink[addr] = -1
+        return NodeView(self, addr)
+
+    def pop(self, addr, default=None):
+        if addr not in self:
+            return default
+        self.present[addr] = False
+        return addr
+
+    # ------------------------------------------------------
+    # a frame is received from neighbor "addr", refresh its
+    # liveness; beacon = True for a beacon frame
+    # ------------------------------------------------------
+    def heard(self, addr, time, beacon):
+        if addr not in self:
+            return
+        self.last_heard[addr] = time
+        if beacon:
+            self.last_beacon[addr] = time
+            self.beacon_cnt[addr] += 1
+        else:
+            self.last_frame[addr] = time
+            self.frame_cnt[addr] += 1
+
+    # ------------------------------------------------
+    # remove neighbors not heard since time "deadline"
+    # returns the list of removed addresses
+    # ------------------------------------------------
+    def expire(self, deadline):
+        stale = self.present & (self.last_heard < deadline)
+        self.present[stale] = False
+        return numpy.flatnonzero(stale).tolist()
+
+    # -------------------------------------------------------------
+    # neighbors with minimum hop count, and among those the maximum
+    # path quality. returns (min hc, max pq, list of addresses)
+    # mask = neighbors eligible as next hops, default all
+    # -------------------------------------------------------------
+    def best_hops(self, mask=None):
+        cand = self.present if mask is None else self.present & mask
+        if not cand.any():
+            return (255, 0, [])
+        hc = numpy.where(cand, self.hc, numpy.iinfo(numpy.int16).max)
+        min_hc = hc.min()
+        min_nodes = hc == min_hc
+        max_pq = self.pq[min_nodes].max()
+        max_nodes = min_nodes & (self.pq == max_pq)
+        return (int(min_hc), int(max_pq),
+                numpy.flatnonzero(max_nodes).tolist())
+
+    # --------------------------------------------------------
+    # record the outcome of a transmission attempt to neighbor
+    # "addr" in its delivery ratio estimate (moving average)
+    # --------------------------------------------------------
+    def record_tx(self, addr, success, alpha):
+        if addr in self:
+            self.dr[addr] = alpha*self.dr[addr] + (1.0-alpha)*float(success)
+
+    # ----------------------------------------------
+    # expected transmission count of the link, scaled
+    # ----------------------------------------------
+    def link_etx(self, scale):
+        return numpy.rint(
+            scale / numpy.maximum(self.dr, MIN_DELIVERY_RATIO)).astype(
+                numpy.int32)
+
+    # ----------------------------------------------------------------
+    # path cost through each neighbor: advertised cost plus link ETX,
+    # "infinity" for the absent, the disconnected and the not eligible
+    # (not in mask) neighbors
+    # load_weight = path cost units added per unit of advertised load
+    # link_factor = relative airtime of a transmission on the link
+    # ----------------------------------------------------------------
+    def path_costs(self, scale, infinity, mask=None, load_weight=0.0,
+                   link_factor=1.0):
+        etx = self.link_etx(scale)
+        if link_factor != 1.0:
+            etx = numpy.rint(etx*link_factor).astype(numpy.int32)
+        cost = self.pcost + etx
+        if load_weight > 0:
+            cost = cost + numpy.rint(load_weight*self.load).astype(
+                numpy.int32)
+        cost = numpy.minimum(cost, infinity)
+        cand = self.present & (self.pcost < infinity)
+        if mask is not None:
+            cand &= mask
+        return numpy.where(cand, cost, infinity)
+
+    # ------------------------------------------------------------
+    # neighbors with the minimum path cost
+    # returns (min cost, list of addresses), no address when none
+    # of the neighbors is connected
+    # ------------------------------------------------------------
+    def best_costs(self, scale, infinity, mask=None, load_weight=0.0,
+                   link_factor=1.0):
+        cost = self.path_costs(scale, infinity, mask, load_weight,
+                               link_factor)
+        min_cost = cost.min()
+        if min_cost >= infinity:
+            return (infinity, [])
+        return (int(min_cost), numpy.flatnonzero(cost == min_cost).tolist())
+
+    # ---------------------------------------------------------------
+    # neighbor to evict according to "policy", never one of "pinned"
+    # returns None when all the neighbors are pinned
+    # ---------------------------------------------------------------
+    def victim(self, policy, pinned):
+        cand = self.present.copy()
+        cand[[k for k in pinned if 0 <= k < self.size]] = False
+        if not cand.any():
+            return None
+        if policy == EVICT_WORST_LINK:
+            key = self.dr.astype(numpy.float64)
+        elif policy == EVICT_HIGHEST_HC:
+            key = -self.hc.astype(numpy.float64)
+        else:
+            key = self.last_heard
+        # ties broken by the least recently heard
+        order = numpy.lexsort((self.last_heard, numpy.where(cand, key,
+                                                            numpy.inf)))
+        return int(order[0])
+
+    # --------------------------------------------------------
+    # order "addrs" by increasing advertised load, "first" kept
+    # first unless another one is less loaded by more than
+    # "margin"; ties keep the original order
+    # --------------------------------------------------------
+    def least_loaded(self, addrs, first, margin):
+        order = sorted(addrs, key=lambda k: self.load[k])
+        if (first in addrs and
+                self.load[first] - self.load[order[0]] <= margin):
+            order.remove(first)
+            order.insert(0, first)
+        return order
+
+    # --------------------------------------------------------
+    # snapshot of the table, as JSON serializable data
+    # returns {address: {column name: value}}
+    # --------------------------------------------------------
+    def snapshot(self):
+        return dict((str(k), dict((c, getattr(self, c)[k].item())
+                                  for c in SNAPSHOT_COLUMNS))
+                    for k in self.keys())
+
+    # ----------------------------------------------------------
+    # restore the neighbors of a snapshot heard since "deadline"
+    # returns the list of restored addresses
+    # ----------------------------------------------------------
+    def restore(self, snapshot, deadline):
+        restored = []
+        for k, row in snapshot.items():
+            addr = int(k)
+            if (not 0 <= addr < self.size or
+                    row.get('last_heard', 0.0) < deadline):
+                continue
+            self.add(addr, row['last_heard'], row['hc'], row['pq'])
+            for c in SNAPSHOT_COLUMNS:
+                if c in row:
+                    getattr(self, c)[addr] = row[c]
+            restored.append(addr)
+        return restored
+
+    # -------------------------------------------------------------
+    # neighbors that are loop-free next hops for node "addr": their
+    # parent is not "addr" (poison reverse) and they advertise a
+    # route epoch at most "window" behind "epoch" (a scalar, or one
+    # reference epoch per neighbor)
+    # -------------------------------------------------------------
+    def loop_free(self, addr, epoch, window):
+        lag = (epoch - self.epoch) % 256
+        return ((self.parent != addr) & (self.epoch >= 0) &
+                ((lag <= window) | (lag >= 128)))
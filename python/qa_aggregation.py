@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+#
+
+from gnuradio import gr_unittest
+from constants import ARQ, CTRL_AGG, CTRL_E2E, AGG_MIN, AGG_MAX_LENGTH
+from aggregation import Aggregator, agg_split
+
+# header of an aggregate packet
+HEADER = [1, 2, 3, 0, CTRL_AGG]
+
+
+class qa_aggregation(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.agg = Aggregator()
+
+    def tearDown(self):
+        self.agg = None
+
+    def test_001_round_trip(self):
+        records = [(4, CTRL_E2E, [4, 0, 1, 10, 11]), (5, 0, []),
+                   (6, 0, range(20))]
+        for origin, flags, payload in records:
+            self.assertEqual(self.agg.add(origin, flags, payload, False),
+                             [])
+        self.assertEqual(len(self.agg), 3*AGG_MIN + 25)
+        flags, origin, payload, arq = self.agg.flush()
+        self.assertEqual((flags, origin, arq), (CTRL_AGG, None, False))
+        self.assertEqual(agg_split(HEADER + payload), records)
+        # nothing left
+        self.assertEqual(len(self.agg), 0)
+        self.assertEqual(self.agg.flush(), None)
+        self.assertEqual((self.agg.record_cnt, self.agg.frame_cnt), (3, 1))
+
+    def test_002_truncated_record(self):
+        self.agg.add(4, 0, [1, 2, 3], False)
+        self.agg.add(5, 0, [4, 5, 6], False)
+        payload = self.agg.flush()[2]
+        # the truncated record ends the list
+        self.assertEqual(agg_split(HEADER + payload[:-1]),
+                         [(4, 0, [1, 2, 3])])
+        self.assertEqual(agg_split(HEADER + payload[:AGG_MIN + 3 + 2]),
+                         [(4, 0, [1, 2, 3])])
+        self.assertEqual(agg_split(HEADER), [])
+
+    def test_003_overflow(self):
+        size = AGG_MAX_LENGTH // 2 - AGG_MIN
+        self.assertEqual(self.agg.add(4, 0, [4] * size, False), [])
+        self.assertEqual(self.agg.add(5, 0, [5] * size, ARQ), [])
+        self.assertEqual(len(self.agg), AGG_MAX_LENGTH)
+        # no room left, the full aggregate is sent first
+        packets = self.agg.add(6, 0, [6], False)
+        self.assertEqual(len(packets), 1)
+        flags, origin, payload, arq = packets[0]
+        self.assertEqual((flags, arq), (CTRL_AGG, True))
+        self.assertEqual(len(payload), AGG_MAX_LENGTH)
+        self.assertEqual([r[0] for r in agg_split(HEADER + payload)], [4, 5])
+        # the new record waits for the next aggregate
+        self.assertEqual(len(self.agg), AGG_MIN + 1)
+        self.assertEqual(self.agg.flush()[3], False)
+
+    def test_004_oversize_record(self):
+        self.agg.add(4, 0, [4], False)
+        payload = [7] * (AGG_MAX_LENGTH - AGG_MIN + 1)
+        # sent alone, with its own flags and origin
+        self.assertEqual(self.agg.add(7, CTRL_E2E, payload, ARQ),
+                         [(CTRL_E2E, 7, payload, ARQ)])
+        # the aggregate is not affected
+        self.assertEqual(self.agg.record_cnt, 1)
+        self.assertEqual(len(self.agg), AGG_MIN + 1)
+        # longest record held
+        agg = Aggregator()
+        self.assertEqual(agg.add(8, 0, [8] * (AGG_MAX_LENGTH - AGG_MIN),
+                                 False), [])
+        self.assertEqual(len(agg), AGG_MAX_LENGTH)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_aggregation, "qa_aggregation.xml")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+from gnuradio import gr_unittest
+from dedupe import DuplicateFilter, SEQ_MODULO
+
+
+class qa_dedupe(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.dedupe = DuplicateFilter(16)
+
+    def tearDown(self):
+        self.dedupe = None
+
+    def accept(self, seqs, origin=1):
+        return [self.dedupe.accept(origin, s) for s in seqs]
+
+    def test_001_duplicates(self):
+        self.assertEqual(self.accept([5, 6, 5, 7, 6, 8]),
+                         [True, True, False, True, False, True])
+        self.assertEqual(self.dedupe.stats()[:4], (4, 2, 0, 0))
+
+    def test_002_reordered_inside_window(self):
+        self.assertEqual(self.accept([10, 12, 11, 9, 12]),
+                         [True, True, True, True, False])
+
+    def test_003_older_than_window_dropped(self):
+        # 6 and 7 are older than the window once 200 is delivered
+        self.assertEqual(self.accept([5, 6, 5, 7, 200, 6, 7]),
+                         [True, True, False, True, True, False, False])
+        self.assertEqual(self.dedupe.stats()[:4], (4, 1, 2, 0))
+
+    def test_004_restart(self):
+        self.accept([1000, 1001])
+        # origin restarted: dropped until RESTART_COUNT consecutive
+        # packets older than the window, then delivered again
+        self.assertEqual(self.accept([0, 1, 2, 3, 2]),
+                         [False, False, True, True, False])
+        self.assertEqual(self.dedupe.stats()[3], 1)
+
+    def test_005_stale_count_reset(self):
+        self.accept([1000])
+        # an in-window packet in between, no restart
+        self.assertEqual(self.accept([0, 1, 999, 2, 3]),
+                         [False, False, True, False, False])
+        self.assertEqual(self.dedupe.stats()[3], 0)
+
+    def test_006_wrap_around(self):
+        self.assertEqual(self.accept([SEQ_MODULO - 2, SEQ_MODULO - 1, 0, 1,
+                                      SEQ_MODULO - 1]),
+                         [True, True, True, True, False])
+
+    def test_007_origins(self):
+        self.assertEqual([self.dedupe.accept(o, 5) for o in [1, 2, 1, 2]],
+                         [True, True, False, False])
+        self.assertEqual(self.dedupe.stats()[4], 2)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_dedupe, "qa_dedupe.xml")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+from gnuradio import gr_unittest
+from flow_stats import FlowStats, timestamp, SEQ_MODULO
+
+
+class qa_flow_stats(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.stats = FlowStats()
+
+    def tearDown(self):
+        self.stats = None
+
+    def test_001_loss_and_goodput(self):
+        # 1, 2 and 4 of 1..5 received, 5 bytes each over 4 seconds
+        for seq, t in [(1, 100.0), (2, 101.0), (4, 102.0), (5, 104.0)]:
+            self.stats.update(7, seq, None, 5, t)
+        flow = self.stats.snapshot()[7]
+        self.assertEqual(flow['received'], 4)
+        self.assertEqual(flow['expected'], 5)
+        self.assertAlmostEqual(flow['loss'], 0.2)
+        self.assertAlmostEqual(flow['goodput'], 5.0)
+        self.assertEqual(flow['reordered'], 0)
+
+    def test_002_reordered_and_wrap(self):
+        for seq in [SEQ_MODULO - 1, 1, 0, 2]:
+            self.stats.update(7, seq, None, 1, 100.0)
+        flow = self.stats.snapshot()[7]
+        self.assertEqual(flow['expected'], 4)
+        self.assertEqual(flow['reordered'], 1)
+
+    def test_003_latency(self):
+        t = 1000.0
+        for ms in [1, 3, 50]:
+            self.stats.update(7, None, timestamp(t - ms / 1000.0), 1, t)
+        lat = self.stats.snapshot()[7]['latency']
+        self.assertEqual(lat['count'], 3)
+        self.assertEqual(lat['min'], 1)
+        self.assertEqual(lat['max'], 50)
+        self.assertEqual(lat['histogram'], {1: 1, 4: 1, 64: 1})
+
+    def test_004_negative_latency(self):
+        # origin clock ahead of the sink clock
+        t = 1000.0
+        self.stats.update(7, None, timestamp(t + 0.02), 1, t)
+        self.stats.update(7, None, timestamp(t - 0.01), 1, t)
+        lat = self.stats.snapshot()[7]['latency']
+        self.assertEqual(lat['negative'], 1)
+        self.assertEqual(lat['count'], 1)
+        self.assertEqual(lat['max'], 10)
+
+    def test_005_unknown(self):
+        self.stats.update(7, None, None, 1, 100.0)
+        flow = self.stats.snapshot()[7]
+        self.assertEqual(flow['expected'], None)
+        self.assertEqual(flow['loss'], None)
+        self.assertEqual(flow['goodput'], None)
+        self.assertEqual(flow['latency']['mean'], None)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_flow_stats, "qa_flow_stats.xml")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+#
+
+from gnuradio import gr_unittest
+from mgmt_agent import mgmt_bindings, mib_agent
+
+
+class qa_mgmt_agent(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.mib = {1: 4, 2: 3, 3: 10, 4: 0}
+
+    def tearDown(self):
+        self.mib = None
+
+    def test_001_bindings(self):
+        # VALUE DEST OPT OID, then OPT OID VALUE
+        self.assertEqual(mgmt_bindings([7, 4, 1, 2], [0, 3, 0, 1, 4, 1]),
+                         [(1, 2, 7), (0, 3, 0), (1, 4, 1)])
+        # a truncated binding is ignored
+        self.assertEqual(mgmt_bindings([7, 4, 1, 2], [0, 3]), [(1, 2, 7)])
+
+    def test_002_multi_binding(self):
+        results = mib_agent(self.mib, mgmt_bindings([7, 4, 1, 2],
+                                                    [0, 3, 0, 1, 4, 1]))
+        # one result per binding: SET ok, GET value, SET ok
+        self.assertEqual(results, [[1, 0], [0, 10], [1, 0]])
+        self.assertEqual(self.mib, {1: 4, 2: 7, 3: 10, 4: 1})
+
+    def test_003_errors(self):
+        results = mib_agent(self.mib, [(0, 9, 0), (5, 2, 8), (0, 2, 0)])
+        # wrong OID, wrong operation, the other bindings still applied
+        self.assertEqual(results, [[1, 1], [1, 2], [0, 3]])
+        self.assertEqual(self.mib[2], 3)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_mgmt_agent, "qa_mgmt_agent.xml")
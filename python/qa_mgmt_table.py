@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+#
+
+import sys
+import StringIO
+from gnuradio import gr_unittest
+from constants import MGMT_BROADCAST, MGMT_RESP_BCAST, MGMT_MAX_BINDINGS
+from mgmt_table import MGMTTable
+
+
+def row(addr):
+    return {'nodeAddr': addr, 'maxAttempts': 3, 'broadcastInterval': 10,
+            'mgmtMode': 0, 'lastUpdated': 'nodeAddr',
+            'lastUpdatedTime': None, 'mgmtInfo': 0}
+
+
+class qa_mgmt_table(gr_unittest.TestCase):
+
+    def setUp(self):
+        # (the table logs to stderr)
+        self.stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        self.table = MGMTTable(0, 60.0)
+        for addr in (1, 5, 9):
+            self.table.addRow(row(addr))
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+        self.table = None
+
+    # cmd msgs queued for sending
+    def sent(self):
+        msgs = []
+        while self.table.pktforsent.qsize() != 0:
+            msgs.append(self.table.pktforsent.get())
+        return msgs
+
+    def test_001_cache_refresh(self):
+        # never fetched: a GET is asked, the cached value returned
+        self.assertEqual(self.table.getColumn(1, 'maxAttempts'), 3)
+        self.assertEqual(self.table.getColumn(1, 'mgmtMode'), 0)
+        # asked again before sent: coalesced
+        self.assertEqual(self.table.getColumn(1, 'maxAttempts'), 3)
+        self.assertEqual(self.table.getCacheStats(), (0, 3, 0, 1))
+        self.table.flushGets()
+        # one GET for both columns, VALUE DEST OPT OID, OPT OID VALUE
+        self.assertEqual(self.sent(), [[0, 5, 0, 2, 0, 4, 0]])
+        self.assertEqual(self.table.getCacheStats()[2], 1)
+        # response: FLAG SRC TRACK VALUE, FLAG VALUE
+        self.table.processingColumn([0, 5, 0, 7, 0, 1])
+        self.assertEqual(self.table.getColumn(1, 'maxAttempts'), 7)
+        self.assertEqual(self.table.getColumn(1, 'mgmtMode'), 1)
+        self.assertEqual(self.table.getCacheStats(), (2, 3, 1, 1))
+        self.assertEqual(self.table.getCacheHitRate(), 0.4)
+        self.table.flushGets()
+        self.assertEqual(self.sent(), [])
+
+    def test_002_refresh_keeps_status(self):
+        self.table.setColumn(2, 'broadcastInterval', 20)
+        self.assertEqual(self.sent(), [[20, 9, 1, 3]])
+        self.assertEqual(self.table.MGMTTable[2]['mgmtInfo'], 1)
+        self.table.getColumn(2, 'maxAttempts')
+        self.table.flushGets()
+        self.assertEqual(self.sent(), [[0, 9, 0, 2]])
+        # refresh answered first: value updated, SET still pending
+        self.table.processingColumn([0, 9, 1, 4])
+        self.assertEqual(self.table.MGMTTable[2]['maxAttempts'], 4)
+        self.assertEqual(self.table.MGMTTable[2]['mgmtInfo'], 1)
+        # SET confirmed
+        self.table.processingColumn([1, 9, 0, 0])
+        self.assertEqual(self.table.MGMTTable[2]['broadcastInterval'], 20)
+        self.assertEqual(self.table.MGMTTable[2]['mgmtInfo'], 2)
+
+    def test_003_no_ttl(self):
+        table = MGMTTable()
+        table.addRow(row(1))
+        self.assertEqual(table.getColumn(0, 'maxAttempts'), 3)
+        table.flushGets()
+        self.assertEqual(table.pktforsent.qsize(), 0)
+        self.assertEqual(table.getCacheHitRate(), None)
+
+    def test_004_deactivated(self):
+        self.table.deactivateNode(5)
+        self.assertEqual(self.table.getColumn(1, 'maxAttempts'), None)
+        self.table.flushGets()
+        self.assertEqual(self.sent(), [])
+
+    def test_005_broadcast_status(self):
+        self.table.deactivateNode(9)
+        tracks = self.table.setColumnAll('broadcastInterval', 30)
+        self.assertEqual(tracks, [0])
+        self.assertEqual(self.sent(), [[30, MGMT_BROADCAST, 1, 3]])
+        # deactivated nodes are not expected to confirm
+        self.assertEqual(self.table.getBroadcastStatus(0), ([], [1, 5]))
+        # acks aggregated by the nodes: FLAG SRC TRACK COUNT, ADDR CODE
+        self.table.processingColumn([MGMT_RESP_BCAST, 5, 0, 1, 5, 0])
+        self.assertEqual(self.table.getBroadcastStatus(0), ([5], [1]))
+        self.assertEqual(self.table.MGMTTable[1]['broadcastInterval'], 30)
+        self.assertEqual(self.table.MGMTTable[1]['mgmtInfo'], 2)
+        # ack of a single node, an error code
+        self.table.processingColumn([1, 1, 0, 3])
+        self.assertEqual(self.table.getBroadcastStatus(0), ([1, 5], []))
+        self.assertEqual(self.table.MGMTTable[0]['mgmtInfo'], 3)
+        self.assertEqual(self.table.getBroadcastStatus(1), None)
+
+    def test_006_broadcast_bindings(self):
+        items = [('maxAttempts', k) for k in range(MGMT_MAX_BINDINGS + 1)]
+        # one msg per MGMT_MAX_BINDINGS bindings
+        self.assertEqual(self.table.setColumnsAll(items), [0, 1])
+        msgs = self.sent()
+        self.assertEqual(len(msgs), 2)
+        self.assertEqual(len(msgs[0]), 4 + 3*(MGMT_MAX_BINDINGS - 1))
+        self.assertEqual(msgs[1], [MGMT_MAX_BINDINGS, MGMT_BROADCAST, 1, 2])
+        self.assertEqual(self.table.getBroadcastStatus(1), ([], [1, 5, 9]))
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_mgmt_table, "qa_mgmt_table.xml")
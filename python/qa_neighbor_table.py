@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+#
+
+import json
+import numpy
+from gnuradio import gr_unittest
+from neighbor_table import NeighborTable
+
+
+class qa_neighbor_table(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = NeighborTable()
+        # address: (last heard, hc, pq)
+        for addr, (t, hc, pq) in {3: (10.0, 2, 1), 7: (20.0, 1, 1),
+                                  9: (30.0, 1, 2), 12: (40.0, 1, 2),
+                                  200: (50.0, 3, 4)}.items():
+            self.nodes.add(addr, t, hc, pq)
+
+    def tearDown(self):
+        self.nodes = None
+
+    def test_001_best_hops(self):
+        # minimum hop count, then maximum path quality
+        self.assertEqual(self.nodes.best_hops(), (1, 2, [9, 12]))
+        self.nodes[9].hc = 2
+        self.assertEqual(self.nodes.best_hops(), (1, 2, [12]))
+
+    def test_002_best_hops_mask(self):
+        mask = numpy.ones(self.nodes.size, dtype=numpy.bool_)
+        mask[[7, 9, 12]] = False
+        self.assertEqual(self.nodes.best_hops(mask), (2, 1, [3]))
+        mask[:] = False
+        self.assertEqual(self.nodes.best_hops(mask), (255, 0, []))
+        self.assertEqual(NeighborTable().best_hops(), (255, 0, []))
+
+    def test_003_expire(self):
+        self.assertEqual(self.nodes.expire(25.0), [3, 7])
+        self.assertEqual(self.nodes.keys(), [9, 12, 200])
+        self.assertFalse(3 in self.nodes)
+        self.assertEqual(self.nodes.expire(25.0), [])
+        # a beacon keeps a neighbor alive
+        self.nodes.heard(9, 60.0, True)
+        self.assertEqual(self.nodes.expire(55.0), [12, 200])
+        self.assertEqual(len(self.nodes), 1)
+        self.assertEqual(self.nodes.best_hops(), (1, 2, [9]))
+
+    def test_004_snapshot(self):
+        self.nodes[9].pcost = 300
+        self.nodes[9].dr = 0.5
+        self.nodes[9].epoch = 7
+        self.nodes.heard(9, 35.0, False)
+        # saved as JSON
+        snapshot = json.loads(json.dumps(self.nodes.snapshot()))
+        nodes = NeighborTable()
+        self.assertEqual(sorted(nodes.restore(snapshot, 0.0)),
+                         [3, 7, 9, 12, 200])
+        self.assertEqual(nodes.best_hops(), (1, 2, [9, 12]))
+        n = nodes[9]
+        self.assertEqual((n.last_heard, n.pcost, n.dr, n.epoch),
+                         (35.0, 300, 0.5, 7))
+        self.assertEqual(nodes.frame_cnt[9], 1)
+
+    def test_005_snapshot_expiry(self):
+        snapshot = json.loads(json.dumps(self.nodes.snapshot()))
+        nodes = NeighborTable()
+        # neighbors not heard since the deadline are not restored
+        self.assertEqual(sorted(nodes.restore(snapshot, 25.0)), [9, 12, 200])
+        self.assertEqual(nodes.keys(), [9, 12, 200])
+        # address out of the table, missing columns
+        nodes = NeighborTable(size=100)
+        self.assertEqual(nodes.restore({'200': {'last_heard': 50.0,
+                                                'hc': 1, 'pq': 1},
+                                        '5': {'last_heard': 50.0,
+                                              'hc': 1, 'pq': 1}}, 0.0),
+                         [5])
+        self.assertEqual((nodes[5].lpn, nodes[5].epoch), (-1, -1))
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_neighbor_table, "qa_neighbor_table.xml")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import os
+import shutil
+import tempfile
+from gnuradio import gr_unittest
+from record_writer import RecordWriter
+
+
+class qa_record_writer(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'data.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def lines(self):
+        with open(self.filename) as f:
+            return f.read().splitlines()
+
+    def test_001_records(self):
+        writer = RecordWriter(self.filename)
+        writer.write([1, 2, 3])
+        writer.write_text("text\n")
+        writer.close()
+        lines = self.lines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("***START: "))
+        self.assertTrue(lines[1].endswith(" : 1 2 3"))
+        self.assertEqual(lines[2], "text")
+        self.assertEqual(writer.records, 1)
+
+    def test_002_flush_interval(self):
+        writer = RecordWriter(self.filename, flush_interval=3600.0)
+        writer.write([1])
+        # buffered, not flushed yet
+        self.assertEqual(len(self.lines()), 0)
+        writer.flush()
+        self.assertEqual(len(self.lines()), 2)
+        writer.close()
+
+    def test_003_closed(self):
+        writer = RecordWriter(self.filename)
+        writer.close()
+        # ignored once closed
+        writer.write([1])
+        writer.write_text("text\n")
+        writer.flush()
+        writer.close()
+        self.assertEqual(len(self.lines()), 1)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_record_writer, "qa_record_writer.xml")
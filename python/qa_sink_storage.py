@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import os
+import shutil
+import tempfile
+from gnuradio import gr_unittest
+from sink_storage import SinkStorage
+
+
+class qa_sink_storage(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def fill(self, storage, count):
+        for k in range(count):
+            self.assertTrue(storage.append(k % 3, k, 100.0 + k, [k] * 4))
+
+    def test_001_query(self):
+        storage = SinkStorage(self.dir)
+        self.fill(storage, 30)
+        storage.close()
+        records = storage.query(1, 104.0, 110.0)
+        self.assertEqual([r[0] for r in records], [4, 7, 10])
+        self.assertEqual(records[0], (4, 104.0, [4, 4, 4, 4]))
+        self.assertEqual(storage.query(5, 0.0, 200.0), [])
+        self.assertEqual(storage.stats(), (30, 0, 30, 0, 1, 3))
+
+    def test_002_segments_and_reopen(self):
+        storage = SinkStorage(self.dir, segment_size=64)
+        self.fill(storage, 30)
+        storage.close()
+        self.assertTrue(storage.stats()[4] > 1)
+        # index rebuilt from the segments, appends to a new segment
+        storage = SinkStorage(self.dir)
+        self.assertEqual(storage.append(2, 30, 130.0, [30]), True)
+        storage.close()
+        records = storage.query(2, 0.0, 200.0)
+        self.assertEqual([r[0] for r in records], range(2, 30, 3) + [30])
+
+    def test_003_truncated_record(self):
+        storage = SinkStorage(self.dir)
+        self.fill(storage, 3)
+        storage.close()
+        # interrupted write
+        name = os.path.join(self.dir, sorted(os.listdir(self.dir))[-1])
+        with open(name, 'ab') as f:
+            f.write('\x01\x00')
+        storage = SinkStorage(self.dir)
+        storage.close()
+        self.assertEqual(len(storage.query(1, 0.0, 200.0)), 1)
+
+    def test_004_time_going_back(self):
+        storage = SinkStorage(self.dir)
+        storage.append(1, 1, 105.0, [1])
+        storage.append(1, 2, 103.0, [2])
+        storage.close()
+        self.assertEqual([r[0] for r in storage.query(1, 100.0, 110.0)],
+                         [2, 1])
+
+    def test_005_write_errors(self):
+        storage = SinkStorage(self.dir, segment_size=1)
+        # the next segments cannot be created
+        shutil.rmtree(self.dir)
+        self.fill(storage, 3)
+        storage.close()
+        self.assertEqual(storage.stats()[:4], (3, 0, 1, 2))
+
+    def test_006_append_after_close(self):
+        storage = SinkStorage(self.dir)
+        self.fill(storage, 3)
+        storage.close()
+        self.assertFalse(storage.append(1, 3, 103.0, [3]))
+        self.assertEqual(storage.stats()[:4], (3, 1, 3, 0))
+        self.assertEqual(len(storage.query(1, 0.0, 200.0)), 1)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_sink_storage, "qa_sink_storage.xml")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+from gnuradio import gr_unittest
+from constants import NO_ADDR
+from topology import TopologyDB
+
+
+class qa_topology(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.db = TopologyDB(0)
+        # 0 <- 1 <- 2 <- 3, 0 <- 4
+        self.db.report(1, 0, 1, [0, 2], 10.0)
+        self.db.report(2, 1, 2, [1, 3], 10.0)
+        self.db.report(3, 2, 3, [2], 10.0)
+        self.db.report(4, 0, 1, [0], 10.0)
+
+    def tearDown(self):
+        self.db = None
+
+    def test_001_tree(self):
+        self.assertEqual(len(self.db), 5)
+        self.assertEqual(self.db.path(3), [0, 1, 2, 3])
+        self.assertEqual(self.db.depth(3), 3)
+        self.assertEqual(self.db.subtree_size(0), 5)
+        self.assertEqual(self.db.subtree_size(1), 3)
+        self.assertEqual(self.db.children(0), [1, 4])
+        self.assertEqual(self.db.neighbors(2), [1, 3])
+        self.assertEqual(self.db.depth_histogram(), {0: 1, 1: 2, 2: 1, 3: 1})
+
+    def test_002_parent_change(self):
+        # subtree of 2 moves under 4
+        self.assertTrue(self.db.report(2, 4, 2, [4, 3], 11.0))
+        self.assertEqual(self.db.path(3), [0, 4, 2, 3])
+        self.assertEqual(self.db.subtree_size(1), 1)
+        self.assertEqual(self.db.subtree_size(4), 3)
+        self.assertEqual(self.db.depth_histogram(), {0: 1, 1: 2, 2: 1, 3: 1})
+
+    def test_003_loop_refused(self):
+        # 1 cannot attach under its own descendant 3
+        self.assertFalse(self.db.report(1, 3, 4, [3], 11.0))
+        self.assertEqual(self.db.path(3), None)
+        self.assertEqual(self.db.depth(1), None)
+        self.assertEqual(self.db.depth_histogram(), {0: 1, 1: 1})
+
+    def test_004_detached(self):
+        self.assertFalse(self.db.report(2, NO_ADDR, 255, [], 11.0))
+        self.assertEqual(self.db.path(3), None)
+        self.assertEqual(self.db.subtree_size(1), 1)
+        self.assertEqual(self.db.subtree_size(2), 2)
+
+    def test_005_expire(self):
+        self.db.report(1, 0, 1, [0, 2], 20.0)
+        self.db.report(4, 0, 1, [0], 20.0)
+        self.assertEqual(sorted(self.db.expire(15.0)), [2, 3])
+        self.assertEqual(len(self.db), 3)
+        self.assertEqual(self.db.subtree_size(0), 3)
+        self.assertEqual(self.db.depth_histogram(), {0: 1, 1: 2})
+
+    def test_006_unknown_parent(self):
+        # the parent is known before it reports
+        self.assertTrue(self.db.report(6, 5, 3, [5], 10.0))
+        self.assertEqual(self.db.path(6), None)
+        self.db.report(5, 4, 2, [4, 6], 10.0)
+        self.assertEqual(self.db.path(6), [0, 4, 5, 6])
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_topology, "qa_topology.xml")
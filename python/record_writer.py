@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Record writer of the delivered frames.
+# A frame is formatted as one text line and written in a single call to
+# a buffered file. The file is flushed at most every "flush_interval"
+# seconds, not after every frame.
+# ----------------------------------------------------------------------
+
+import io
+import time
+import threading
+
+# size of the file buffer, bytes
+BUFFER_SIZE = 64*1024
+# maximum time between two flushes, seconds
+FLUSH_INTERVAL = 1.0
+
+
+# Record writer, one line per frame
+# ---------------------------------
+class RecordWriter(object):
+
+    def __init__(self, filename, flush_interval=FLUSH_INTERVAL,
+                 buffer_size=BUFFER_SIZE):
+        self.lock = threading.Lock()
+        self.file = io.open(filename, 'wb', buffer_size)
+        self.flush_interval = flush_interval
+        self.last_flush = time.time()
+        # number of records written
+        self.records = 0
+        self.file.write("***START: " +
+                        time.asctime(time.localtime(self.last_flush)) + "\n")
+
+    # -----------------------------------------------------
+    # write frame "data" (sequence of bytes) as one record
+    # -----------------------------------------------------
+    def write(self, data):
+        time_now = time.time()
+        line = "%s : %s\n" % (time.asctime(time.localtime(time_now)),
+                              ' '.join(map(str, data)))
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line)
+            self.records += 1
+            if time_now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = time_now
+
+    # ---------------------------
+    # write "text" as it is
+    # ---------------------------
+    def write_text(self, text):
+        with self.lock:
+            if self.file is not None:
+                self.file.write(text)
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                self.last_flush = time.time()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
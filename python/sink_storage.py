@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Append-only storage of the data delivered at the sink.
+# Records (origin, sequence number, receive time, payload) are appended
+# to segmented binary files by a writer thread, the MAC thread only puts
+# them in a bounded queue. Per origin, a sparse in-memory index keeps the
+# segments holding records of the origin and the range of their receive
+# times; a time range of one node is read back by scanning only the
+# segments overlapping it. The index memory is bounded by the number of
+# origins times the number of segments (20 bytes per origin and segment,
+# whatever the number of records). It is rebuilt from the segments when
+# the storage is reopened.
+# ----------------------------------------------------------------------
+
+import os
+import io
+import re
+import time
+import array
+import struct
+import threading
+import Queue
+
+# record header: origin, sequence number, receive time, payload length
+RECORD_HEADER = struct.Struct('>BHdH')
+# segment file name
+SEGMENT_NAME = 'segment_%08d.dat'
+SEGMENT_PATTERN = re.compile(r'^segment_(\d{8})\.dat$')
+# segment size triggering a new segment, bytes
+SEGMENT_SIZE = 4*1024*1024
+# capacity of the queue of records waiting to be written
+QUEUE_SIZE = 4096
+# maximum time between two flushes, seconds
+FLUSH_INTERVAL = 1.0
+# records written per batch
+BATCH_SIZE = 256
+
+
+# Sparse index of the records of one origin
+# -----------------------------------------
+class OriginIndex(object):
+    __slots__ = ('segments', 'tmin', 'tmax')
+
+    def __init__(self):
+        # segments holding records of the origin, increasing
+        self.segments = array.array('I')
+        # minimum and maximum receive times in each of them (the
+        # receive time may go back, e.g. clock adjusted)
+        self.tmin = array.array('d')
+        self.tmax = array.array('d')
+
+    def add(self, t, segment):
+        if len(self.segments) > 0 and self.segments[-1] == segment:
+            if t < self.tmin[-1]:
+                self.tmin[-1] = t
+            if t > self.tmax[-1]:
+                self.tmax[-1] = t
+        else:
+            self.segments.append(segment)
+            self.tmin.append(t)
+            self.tmax.append(t)
+
+    # ------------------------------------------------------
+    # segments that may hold records received in [start, end]
+    # ------------------------------------------------------
+    def range(self, start, end):
+        return [s for s, lo, hi in zip(self.segments, self.tmin, self.tmax)
+                if lo <= end and hi >= start]
+
+
+# ------------------------------------------------------------
+# records of a segment file, a truncated last record (interrupted
+# write) is ignored
+# returns an iterator of (origin, sequence number, receive time,
+#                         payload)
+# ------------------------------------------------------------
+def read_records(f):
+    while True:
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        origin, seq, t, length = RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            return
+        yield (origin, seq, t, payload)
+
+
+# Segmented record storage
+# ------------------------
+class SinkStorage(object):
+
+    def __init__(self, directory, segment_size=SEGMENT_SIZE,
+                 queue_size=QUEUE_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # lock for exclusive access to the files and the index
+        self.lock = threading.Lock()
+        # per origin index
+        self.index = {}
+        # statistics
+        self.appended = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        # index of the existing segments, appends go to a new one
+        segments = self.segments()
+        for k in segments:
+            self.scan(k)
+        self.segment = segments[-1] + 1 if segments else 0
+        self.file = self.open_segment(self.segment)
+        self.offset = 0
+        # records waiting to be written
+        self.queue = Queue.Queue(queue_size)
+        # set to stop the writer once the queue is empty
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.writer)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def path(self, segment):
+        return os.path.join(self.directory, SEGMENT_NAME % segment)
+
+    # ---------------------------------
+    # numbers of the existing segments
+    # ---------------------------------
+    def segments(self):
+        found = []
+        for name in os.listdir(self.directory):
+            m = SEGMENT_PATTERN.match(name)
+            if m:
+                found.append(int(m.group(1)))
+        return sorted(found)
+
+    def open_segment(self, segment):
+        return io.open(self.path(segment), 'ab')
+
+    # ----------------------------------------
+    # index the records of an existing segment
+    # ----------------------------------------
+    def scan(self, segment):
+        with io.open(self.path(segment), 'rb') as f:
+            for origin, seq, t, payload in read_records(f):
+                self.index.setdefault(origin, OriginIndex()).add(
+                    t, segment)
+
+    # -------------------------------------------------------------
+    # append a record, never blocks
+    # returns False when the record is dropped (writer falling behind,
+    # or stopped)
+    # -------------------------------------------------------------
+    def append(self, origin, seq, t, payload):
+        if not self.thread.is_alive():
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait((origin, seq, t, payload))
+        except Queue.Full:
+            self.dropped += 1
+            return False
+        self.appended += 1
+        return True
+
+    # -------------------------------------------------------------
+    # writer thread, records are written by batches; a record that
+    # cannot be written is counted as an error and lost, writing goes
+    # on in a new segment
+    # -------------------------------------------------------------
+    def writer(self):
+        last_flush = time.time()
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except Queue.Empty:
+                batch = []
+            while batch and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Queue.Empty:
+                    break
+            with self.lock:
+                for record in batch:
+                    try:
+                        self.write(*record)
+                    except (IOError, OSError):
+                        self.errors += 1
+                        self.offset = self.segment_size
+                # stop asked and nothing left to write?
+                if self.stopping.is_set() and self.queue.empty():
+                    try:
+                        self.file.close()
+                    except (IOError, OSError):
+                        self.errors += 1
+                    self.file = None
+                    return
+                if time.time() - last_flush >= self.flush_interval:
+                    try:
+                        self.file.flush()
+                    except (IOError, OSError):
+                        self.errors += 1
+                    last_flush = time.time()
+
+    # ------------------------------------------------
+    # write one record, exclusive access assumed
+    # ------------------------------------------------
+    def write(self, origin, seq, t, payload):
+        if self.offset >= self.segment_size:
+            # new segment
+            self.file.close()
+            self.segment += 1
+            self.file = self.open_segment(self.segment)
+            self.offset = 0
+        data = bytearray(payload)
+        self.file.write(RECORD_HEADER.pack(origin, seq & 0xFFFF, t,
+                                           len(data)))
+        self.file.write(data)
+        self.index.setdefault(origin, OriginIndex()).add(t, self.segment)
+        self.offset += RECORD_HEADER.size + len(data)
+        self.written += 1
+
+    # -----------------------------------------------------------
+    # records of node "origin" received in [start, end], by receive
+    # time (in order of arrival for equal times)
+    # returns [(sequence number, receive time, payload)]
+    # -----------------------------------------------------------
+    def query(self, origin, start, end):
+        with self.lock:
+            if origin not in self.index:
+                return []
+            segments = self.index[origin].range(start, end)
+            if self.file is not None:
+                self.file.flush()
+            records = []
+            for segment in segments:
+                with io.open(self.path(segment), 'rb') as f:
+                    for o, seq, t, payload in read_records(f):
+                        if o == origin and start <= t <= end:
+                            records.append((seq, t,
+                                            list(bytearray(payload))))
+            records.sort(key=lambda r: r[1])
+            return records
+
+    # --------------------------------------------------------
+    # storage statistics
+    # returns (records appended, dropped, written, write errors,
+    #          segments, origins)
+    # --------------------------------------------------------
+    def stats(self):
+        with self.lock:
+            return (self.appended, self.dropped, self.written, self.errors,
+                    self.segment + 1, len(self.index))
+
+    # ---------------------------------------------
+    # write the queued records and close the files
+    # ---------------------------------------------
+    def close(self):
+        self.stopping.set()
+        self.thread.join()
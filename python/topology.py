@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# ---------------------------------------
+# Location-free Link State Routing (LLSR)
+# ---------------------------------------
+# Copyright 2016 Michel Barbeau, Wenqian Wang, Carleton University.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+# ----------------------------------------------------------------------
+# Sink-side topology database.
+# Nodes periodically report their parent (next hop) and their neighbors
+# to the sink. The routing tree is kept up to date incrementally: a
+# parent change moves one subtree, adjusting the subtree sizes along the
+# two ancestor paths and the depths inside the moved subtree only.
+# ----------------------------------------------------------------------
+
+import collections
+from constants import NO_ADDR
+
+
+# Node of the topology database
+# -----------------------------
+class TopologyNode(object):
+    __slots__ = ('addr', 'parent', 'children', 'neighbors', 'hc',
+                 'last_report', 'size', 'depth', 'root')
+
+    def __init__(self, addr):
+        self.addr = addr
+        # parent in the routing tree, None if unknown
+        self.parent = None
+        # children in the routing tree
+        self.children = set()
+        # reported neighbors
+        self.neighbors = set()
+        # reported hop count
+        self.hc = 255
+        # time of the last report, None if the node never reported
+        self.last_report = None
+        # number of nodes in the subtree, including this node
+        self.size = 1
+        # depth in the tree and root of the tree the node belongs to
+        self.depth = 0
+        self.root = addr
+
+
+# Topology database, routing tree rooted at the sink
+# --------------------------------------------------
+class TopologyDB(object):
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.nodes = {sink: TopologyNode(sink)}
+        # number of nodes attached to the sink per depth
+        self.depths = collections.Counter({0: 1})
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, addr):
+        return addr in self.nodes
+
+    def _node(self, addr):
+        node = self.nodes.get(addr)
+        if node is None:
+            node = self.nodes[addr] = TopologyNode(addr)
+        return node
+
+    # ------------------------------------------------------
+    # set the depth and the root of the subtree of "node"
+    # ------------------------------------------------------
+    def _relabel(self, node, depth, root):
+        delta = depth - node.depth
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.root == self.sink:
+                self.depths[n.depth] -= 1
+                if self.depths[n.depth] == 0:
+                    del self.depths[n.depth]
+            n.depth += delta
+            n.root = root
+            if root == self.sink:
+                self.depths[n.depth] += 1
+            stack.extend(self.nodes[c] for c in n.children)
+
+    # ------------------------------------------------------
+    # add "size" to the subtree sizes of "node" and ancestors
+    # ------------------------------------------------------
+    def _resize(self, node, size):
+        while node is not None:
+            node.size += size
+            node = (self.nodes[node.parent]
+                    if node.parent is not None else None)
+
+    # ----------------------------------------
+    # detach the subtree of "node" from its tree
+    # ----------------------------------------
+    def _detach(self, node):
+        if node.parent is None:
+            return
+        parent = self.nodes[node.parent]
+        parent.children.discard(node.addr)
+        self._resize(parent, -node.size)
+        node.parent = None
+        self._relabel(node, 0, node.addr)
+
+    # ------------------------------------------------------------
+    # attach the (detached) subtree of "node" under "parent"
+    # refused when "parent" is in the subtree (transient loop)
+    # ------------------------------------------------------------
+    def _attach(self, node, parent):
+        if parent.root == node.addr:
+            return False
+        node.parent = parent.addr
+        parent.children.add(node.addr)
+        self._resize(parent, node.size)
+        self._relabel(node, parent.depth + 1, parent.root)
+        return True
+
+    # -------------------------------------------------------------
+    # report from node "addr": parent, hop count and neighbors
+    # returns True when the node attached to its reported parent
+    # -------------------------------------------------------------
+    def report(self, addr, parent, hc, neighbors, time):
+        if addr == self.sink:
+            return True
+        node = self._node(addr)
+        node.hc = hc
+        node.neighbors = set(neighbors)
+        node.last_report = time
+        if parent == NO_ADDR or parent == addr:
+            parent = None
+        # parent unchanged?
+        if node.parent == parent and parent is not None:
+            return True
+        self._detach(node)
+        if parent is None:
+            return False
+        return self._attach(node, self._node(parent))
+
+    # --------------------------------------------------------
+    # remove the nodes not reported since time "deadline"
+    # their children stay, detached until they report again
+    # returns the list of removed addresses
+    # --------------------------------------------------------
+    def expire(self, deadline):
+        stale = [k for k, n in self.nodes.items()
+                 if k != self.sink and (n.last_report is None and
+                                        len(n.children) == 0 or
+                                        n.last_report is not None and
+                                        n.last_report < deadline)]
+        for k in stale:
+            node = self.nodes[k]
+            self._detach(node)
+            for c in list(node.children):
+                self._detach(self.nodes[c])
+        # parents never reported, without children any more
+        stale += [k for k, n in self.nodes.items()
+                  if k != self.sink and k not in stale and
+                  n.last_report is None and len(n.children) == 0]
+        for k in stale:
+            self.nodes.pop(k, None)
+        return stale
+
+    # -------------------------------------------------------
+    # path from the sink to node "addr", None when the node is
+    # not attached to the sink
+    # -------------------------------------------------------
+    def path(self, addr):
+        node = self.nodes.get(addr)
+        if node is None or node.root != self.sink:
+            return None
+        path = [addr]
+        while node.parent is not None:
+            path.append(node.parent)
+            node = self.nodes[node.parent]
+        path.reverse()
+        return path
+
+    # ----------------------------------------------------------
+    # number of nodes in the subtree of node "addr", 0 if unknown
+    # ----------------------------------------------------------
+    def subtree_size(self, addr):
+        node = self.nodes.get(addr)
+        return node.size if node is not None else 0
+
+    # ------------------------------------------------------------
+    # depth of node "addr" in the tree, None when it is not attached
+    # ------------------------------------------------------------
+    def depth(self, addr):
+        node = self.nodes.get(addr)
+        if node is None or node.root != self.sink:
+            return None
+        return node.depth
+
+    # ---------------------------------------------------
+    # number of nodes attached to the sink per depth
+    # returns {depth: number of nodes}
+    # ---------------------------------------------------
+    def depth_histogram(self):
+        return dict(self.depths)
+
+    # -----------------------------------------------------
+    # children of node "addr" in the tree, reported neighbors
+    # -----------------------------------------------------
+    def children(self, addr):
+        node = self.nodes.get(addr)
+        return sorted(node.children) if node is not None else []
+
+    def neighbors(self, addr):
+        node = self.nodes.get(addr)
+        return sorted(node.neighbors) if node is not None else []